@@ -0,0 +1,240 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import ExitStack
+from datetime import datetime as dt
+from typing import Any, Callable
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic import EXCEL_MAX_ROWS, write_operations
+from src.cache import get_provider_cache
+from src.readers import read_transactions
+from src.reports import spending_by_category
+from src.services import build_transactions, investing
+from src.store import load_transactions
+from src.utils import cards_info, import_from_excel, top_transactions
+from src.views import web_main
+
+# Получаем абсолютный путь до текущей директории
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Папка для синтетических данных (генерируются один раз для каждого размера) и файл с результатами замеров
+abs_data_dir = os.path.join(current_dir, "data")
+abs_results_path = os.path.join(current_dir, "results.jsonl")
+
+# Размеры наборов данных
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# Файл xlsx для import_from_excel создается только для небольших наборов: запись и чтение xlsx миллионов строк
+# занимает десятки минут (и лист xlsx вмещает не более EXCEL_MAX_ROWS строк)
+EXCEL_BENCHMARK_MAX_ROWS = 100_000
+
+# Дата отчетов и дашборда (внутри диапазона дат синтетических данных)
+BENCHMARK_DATETIME = "2021-12-29 22:32:24"
+
+# Допустимое ухудшение времени и пикового объема памяти по сравнению с предыдущим коммитом
+REGRESSION_THRESHOLD = 0.2
+
+
+class StubResponse:
+    """Ответ внешнего API для замеров: данные формируются по url без сетевых запросов"""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+    def json(self) -> dict[str, Any]:
+        if "latest/USD" in self.url or "/history/USD/" in self.url:
+            return {"conversion_rates": {"USD": 1.0, "EUR": 0.92, "RUB": 73.5, "TRY": 8.5, "CNY": 6.4}}
+        symbols = parse_qs(urlparse(self.url).query).get("symbols", [""])[0].split(",")
+        return {"data": [{"symbol": symbol, "close": 100.0} for symbol in symbols if symbol]}
+
+
+class StubProviderClient:
+    """HTTP-клиент для замеров: возвращает StubResponse вместо обращения к внешним API"""
+
+    def get(self, url: str, **kwargs: Any) -> StubResponse:
+        return StubResponse(url)
+
+
+def parse_size(size: str) -> int:
+    """Функция переводит размер набора данных ("10k", "1m", "10m" или число строк) в число строк"""
+    return SIZES.get(size.lower()) or int(size)
+
+
+def prepare_data(rows: int, data_dir: str = abs_data_dir) -> dict[str, Any]:
+    """Функция создает (или берет ранее созданные) файлы с синтетическими транзакциями
+    и готовит входные данные для замеров"""
+    csv_path = os.path.join(data_dir, f"operations_{rows}.csv")
+    if not os.path.exists(csv_path):
+        write_operations(csv_path, rows)
+    xlsx_path = os.path.join(data_dir, f"operations_{rows}.xlsx")
+    if rows <= min(EXCEL_BENCHMARK_MAX_ROWS, EXCEL_MAX_ROWS) and not os.path.exists(xlsx_path):
+        write_operations(xlsx_path, rows)
+
+    settings_path = os.path.join(data_dir, "user_settings.json")
+    with open(settings_path, "w", encoding="utf-8") as file:
+        json.dump({"user_currencies": ["USD", "EUR"], "user_stocks": ["AAPL", "AMZN", "GOOGL"]}, file)
+
+    frame = load_transactions(csv_path)
+    return {
+        "csv_path": csv_path,
+        "xlsx_path": xlsx_path if os.path.exists(xlsx_path) else None,
+        "settings_path": settings_path,
+        "frame": frame,
+        "transactions": build_transactions(frame),
+    }
+
+
+def web_main_uncached(data: dict[str, Any]) -> str:
+    """Функция строит дашборд без кэша ответов внешних API, чтобы каждый замер выполнял запросы к провайдерам"""
+    get_provider_cache().clear()
+    return web_main(data["csv_path"], BENCHMARK_DATETIME, json_file=data["settings_path"])
+
+
+# Замеряемые функции: название -> функция от подготовленных данных
+BENCHMARKS: dict[str, Callable[[dict[str, Any]], Any]] = {
+    "import_from_excel": lambda data: import_from_excel(data["xlsx_path"]),
+    "read_transactions_csv": lambda data: read_transactions(data["csv_path"]),
+    "cards_info": lambda data: cards_info(data["frame"]),
+    "top_transactions": lambda data: top_transactions(data["frame"]),
+    "spending_by_category": lambda data: spending_by_category(data["frame"], "Супермаркеты", BENCHMARK_DATETIME),
+    "investing": lambda data: investing("2021-12", data["transactions"], 50),
+    "web_main": web_main_uncached,
+}
+
+
+def measure(func: Callable[[], Any], repeat: int) -> dict[str, float]:
+    """Функция замеряет время выполнения (repeat запусков) и пиковый объем выделенной памяти (отдельный запуск)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "min_seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "peak_mb": round(peak / 2**20, 3),
+    }
+
+
+def run_benchmarks(
+    sizes: list[str], names: list[str] | None = None, repeat: int = 3, data_dir: str = abs_data_dir
+) -> list[dict[str, Any]]:
+    """Функция выполняет замеры для каждого размера набора данных и возвращает список результатов.
+    Внешние API заменены заглушкой, отчеты не записываются в файл лога отчетов"""
+    commit = current_commit()
+    records = []
+    with ExitStack() as stack:
+        # Клиент подменяется в каждом модуле, который его импортирует (курсы на даты платежей запрашивает src.fx)
+        for module in ["src.utils", "src.fx", "src.quotes"]:
+            stack.enter_context(patch(f"{module}.get_provider_client", return_value=StubProviderClient()))
+        stack.enter_context(patch("src.reports.write_log"))
+        for size in sizes:
+            rows = parse_size(size)
+            data = prepare_data(rows, data_dir)
+            for name in names or list(BENCHMARKS):
+                if name == "import_from_excel" and data["xlsx_path"] is None:
+                    continue
+                result = measure(lambda: BENCHMARKS[name](data), repeat)
+                records.append({
+                    "commit": commit,
+                    "timestamp": dt.now().isoformat(timespec="seconds"),
+                    "benchmark": name,
+                    "size": size,
+                    "rows": rows,
+                    **result,
+                })
+    return records
+
+
+def current_commit() -> str:
+    """Функция возвращает хэш текущего коммита (или "unknown" вне репозитория git)"""
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=current_dir
+        )
+        return output.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_results(results_path: str = abs_results_path) -> list[dict[str, Any]]:
+    """Функция читает сохраненные результаты замеров"""
+    if not os.path.exists(results_path):
+        return []
+    with open(results_path, "r", encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def save_results(records: list[dict[str, Any]], results_path: str = abs_results_path) -> None:
+    """Функция дописывает результаты замеров в файл (по одной записи в строке)"""
+    with open(results_path, "a", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def find_regressions(
+    records: list[dict[str, Any]], history: list[dict[str, Any]], threshold: float = REGRESSION_THRESHOLD
+) -> list[str]:
+    """Функция сравнивает замеры с последними замерами другого коммита для той же функции и размера
+    и возвращает описания ухудшений больше чем на threshold (доля)"""
+    regressions = []
+    for record in records:
+        previous = [
+            old for old in history
+            if old["benchmark"] == record["benchmark"] and old["size"] == record["size"]
+            and old["commit"] != record["commit"]
+        ]
+        if not previous:
+            continue
+        baseline = previous[-1]
+        for metric in ("min_seconds", "peak_mb"):
+            if baseline[metric] > 0 and record[metric] > baseline[metric] * (1 + threshold):
+                regressions.append(
+                    f"{record['benchmark']} [{record['size']}] {metric}: {baseline[metric]:.4f} "
+                    f"({baseline['commit']}) -> {record[metric]:.4f} ({record['commit']})"
+                )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Функция запускает замеры из командной строки. Возвращает 1, если найдены ухудшения и задан --check"""
+    parser = argparse.ArgumentParser(description="Замеры времени и памяти для основных функций проекта")
+    parser.add_argument("--sizes", nargs="+", default=["10k"], help="размеры наборов данных: 10k, 1m, 10m или число")
+    parser.add_argument("--bench", nargs="+", choices=list(BENCHMARKS), help="замеряемые функции (по умолчанию все)")
+    parser.add_argument("--repeat", type=int, default=3, help="число запусков для замера времени")
+    parser.add_argument("--results", default=abs_results_path, help="файл с результатами замеров")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="допустимое ухудшение (доля)")
+    parser.add_argument("--check", action="store_true", help="завершиться с ошибкой при ухудшении")
+    args = parser.parse_args(argv)
+
+    history = load_results(args.results)
+    records = run_benchmarks(args.sizes, args.bench, args.repeat)
+    save_results(records, args.results)
+
+    for record in records:
+        print(
+            f"{record['benchmark']:<24} {record['size']:>6} {record['min_seconds']:>10.4f} s "
+            f"{record['median_seconds']:>10.4f} s {record['peak_mb']:>10.2f} MB"
+        )
+    regressions = find_regressions(records, history, args.threshold)
+    for regression in regressions:
+        print(f"Ухудшение: {regression}")
+    return 1 if regressions and args.check else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
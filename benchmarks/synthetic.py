@@ -0,0 +1,115 @@
+import os
+from typing import cast
+
+import numpy as np
+import pandas as pd
+
+from src.readers import TRANSACTION_DTYPES
+
+# Максимальное число строк на листе xlsx (без строки заголовка)
+EXCEL_MAX_ROWS = 1_048_575
+
+# Карты, категории (с кодами MCC и описаниями) и валюты в пропорциях, близких к data/operations.xlsx
+CARDS = ["*7197", "*4556", "*5091", "*5441", "*1112", "*5507", "*6002"]
+CARD_WEIGHTS = [0.80, 0.17, 0.01, 0.006, 0.005, 0.0045, 0.0045]
+
+CATEGORIES = {
+    "Супермаркеты": (5411.0, ["Колхоз", "Магнит", "Пятёрочка", "Перекрёсток"]),
+    "Фастфуд": (5814.0, ["KFC", "Mouse Tail", "Burger King"]),
+    "Транспорт": (4111.0, ["Метро Санкт-Петербург", "Яндекс Такси"]),
+    "Переводы": (np.nan, ["Перевод Кредитная карта", "Перевод с карты"]),
+    "Ж/д билеты": (4112.0, ["РЖД"]),
+    "Различные товары": (5399.0, ["Ozon.ru", "Wildberries"]),
+    "Связь": (4814.0, ["МТС", "Билайн"]),
+    "Пополнения": (np.nan, ["Пополнение через Газпромбанк", "Внесение наличных"]),
+    "Аптеки": (5912.0, ["Аптека Вита"]),
+    "Каршеринг": (7512.0, ["Ситидрайв", "Делимобиль"]),
+}
+CATEGORY_WEIGHTS = [0.40, 0.22, 0.08, 0.07, 0.05, 0.05, 0.04, 0.04, 0.03, 0.02]
+
+CURRENCIES = ["RUB", "TRY", "EUR", "CNY", "USD"]
+CURRENCY_WEIGHTS = [0.98, 0.011, 0.005, 0.0025, 0.0015]
+
+
+def generate_operations(
+    rows: int, seed: int = 0, start: str = "2018-01-01", end: str = "2021-12-31 23:59:59"
+) -> pd.DataFrame:
+    """Функция возвращает DataFrame с rows синтетическими транзакциями той же структуры, что и data/operations.xlsx
+    (те же столбцы, типы и форматы дат). Транзакции упорядочены по убыванию даты операции, как в выгрузке банка"""
+    rng = np.random.default_rng(seed)
+
+    # Даты операции - случайные секунды в диапазоне [start, end]
+    first, last = np.datetime64(start, "s"), np.datetime64(end, "s")
+    seconds = rng.integers(0, int((last - first) / np.timedelta64(1, "s")) + 1, size=rows)
+    operation_times = np.sort(first + seconds.astype("timedelta64[s]"))[::-1]
+    payment_days = operation_times.astype("datetime64[D]") + rng.integers(0, 3, size=rows).astype("timedelta64[D]")
+
+    category_names = list(CATEGORIES)
+    category_codes = rng.choice(len(category_names), size=rows, p=CATEGORY_WEIGHTS)
+    description_codes = rng.integers(0, 4, size=rows)
+    mcc_codes = np.array([CATEGORIES[name][0] for name in category_names])
+    # Таблица описаний «категория × номер описания» (описания категории повторяются по кругу)
+    descriptions = np.array(
+        [[CATEGORIES[name][1][i % len(CATEGORIES[name][1])] for i in range(4)] for name in category_names],
+        dtype=object,
+    )
+
+    # Суммы: траты отрицательные, пополнения положительные, с копейками
+    amounts = np.round(rng.lognormal(mean=5.0, sigma=1.2, size=rows), 2)
+    amounts = np.where(np.array(category_names)[category_codes] == "Пополнения", amounts, -amounts)
+
+    operations = pd.DataFrame({
+        "Дата операции": _format_dates(operation_times, with_time=True),
+        "Дата платежа": _format_dates(payment_days, with_time=False),
+        "Номер карты": np.array(CARDS, dtype=object)[rng.choice(len(CARDS), size=rows, p=CARD_WEIGHTS)],
+        "Статус": np.where(rng.random(rows) < 0.006, "FAILED", "OK").astype(object),
+        "Сумма операции": amounts,
+        "Валюта операции": np.array(CURRENCIES, dtype=object)[
+            rng.choice(len(CURRENCIES), size=rows, p=CURRENCY_WEIGHTS)
+        ],
+        "Сумма платежа": amounts,
+        "Валюта платежа": np.full(rows, "RUB", dtype=object),
+        "Кэшбэк": np.where(rng.random(rows) < 0.1, np.round(np.abs(amounts) / 100, 2), np.nan),
+        "Категория": np.array(category_names, dtype=object)[category_codes],
+        "MCC": mcc_codes[category_codes],
+        "Описание": descriptions[category_codes, description_codes],
+        "Бонусы (включая кэшбэк)": np.where(amounts < 0, np.abs(amounts) // 50, 0).astype(np.int64),
+        "Округление на инвесткопилку": np.zeros(rows, dtype=np.int64),
+        "Сумма операции с округлением": np.abs(amounts),
+    })
+
+    # Пропуски в тех же столбцах, что и в реальной выгрузке
+    operations.loc[rng.random(rows) < 0.0015, "Дата платежа"] = np.nan
+    operations.loc[rng.random(rows) < 0.1, "Номер карты"] = np.nan
+    operations.loc[rng.random(rows) < 0.006, "Категория"] = np.nan
+    return operations.astype(TRANSACTION_DTYPES)
+
+
+def write_operations(path: str, rows: int, seed: int = 0) -> str:
+    """Функция записывает синтетические транзакции в файл xlsx или csv (по расширению) и возвращает путь до файла"""
+    operations = generate_operations(rows, seed)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.lower().endswith(".csv"):
+        operations.to_csv(path, index=False)
+    else:
+        if rows > EXCEL_MAX_ROWS:
+            raise ValueError(f"Файл xlsx вмещает не более {EXCEL_MAX_ROWS} строк")
+        operations.to_excel(path, index=False)
+    return path
+
+
+def _format_dates(values: np.ndarray, with_time: bool) -> np.ndarray:
+    """Функция переводит даты numpy в строки формата дд.мм.гггг (чч:мм:сс).
+    Строки форматируются для каждого различного дня и каждой секунды суток один раз, а не для каждой строки"""
+    days = values.astype("datetime64[D]")
+    unique_days, day_index = np.unique(days, return_inverse=True)
+    iso = np.datetime_as_string(unique_days, unit="D")
+    day_strings = np.array([f"{d[8:10]}.{d[5:7]}.{d[0:4]}" for d in iso], dtype=object)[day_index]
+    if not with_time:
+        return day_strings
+
+    seconds = (values - days).astype("timedelta64[s]").astype(np.int64)
+    time_strings = np.array(
+        [f" {s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(86400)], dtype=object
+    )[seconds]
+    return cast(np.ndarray, day_strings + time_strings)
@@ -0,0 +1,144 @@
+import os
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.dates import OPERATION_DATE_FORMAT, parse_dates
+from src.log_setup import get_logger
+
+# Получаем абсолютный путь до текущей директории
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Добавляем логгер, который записывает логи в файл logs/aggregates.log (через общую очередь записи логов)
+logger = get_logger("aggregates")
+
+# Ключ и значения материализованной таблицы трат
+AGGREGATE_KEYS = ["category", "month", "card"]
+AGGREGATE_VALUES = ["spend", "count", "cashback"]
+
+
+class SpendingAggregates:
+    """Материализованные таблицы трат: сумма платежей, количество операций и кэшбэк
+    по ключу (категория, месяц, карта). Обновляются инкрементально при добавлении строк.
+    table учитывает все транзакции с датой операции, категорией и суммой платежа (карта и кэшбэк могут
+    отсутствовать), complete_table - только транзакции без пропусков, как отчет spending_by_category"""
+
+    def __init__(self) -> None:
+        self.table = _empty_table()
+        self.complete_table = _empty_table()
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, dates: np.ndarray | None = None) -> "SpendingAggregates":
+        """Функция строит таблицы по DataFrame с транзакциями. Если даты операции уже разобраны
+        (например, в индексе по дате), их можно передать, чтобы не разбирать столбец повторно"""
+        aggregates = cls()
+        aggregates.append(frame, dates)
+        return aggregates
+
+    def append(self, frame: pd.DataFrame, dates: np.ndarray | None = None) -> None:
+        """Функция добавляет в таблицы новые транзакции"""
+        if frame.empty:
+            return
+        if dates is None:
+            dates = parse_dates(frame["Дата операции"], OPERATION_DATE_FORMAT)
+        dates = np.asarray(dates)
+        required = (frame["Категория"].notna() & frame["Сумма платежа"].notna()).to_numpy() & ~np.isnat(dates)
+        complete = required & frame.notna().all(axis=1).to_numpy()
+        self.table = _merge(self.table, _group(frame.loc[required], dates[required]))
+        self.complete_table = _merge(self.complete_table, _group(frame.loc[complete], dates[complete]))
+        logger.info("Таблица трат обновлена: добавлено %s транзакций", len(frame))
+
+    def months(
+        self, category: str, first_month: str, last_month: str, complete_rows: bool = False
+    ) -> pd.DataFrame:
+        """Функция возвращает траты по категории помесячно за месяцы first_month..last_month (YYYY-MM).
+        При complete_rows=True учитываются только транзакции без пропусков"""
+        table = self.complete_table if complete_rows else self.table
+        if category not in table.index.get_level_values("category"):
+            return pd.DataFrame(columns=AGGREGATE_VALUES, index=pd.Index([], name="month"), dtype=np.float64)
+        by_category = table.xs(category, level="category")
+        by_month = by_category.groupby(level="month").sum()
+        return by_month.loc[first_month:last_month]
+
+    def window_totals(
+        self, category: str, start: Any, end: Any, date_index: Any, complete_rows: bool = False
+    ) -> dict[str, Any]:
+        """Функция возвращает итоги по категории за период от start до end включительно.
+        Полные месяцы берутся из таблицы, крайние неполные месяцы - срезами индекса по дате.
+        При complete_rows=True учитываются только транзакции без пропусков"""
+        start_date = pd.Timestamp(start)
+        end_date = pd.Timestamp(end)
+        totals = {"spend": 0.0, "count": 0, "cashback": 0.0}
+        if start_date > end_date:
+            return totals
+
+        first_month = start_date.to_period("M")
+        last_month = end_date.to_period("M")
+
+        # Крайние месяцы считаются по строкам, попавшим в период
+        edge_ranges = [(start_date, min(end_date, first_month.end_time))]
+        if last_month != first_month:
+            edge_ranges.append((last_month.start_time, end_date))
+        for edge_start, edge_end in edge_ranges:
+            edge_rows = date_index.between(edge_start, edge_end)
+            edge_rows = edge_rows.loc[(edge_rows["Категория"] == category) & edge_rows["Сумма платежа"].notna()]
+            if complete_rows:
+                edge_rows = edge_rows.dropna()
+            totals["spend"] += float(edge_rows["Сумма платежа"].sum())
+            totals["count"] += len(edge_rows)
+            totals["cashback"] += float(edge_rows["Кэшбэк"].sum())
+
+        # Полные месяцы между крайними берутся из материализованной таблицы
+        if last_month.ordinal - first_month.ordinal > 1:
+            full_months = self.months(category, str(first_month + 1), str(last_month - 1), complete_rows)
+            totals["spend"] += float(full_months["spend"].sum())
+            totals["count"] += int(full_months["count"].sum())
+            totals["cashback"] += float(full_months["cashback"].sum())
+
+        totals["spend"] = round(totals["spend"], 2)
+        totals["cashback"] = round(totals["cashback"], 2)
+        return totals
+
+
+def _empty_table() -> pd.DataFrame:
+    """Функция возвращает пустую таблицу трат"""
+    return pd.DataFrame(
+        columns=AGGREGATE_VALUES,
+        index=pd.MultiIndex.from_arrays([[], [], []], names=AGGREGATE_KEYS),
+        dtype=np.float64,
+    )
+
+
+def _group(frame: pd.DataFrame, dates: np.ndarray) -> pd.DataFrame:
+    """Функция группирует транзакции по ключу (категория, месяц, карта). Транзакции без карты
+    попадают в ключ с пустой картой, пропуски кэшбэка считаются нулем"""
+    months = np.datetime_as_string(dates.astype("datetime64[M]"), unit="M")
+    rows = pd.DataFrame({
+        "category": frame["Категория"].to_numpy(dtype=object),
+        "month": months,
+        "card": _fill_missing(frame["Номер карты"].to_numpy(dtype=object)),
+        "spend": frame["Сумма платежа"].to_numpy(dtype=np.float64),
+        "count": np.ones(len(frame), dtype=np.float64),
+        "cashback": frame["Кэшбэк"].fillna(0).to_numpy(dtype=np.float64),
+    })
+    return rows.groupby(AGGREGATE_KEYS, sort=True).sum()
+
+
+def _merge(table: pd.DataFrame, new_rows: pd.DataFrame) -> pd.DataFrame:
+    """Функция добавляет к таблице трат сгруппированные новые транзакции. Новые ключи вставляются на свои места
+    в отсортированном индексе, суммы добавляются по позициям, без пересортировки всей таблицы"""
+    if table.empty:
+        return new_rows
+    if new_rows.empty:
+        return table
+    index = table.index.union(new_rows.index)
+    if len(index) != len(table):
+        table = table.reindex(index, fill_value=0.0)
+    table.iloc[index.get_indexer(new_rows.index)] += new_rows.to_numpy()
+    return table
+
+
+def _fill_missing(values: np.ndarray) -> np.ndarray:
+    """Функция заменяет пропуски в массиве строк пустой строкой"""
+    return np.where(pd.isna(values), "", values)
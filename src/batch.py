@@ -0,0 +1,104 @@
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.dates import PAYMENT_DATE_FORMAT, parse_dates
+
+# Значение дня платежа для транзакций без даты платежа
+MISSING_DAY = np.iinfo(np.int32).min
+
+
+class TransactionBatch:
+    """Компактное представление транзакций: параллельные массивы numpy вместо списка словарей.
+    Даты платежа хранятся как int32 (дни от 1970-01-01), карты, категории и описания закодированы словарем
+    (коды int32, -1 - пропуск)"""
+
+    def __init__(
+        self,
+        payment_days: np.ndarray,
+        amounts: np.ndarray,
+        rounded_amounts: np.ndarray,
+        card_codes: np.ndarray,
+        cards: np.ndarray,
+        category_codes: np.ndarray,
+        categories: np.ndarray,
+        description_codes: np.ndarray,
+        descriptions: np.ndarray,
+    ) -> None:
+        self.payment_days = payment_days
+        self.amounts = amounts
+        self.rounded_amounts = rounded_amounts
+        self.card_codes = card_codes
+        self.cards = cards
+        self.category_codes = category_codes
+        self.categories = categories
+        self.description_codes = description_codes
+        self.descriptions = descriptions
+
+    @classmethod
+    def from_frame(cls, input_df: pd.DataFrame) -> "TransactionBatch":
+        """Функция принимает на вход DataFrame с транзакциями и возвращает TransactionBatch"""
+        payment_dates = parse_dates(input_df["Дата платежа"], PAYMENT_DATE_FORMAT, unit="D")
+        payment_days = payment_dates.astype(np.int64)
+        payment_days[np.isnat(payment_dates)] = MISSING_DAY
+
+        card_codes, cards = pd.factorize(input_df["Номер карты"])
+        category_codes, categories = pd.factorize(input_df["Категория"])
+        description_codes, descriptions = pd.factorize(input_df["Описание"])
+        return cls(
+            payment_days=payment_days.astype(np.int32),
+            amounts=input_df["Сумма платежа"].to_numpy(dtype=np.float64),
+            rounded_amounts=input_df["Сумма операции с округлением"].to_numpy(dtype=np.float64),
+            card_codes=card_codes.astype(np.int32),
+            cards=np.asarray(cards, dtype=object),
+            category_codes=category_codes.astype(np.int32),
+            categories=np.asarray(categories, dtype=object),
+            description_codes=description_codes.astype(np.int32),
+            descriptions=np.asarray(descriptions, dtype=object),
+        )
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def take(self, selector: Any) -> "TransactionBatch":
+        """Функция возвращает TransactionBatch с выбранными строками (маска, индексы или срез).
+        Словари карт, категорий и описаний общие с исходным TransactionBatch"""
+        return TransactionBatch(
+            payment_days=self.payment_days[selector],
+            amounts=self.amounts[selector],
+            rounded_amounts=self.rounded_amounts[selector],
+            card_codes=self.card_codes[selector],
+            cards=self.cards,
+            category_codes=self.category_codes[selector],
+            categories=self.categories,
+            description_codes=self.description_codes[selector],
+            descriptions=self.descriptions,
+        )
+
+    def payment_dates(self) -> np.ndarray:
+        """Функция возвращает даты платежа как datetime64[D] (NaT для транзакций без даты платежа)"""
+        dates = self.payment_days.astype("datetime64[D]")
+        dates[self.payment_days == MISSING_DAY] = np.datetime64("NaT")
+        return dates
+
+    def nbytes(self) -> int:
+        """Функция возвращает объем памяти, занятый массивами строк (без словарей)"""
+        return sum(
+            column.nbytes
+            for column in (
+                self.payment_days, self.amounts, self.rounded_amounts, self.card_codes, self.category_codes,
+                self.description_codes,
+            )
+        )
+
+
+def decode(codes: np.ndarray, values: np.ndarray) -> list[Any]:
+    """Функция восстанавливает значения по кодам словаря. Код -1 означает пропуск (None)"""
+    return [values[code] if code >= 0 else None for code in codes]
+
+
+def format_days(days: np.ndarray) -> list[str | None]:
+    """Функция переводит дни от 1970-01-01 в строки дат в формате дд.мм.гггг"""
+    iso_dates = np.datetime_as_string(days.astype("datetime64[D]"), unit="D")
+    return [f"{iso[8:10]}.{iso[5:7]}.{iso[0:4]}" if day != MISSING_DAY else None for iso, day in zip(iso_dates, days)]
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import date as date_type
+from typing import Any, Callable, Iterator
+
+from src.log_setup import get_logger
+
+# Получаем абсолютный путь до текущей директории
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Добавляем логгер, который записывает логи в файл logs/cache.log (через общую очередь записи логов)
+logger = get_logger("cache")
+
+# Время жизни данных "latest" в секундах и максимальное число записей в памяти по умолчанию
+PROVIDER_CACHE_TTL = 3600.0
+PROVIDER_CACHE_MAX_ENTRIES = 1024
+
+# Время, в течение которого устаревший ответ еще отдается, пока в фоне строится новый (stale-while-revalidate),
+# и максимальное число ответов в памяти
+RESPONSE_CACHE_STALE_TTL = 86400.0
+RESPONSE_CACHE_MAX_ENTRIES = 256
+
+# Дата для актуальных (не исторических) данных, например последних курсов валют
+LATEST = "latest"
+
+
+class ProviderCache:
+    """Кэш ответов внешних API по ключу (провайдер, символ, дата).
+    Данные "latest" и данные за сегодня живут ttl секунд, исторические данные не устаревают.
+    Записи хранятся в памяти с вытеснением давно не используемых (LRU) и, при необходимости, в SQLite"""
+
+    def __init__(
+        self,
+        ttl: float = PROVIDER_CACHE_TTL,
+        max_entries: int = PROVIDER_CACHE_MAX_ENTRIES,
+        db_path: str | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.clock = clock
+        self._entries: OrderedDict[tuple[str, str, str], tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        if db_path is not None:
+            with self._connect() as connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS provider_cache (provider TEXT, symbol TEXT, date TEXT, value TEXT, "
+                    "stored_at REAL, PRIMARY KEY (provider, symbol, date))"
+                )
+
+    def get(self, provider: str, symbol: str, date: str = LATEST) -> Any | None:
+        """Функция возвращает значение из кэша или None, если записи нет или она устарела"""
+        key = (provider, symbol, date)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None and self.db_path is not None:
+            entry = self._load(key)
+            if entry is not None:
+                self._remember(key, entry)
+        if entry is None:
+            return None
+
+        value, stored_at = entry
+        if self._expired(date, stored_at):
+            logger.info("Запись кэша устарела: %s", key)
+            return None
+        return value
+
+    def set(self, provider: str, symbol: str, date: str, value: Any) -> None:
+        """Функция сохраняет значение в кэш"""
+        key = (provider, symbol, date)
+        entry = (value, self.clock())
+        self._remember(key, entry)
+        if self.db_path is not None:
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO provider_cache VALUES (?, ?, ?, ?, ?)",
+                    (*key, json.dumps(value, ensure_ascii=False), entry[1]),
+                )
+
+    def clear(self) -> None:
+        """Функция очищает кэш в памяти и на диске"""
+        with self._lock:
+            self._entries.clear()
+        if self.db_path is not None:
+            with self._connect() as connection:
+                connection.execute("DELETE FROM provider_cache")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expired(self, date: str, stored_at: float) -> bool:
+        """Функция проверяет, устарела ли запись. Исторические данные (до сегодняшнего дня) не устаревают"""
+        if date != LATEST and date < date_type.today().isoformat():
+            return False
+        return self.clock() - stored_at > self.ttl
+
+    def _remember(self, key: tuple[str, str, str], entry: tuple[Any, float]) -> None:
+        """Функция сохраняет запись в памяти и вытесняет самую давно не используемую запись"""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self, key: tuple[str, str, str]) -> tuple[Any, float] | None:
+        """Функция читает запись из SQLite"""
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT value, stored_at FROM provider_cache WHERE provider = ? AND symbol = ? AND date = ?", key
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Функция открывает соединение с SQLite, фиксирует изменения и закрывает соединение"""
+        connection = sqlite3.connect(self.db_path)  # type: ignore[arg-type]
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+
+class ResponseCache:
+    """Кэш готовых ответов (например, json сводки web_main) по ключу от версии данных, периода и настроек.
+    Ответ живет ttl секунд - столько же, сколько данные "latest" внешних API, из которых он построен.
+    При stale_while_revalidate=True устаревший (но не старше ttl + stale_ttl) ответ отдается сразу,
+    а новый строится в фоновом потоке"""
+
+    def __init__(
+        self,
+        ttl: float = PROVIDER_CACHE_TTL,
+        stale_ttl: float = RESPONSE_CACHE_STALE_TTL,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        stale_while_revalidate: bool = False,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.stale_while_revalidate = stale_while_revalidate
+        self.clock = clock
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._refreshing: dict[str, Future] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Функция возвращает ключ кэша: хэш частей ключа (версия данных, период, настройки и т. д.)"""
+        return hashlib.sha256(json.dumps(parts, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+    def get_or_build(
+        self, key: str, build: Callable[[], str], cacheable: Callable[[str], bool] | None = None
+    ) -> str:
+        """Функция возвращает ответ из кэша или строит его функцией build и сохраняет в кэш.
+        Если передана функция cacheable и для построенного ответа она возвращает False (например, ответ неполный),
+        ответ отдается, но в кэш не сохраняется"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = self.clock() - stored_at
+            if age <= self.ttl:
+                return value
+            if self.stale_while_revalidate and age <= self.ttl + self.stale_ttl:
+                logger.info("Ответ из кэша устарел, отдается до обновления в фоне: %s", key)
+                self._refresh(key, build, cacheable)
+                return value
+
+        value = build()
+        if cacheable is None or cacheable(value):
+            self._remember(key, value)
+        return value
+
+    def join(self) -> None:
+        """Функция ждет завершения фоновых обновлений"""
+        with self._lock:
+            futures = list(self._refreshing.values())
+        wait(futures)
+
+    def clear(self) -> None:
+        """Функция очищает кэш"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _refresh(self, key: str, build: Callable[[], str], cacheable: Callable[[str], bool] | None = None) -> None:
+        """Функция запускает построение нового ответа в фоне (не больше одного обновления на ключ)"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="response-cache")
+            self._refreshing[key] = self._executor.submit(self._rebuild, key, build, cacheable)
+
+    def _rebuild(self, key: str, build: Callable[[], str], cacheable: Callable[[str], bool] | None = None) -> None:
+        try:
+            value = build()
+            if cacheable is None or cacheable(value):
+                self._remember(key, value)
+        except Exception as e:
+            logger.exception("Ошибка при обновлении ответа в кэше %s: %s", key, e)
+        finally:
+            with self._lock:
+                self._refreshing.pop(key, None)
+
+    def _remember(self, key: str, value: str) -> None:
+        """Функция сохраняет ответ и вытесняет самый давно не используемый"""
+        with self._lock:
+            self._entries[key] = (value, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_provider_cache: ProviderCache | None = None
+_response_cache: ResponseCache | None = None
+
+
+def get_provider_cache() -> ProviderCache:
+    """Функция возвращает общий кэш ответов внешних API, созданный при первом обращении.
+    Настройки берутся из переменных окружения: PROVIDER_CACHE_DB - путь до файла SQLite
+    (если не задан, кэш хранится только в памяти), PROVIDER_CACHE_TTL, PROVIDER_CACHE_MAX_ENTRIES"""
+    global _provider_cache
+    if _provider_cache is None:
+        _provider_cache = ProviderCache(
+            ttl=float(os.getenv("PROVIDER_CACHE_TTL", PROVIDER_CACHE_TTL)),
+            max_entries=int(os.getenv("PROVIDER_CACHE_MAX_ENTRIES", PROVIDER_CACHE_MAX_ENTRIES)),
+            db_path=os.getenv("PROVIDER_CACHE_DB") or None,
+        )
+    return _provider_cache
+
+
+def get_response_cache() -> ResponseCache:
+    """Функция возвращает общий кэш ответов сводки, созданный при первом обращении.
+    Настройки берутся из переменных окружения: PROVIDER_CACHE_TTL (время жизни ответа),
+    RESPONSE_CACHE_STALE_TTL, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_SWR (1 - режим stale-while-revalidate)"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            ttl=float(os.getenv("PROVIDER_CACHE_TTL", PROVIDER_CACHE_TTL)),
+            stale_ttl=float(os.getenv("RESPONSE_CACHE_STALE_TTL", RESPONSE_CACHE_STALE_TTL)),
+            max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", RESPONSE_CACHE_MAX_ENTRIES)),
+            stale_while_revalidate=os.getenv("RESPONSE_CACHE_SWR", "") == "1",
+        )
+    return _response_cache
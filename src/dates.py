@@ -0,0 +1,42 @@
+from datetime import datetime as dt
+from functools import lru_cache
+from typing import Any, cast
+
+import numpy as np
+import pandas as pd
+
+# Форматы дат: дата и время операции, дата платежа и дата запроса (входящая дата сводки и отчетов)
+OPERATION_DATE_FORMAT = "%d.%m.%Y %H:%M:%S"
+PAYMENT_DATE_FORMAT = "%d.%m.%Y"
+INPUT_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def parse_dates(values: Any, date_format: str, unit: str = "ns") -> np.ndarray:
+    """Функция переводит столбец строк с датами в массив datetime64 с точностью unit.
+    Каждая различная строка разбирается один раз (даты платежа и операции сильно повторяются),
+    пропуски становятся NaT"""
+    codes, uniques = pd.factorize(pd.Series(values, copy=False), sort=False)
+    parsed_uniques = pd.to_datetime(pd.Series(uniques), format=date_format, cache=False).to_numpy(
+        dtype=f"datetime64[{unit}]"
+    )
+    parsed = np.empty(len(codes), dtype=f"datetime64[{unit}]")
+    parsed[codes >= 0] = parsed_uniques[codes[codes >= 0]]
+    parsed[codes < 0] = np.datetime64("NaT")
+    return parsed
+
+
+def format_iso_dates(values: np.ndarray) -> list[str]:
+    """Функция переводит массив datetime64 в строки дат формата гггг-мм-дд"""
+    return cast(list[str], np.datetime_as_string(np.asarray(values).astype("datetime64[D]"), unit="D").tolist())
+
+
+@lru_cache(maxsize=4096)
+def parse_input_datetime(input_datetime: str) -> dt:
+    """Функция разбирает дату запроса (гггг-мм-дд чч:мм:сс). Результат кэшируется для повторяющихся дат"""
+    return dt.strptime(input_datetime, INPUT_DATETIME_FORMAT)
+
+
+@lru_cache(maxsize=4096)
+def payment_date_to_iso(payment_date: str) -> str:
+    """Функция переводит дату платежа (дд.мм.гггг) в формат гггг-мм-дд. Результат кэшируется"""
+    return dt.strptime(payment_date, PAYMENT_DATE_FORMAT).strftime("%Y-%m-%d")
@@ -0,0 +1,200 @@
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Iterable, cast
+
+import numpy as np
+import pandas as pd
+import requests
+
+from src.cache import LATEST, ProviderCache, get_provider_cache
+from src.dates import OPERATION_DATE_FORMAT, PAYMENT_DATE_FORMAT, format_iso_dates, parse_dates
+from src.http_client import describe_error, get_provider_client
+from src.log_setup import get_logger
+from src.utils import API_KEY_FOR_CURRENCY, CURRENCY_API_URL, MAX_CONCURRENT_REQUESTS
+
+# Получаем абсолютный путь до текущей директории
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Добавляем логгер, который записывает логи в файл logs/fx.log (через общую очередь записи логов)
+logger = get_logger("fx")
+
+# Валюта, в которую пересчитываются суммы по умолчанию (валюта счета)
+BASE_CURRENCY = "RUB"
+
+# Столбцы с суммами в валюте платежа
+AMOUNT_COLUMNS = ["Сумма платежа", "Сумма операции с округлением"]
+
+# Время в секундах, в течение которого дата, курсы на которую получить не удалось, повторно не запрашивается
+FX_FAILURE_TTL = 60.0
+
+# Даты, курсы на которые получить не удалось: запись живет FX_FAILURE_TTL секунд
+failed_days = ProviderCache(ttl=FX_FAILURE_TTL)
+
+
+class FxRateTable:
+    """Таблица курсов валют по датам: курсы за 1 USD (как в ответе exchangerate-api), строка - дата, столбец - валюта.
+    Пересчет выполняется поиском по массивам: для каждой транзакции берется курс на ее дату,
+    а если такой даты в таблице нет - на ближайшую более раннюю (или самую раннюю из таблицы)"""
+
+    def __init__(self, days: np.ndarray, currencies: list[str], usd_rates: np.ndarray) -> None:
+        order = np.argsort(days)
+        self.days = np.asarray(days, dtype="datetime64[D]")[order]
+        self.currencies = currencies
+        self.usd_rates = np.asarray(usd_rates, dtype=float).reshape(len(order), len(currencies))[order]
+        self._columns = {currency: column for column, currency in enumerate(currencies)}
+
+    @classmethod
+    def from_rates(cls, rates: dict[str, dict[str, float]]) -> "FxRateTable":
+        """Функция строит таблицу из словаря {дата гггг-мм-дд: {валюта: курс за 1 USD}}"""
+        currencies = sorted({currency for day_rates in rates.values() for currency in day_rates})
+        columns = {currency: column for column, currency in enumerate(currencies)}
+        days = sorted(rates)
+        usd_rates = np.full((len(days), len(currencies)), np.nan)
+        for row, day in enumerate(days):
+            for currency, rate in rates[day].items():
+                usd_rates[row, columns[currency]] = rate
+        return cls(np.array(days, dtype="datetime64[D]"), currencies, usd_rates)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def rates(self, currencies: np.ndarray, days: np.ndarray, base: str = BASE_CURRENCY) -> np.ndarray:
+        """Функция возвращает стоимость 1 единицы валюты currencies[i] в валюте base на дату days[i].
+        Для базовой валюты курс равен 1, для валют и дат без курса - NaN"""
+        currencies = np.asarray(currencies, dtype=object)
+        result = np.full(len(currencies), np.nan)
+        result[currencies == base] = 1.0
+        if not len(self.days) or base not in self._columns:
+            return result
+
+        # Код валюты -1 (пропуск) попадает на последний элемент - столбец -1 (нет курса)
+        codes, uniques = pd.factorize(pd.Series(currencies, copy=False))
+        columns = np.append([self._columns.get(currency, -1) for currency in uniques], -1).astype(int)[codes]
+        days = np.asarray(days, dtype="datetime64[D]")
+        known = (columns >= 0) & (currencies != base) & ~np.isnat(days)
+        positions = (np.searchsorted(self.days, days[known], side="right") - 1).clip(min=0)
+        base_rates = self.usd_rates[positions, self._columns[base]]
+        result[known] = base_rates / self.usd_rates[positions, columns[known]]
+        return result
+
+
+def fetch_fx_rates(day: str) -> dict[str, float] | None:
+    """Функция принимает на вход дату (гггг-мм-дд) и возвращает курсы всех валют за 1 USD на эту дату.
+    Курсы за день запрашиваются одним запросом и сохраняются в кэш (исторические курсы не устаревают).
+    Если получить курсы не удалось, функция возвращает None и FX_FAILURE_TTL секунд не запрашивает эту дату"""
+    provider_cache = get_provider_cache()
+    conversion_rates = provider_cache.get("exchangerate", "USD", day)
+    if conversion_rates is not None:
+        return cast(dict[str, float], conversion_rates)
+    if failed_days.get("exchangerate", day) is not None:
+        return None
+
+    year, month, day_of_month = (int(part) for part in day.split("-"))
+    url = f"{CURRENCY_API_URL}/{API_KEY_FOR_CURRENCY}/history/USD/{year}/{month}/{day_of_month}"
+    try:
+        response = get_provider_client().get(url)
+        conversion_rates = response.json()["conversion_rates"]
+    except (requests.RequestException, ValueError, KeyError) as e:
+        logger.warning("Не удалось получить курсы валют на %s: %s", day, describe_error(e))
+        failed_days.set("exchangerate", day, LATEST, True)
+        return None
+    provider_cache.set("exchangerate", "USD", day, conversion_rates)
+    return cast(dict[str, float], conversion_rates)
+
+
+def load_fx_table(
+    days: Iterable[str], max_workers: int = MAX_CONCURRENT_REQUESTS, executor: Executor | None = None
+) -> FxRateTable:
+    """Функция принимает на вход даты (гггг-мм-дд) и возвращает таблицу курсов на эти даты.
+    Каждая дата запрашивается один раз (курсы, которых нет в кэше, запрашиваются параллельно
+    в пуле executor или, если он не передан, в своем пуле из max_workers потоков)"""
+    unique_days = sorted(set(days))
+    rates: dict[str, Any] = {}
+    if unique_days and executor is not None:
+        rates = dict(zip(unique_days, executor.map(fetch_fx_rates, unique_days)))
+    elif unique_days:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_days)))) as own_executor:
+            rates = dict(zip(unique_days, own_executor.map(fetch_fx_rates, unique_days)))
+    logger.info("Таблица курсов валют: %s дат", len(unique_days))
+    return FxRateTable.from_rates({day: day_rates for day, day_rates in rates.items() if day_rates})
+
+
+def fx_days(input_df: pd.DataFrame, base: str = BASE_CURRENCY) -> list[str]:
+    """Функция принимает на вход DataFrame с транзакциями и возвращает даты (гггг-мм-дд), курсы на которые нужны
+    для пересчета сумм в валюту base: даты платежей (или операций) в другой валюте"""
+    foreign = foreign_rows(input_df, base)
+    if not foreign.any():
+        return []
+    days = _payment_days(input_df)
+    return format_iso_dates(np.unique(days[foreign & ~np.isnat(days)]))
+
+
+def normalize_amounts(
+    input_df: pd.DataFrame,
+    base: str = BASE_CURRENCY,
+    fx_table: FxRateTable | None = None,
+    drop_unconverted: bool = False,
+) -> pd.DataFrame:
+    """Функция принимает на вход DataFrame с транзакциями и возвращает DataFrame, в котором суммы в валюте платежа
+    ("Сумма платежа", "Сумма операции с округлением") пересчитаны в валюту base по курсу на дату платежа
+    (или дату операции, если даты платежа нет) и округлены до копеек. Если все платежи уже в валюте base,
+    возвращается тот же DataFrame. Курсы берутся из fx_table или запрашиваются по датам платежей в другой валюте.
+    Суммы, для которых курса нет, остаются в валюте платежа, а при drop_unconverted=True такие транзакции
+    исключаются, чтобы не складывать суммы в разных валютах"""
+    currencies = input_df["Валюта платежа"].to_numpy(dtype=object)
+    foreign = foreign_rows(input_df, base)
+    if not foreign.any():
+        return input_df
+
+    days = _payment_days(input_df)
+    if fx_table is None:
+        fx_table = load_fx_table(format_iso_dates(np.unique(days[foreign & ~np.isnat(days)])))
+    rates = fx_table.rates(currencies, days, base)
+    converted = foreign & ~np.isnan(rates)
+    unconverted = foreign & ~converted
+    if unconverted.any():
+        action = "исключены" if drop_unconverted else "оставлены в валюте платежа"
+        logger.warning("Нет курса для %s транзакций, суммы %s", int(unconverted.sum()), action)
+
+    output_df = input_df.copy()
+    for column in AMOUNT_COLUMNS:
+        if column in output_df.columns:
+            amounts = output_df[column].to_numpy(dtype=float)
+            output_df[column] = np.where(converted, np.round(amounts * np.where(converted, rates, 1.0), 2), amounts)
+    output_df["Валюта платежа"] = np.where(converted, base, currencies)
+    if drop_unconverted and unconverted.any():
+        output_df = output_df[~unconverted]
+    logger.info("Суммы %s транзакций пересчитаны в %s", int(converted.sum()), base)
+    return output_df
+
+
+def foreign_rows(input_df: pd.DataFrame, base: str = BASE_CURRENCY) -> np.ndarray:
+    """Функция возвращает маску транзакций в валюте, отличной от base (транзакции без валюты не учитываются)"""
+    currencies = input_df["Валюта платежа"].to_numpy(dtype=object)
+    return cast(np.ndarray, (currencies != base) & pd.notna(currencies))
+
+
+def unconverted_records(input_df: pd.DataFrame, base: str = BASE_CURRENCY) -> list[dict[str, Any]]:
+    """Функция принимает на вход DataFrame после normalize_amounts и возвращает список транзакций,
+    суммы которых остались в валюте платежа (курса на дату платежа нет)"""
+    records = input_df[foreign_rows(input_df, base)].to_dict("records")
+    return [
+        {
+            "date": record["Дата платежа"],
+            "amount": record["Сумма платежа"],
+            "currency": record["Валюта платежа"],
+            "category": record["Категория"],
+            "description": record["Описание"],
+        }
+        for record in records
+    ]
+
+
+def _payment_days(input_df: pd.DataFrame) -> np.ndarray:
+    """Функция возвращает даты платежей (datetime64[D]), а для транзакций без даты платежа - даты операций"""
+    days = parse_dates(input_df["Дата платежа"], PAYMENT_DATE_FORMAT, unit="D")
+    missing_days = np.isnat(days)
+    if missing_days.any() and "Дата операции" in input_df.columns:
+        operation_days = parse_dates(input_df["Дата операции"], OPERATION_DATE_FORMAT, unit="D")
+        days[missing_days] = operation_days[missing_days]
+    return days
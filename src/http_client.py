@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+from typing import Any, Callable
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.log_setup import get_logger
+
+# Получаем абсолютный путь до текущей директории
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Добавляем логгер, который записывает логи в файл logs/http_client.log (через общую очередь записи логов)
+logger = get_logger("http_client")
+
+# Настройки по умолчанию: таймаут запроса (подключение, чтение) в секундах, число повторов,
+# базовая задержка между повторами, порог ошибок и время, на которое размыкается предохранитель
+DEFAULT_TIMEOUT = (3.05, 10.0)
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+DEFAULT_POOL_SIZE = 10
+
+# Коды ответа, при которых запрос повторяется
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(requests.RequestException):
+    """Ошибка: предохранитель для провайдера разомкнут, запрос не выполняется"""
+
+
+def describe_error(error: BaseException) -> str:
+    """Функция возвращает описание ошибки запроса для логов: тип ошибки, хост и код ответа.
+    Текст ошибок requests содержит полный url с ключом API, поэтому в логи он не попадает"""
+    parts = [type(error).__name__]
+    request = getattr(error, "request", None)
+    response = getattr(error, "response", None)
+    url = getattr(request, "url", None) or getattr(response, "url", None)
+    if url:
+        parts.append(urlparse(url).netloc)
+    if response is not None:
+        parts.append(str(response.status_code))
+    return " ".join(parts)
+
+
+class CircuitBreaker:
+    """Предохранитель: после failure_threshold ошибок подряд размыкается на reset_timeout секунд.
+    По истечении времени пропускает один пробный запрос (остальные по-прежнему отклоняются);
+    успех замыкает предохранитель, ошибка снова размыкает"""
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Функция проверяет, можно ли выполнить запрос. После размыкания разрешается только один пробный
+        запрос, пока не будет записан его результат"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or self.clock() - self.opened_at < self.reset_timeout:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self.probing = False
+
+    def release(self) -> None:
+        """Функция снимает пробный запрос без результата (запрос завершился ошибкой, не связанной с провайдером)"""
+        with self._lock:
+            self.probing = False
+
+
+class ProviderClient:
+    """HTTP-клиент для внешних API: общий пул соединений (keep-alive), таймауты,
+    повторы с экспоненциальной задержкой и предохранитель для каждого хоста"""
+
+    def __init__(
+        self,
+        timeout: Any = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.sleep = sleep
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        """Функция возвращает предохранитель для хоста из url"""
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[host]
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """Функция выполняет GET-запрос с таймаутом, повторами и предохранителем"""
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Предохранитель разомкнут для {urlparse(url).netloc}")
+
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error: Exception = e
+            except Exception:
+                breaker.release()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    return response
+                error = requests.HTTPError(f"Ответ {response.status_code}", response=response)
+
+            breaker.record_failure()
+            if attempt == self.retries or not breaker.allow():
+                break
+            delay = self.backoff * 2**attempt
+            logger.warning("Запрос не выполнен (%s), повтор через %s с", describe_error(error), delay)
+            self.sleep(delay)
+
+        logger.warning("Запрос не выполнен после %s попыток: %s", attempt + 1, describe_error(error))
+        raise error
+
+    def close(self) -> None:
+        """Функция закрывает пул соединений"""
+        self.session.close()
+
+
+_provider_client: ProviderClient | None = None
+
+
+def get_provider_client() -> ProviderClient:
+    """Функция возвращает общий HTTP-клиент для внешних API, созданный при первом обращении"""
+    global _provider_client
+    if _provider_client is None:
+        _provider_client = ProviderClient()
+    return _provider_client
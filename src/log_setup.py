@@ -0,0 +1,271 @@
+import atexit
+import io
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime as dt
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import IO, Any, Iterator
+
+# Получаем абсолютный путь до текущей директории
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Папка с файлами логов: логгер name пишет в файл logs/name.log
+abs_log_dir = os.path.abspath(os.path.join(current_dir, "../logs"))
+
+# Размер файла лога, после которого он переименовывается в .1, .2, ..., и число хранимых старых файлов
+LOG_MAX_BYTES = 5 * 2**20
+LOG_BACKUP_COUNT = 3
+
+# Логгер для текстов отчетов (декоратор log в src.reports): сообщение записывается в файл из extra["log_file"] как есть
+REPORTS_LOGGER = "reports_log"
+
+# Тексты отчетов записываются в файл частями по столько символов, чтобы ротация проверялась на каждой части
+REPORT_CHUNK_CHARS = 64 * 2**10
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись лога как json-объект в одной строке"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": dt.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class MessageFormatter(logging.Formatter):
+    """Возвращает только текст сообщения (без текста исключения)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return record.getMessage()
+
+
+class RoutingHandler(logging.Handler):
+    """Обработчик в потоке записи: направляет запись в файл своего логгера (logs/name.log)
+    или, для текстов отчетов, в файл из extra["log_file"]. Файлы ротируются по размеру.
+    Если папка не задана, используется папка из set_log_dir; туда же попадают отчеты из папки logs/"""
+
+    def __init__(self, log_dir: str | None = None) -> None:
+        super().__init__()
+        self.log_dir = log_dir
+        self._handlers: dict[str, RotatingFileHandler] = {}
+        self._spools: dict[str, IO[str]] = {}
+        self._json_formatter = JsonFormatter()
+        self._raw_formatter = logging.Formatter("%(message)s")
+
+    def emit(self, record: logging.LogRecord) -> None:
+        log_dir = self.log_dir or _log_dir
+        report_file = getattr(record, "log_file", None)
+        if not report_file:
+            self._file_handler(os.path.join(log_dir, f"{record.name}.log"), report=False).handle(record)
+            return
+        if os.path.dirname(os.path.abspath(report_file)) == abs_log_dir:
+            report_file = os.path.join(log_dir, os.path.basename(report_file))
+        stream_id = getattr(record, "report_stream", None)
+        if stream_id is None:
+            self._write_report(report_file, record, io.StringIO(record.getMessage()))
+            return
+        # Части потокового отчета копятся во временном файле и дописываются в файл отчета при закрытии потока
+        spool = self._spools.get(stream_id)
+        if spool is None:
+            spool = self._spools[stream_id] = tempfile.TemporaryFile("w+", encoding="utf-8")
+        spool.write(record.getMessage())
+        end = getattr(record, "report_stream_end", None)
+        if end is None:
+            return
+        del self._spools[stream_id]
+        with spool:
+            if end == "close":
+                spool.seek(0)
+                self._write_report(report_file, record, spool)
+
+    def _write_report(self, path: str, record: logging.LogRecord, text: IO[str]) -> None:
+        """Функция дописывает текст отчета в файл path частями по REPORT_CHUNK_CHARS символов"""
+        handler = self._file_handler(path, report=True)
+        while chunk := text.read(REPORT_CHUNK_CHARS):
+            handler.handle(logging.makeLogRecord({**record.__dict__, "msg": chunk, "args": None}))
+
+    def _file_handler(self, path: str, report: bool) -> RotatingFileHandler:
+        """Функция возвращает обработчик файла path (открывает его при первом обращении)"""
+        handler = self._handlers.get(path)
+        if handler is None:
+            handler = RotatingFileHandler(
+                path, "a", maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8", delay=True
+            )
+            if report:
+                handler.terminator = ""
+                handler.setFormatter(self._raw_formatter)
+            else:
+                handler.setFormatter(self._json_formatter)
+            self._handlers[path] = handler
+        return handler
+
+    def close_files(self) -> None:
+        """Функция закрывает открытые файлы логов (при следующей записи они открываются заново)"""
+        with self.lock:  # type: ignore[union-attr]
+            for handler in self._handlers.values():
+                handler.close()
+            self._handlers.clear()
+
+    def close(self) -> None:
+        self.close_files()
+        for spool in self._spools.values():
+            spool.close()
+        self._spools.clear()
+        super().close()
+
+
+class PipelineQueueHandler(QueueHandler):
+    """Обработчик в потоке запроса: только кладет запись в общую очередь, запись в файлы выполняет поток записи.
+    В процессе-обработчике (см. forward_logs) записи передаются в очередь родительского процесса"""
+
+    def __init__(self) -> None:
+        super().__init__(None)  # type: ignore[arg-type]
+        self.setFormatter(MessageFormatter())
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Аргументы подставляются в сообщение сразу, текст исключения сохраняется отдельно для JsonFormatter
+        exc_text = logging.Formatter().formatException(record.exc_info) if record.exc_info else record.exc_text
+        record = super().prepare(record)
+        record.exc_text = exc_text
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if _forward_queue is not None:
+            _forward_queue.put_nowait(record)
+        else:
+            _start_listener().put_nowait(record)
+
+
+_log_dir = abs_log_dir
+_queue: queue.Queue | None = None
+_listener: QueueListener | None = None
+_listener_pid: int | None = None
+_forward_queue: Any = None
+_lock = threading.Lock()
+_report_streams = itertools.count()
+_handler = PipelineQueueHandler()
+
+
+def _start_listener() -> queue.Queue:
+    """Функция запускает поток записи логов при первом обращении (и заново в дочернем процессе после fork)"""
+    global _queue, _listener, _listener_pid
+    if _listener_pid == os.getpid() and _queue is not None:
+        return _queue
+    with _lock:
+        if _listener_pid != os.getpid() or _queue is None:
+            _queue = queue.Queue()
+            _listener = QueueListener(_queue, RoutingHandler())
+            _listener.start()
+            _listener_pid = os.getpid()
+    return _queue
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Функция возвращает логгер, записи которого попадают в файл logs/name.log в формате json.
+    Записи передаются в общую очередь, файлы пишет отдельный поток, поэтому запись лога не задерживает запрос"""
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    if _handler not in logger.handlers:
+        logger.addHandler(_handler)
+    return logger
+
+
+def write_report(filename: str, text: str) -> None:
+    """Функция дописывает текст отчета в конец файла filename (через очередь записи логов)"""
+    logging.getLogger(REPORTS_LOGGER).info(text, extra={"log_file": filename})
+
+
+class ReportStream:
+    """Потоковый отчет: части текста передаются в очередь записи логов по мере выдачи отчета.
+    Поток записи копит их во временном файле и при закрытии дописывает отчет в файл filename целиком,
+    поэтому части одновременных отчетов не перемешиваются, а отчет не собирается в памяти"""
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        # В номер потока входит номер процесса: записи процессов-обработчиков пишет поток записи родителя
+        self.stream_id = f"{os.getpid()}:{next(_report_streams)}"
+
+    def write(self, text: str) -> None:
+        """Функция передает часть отчета в очередь записи логов"""
+        if text:
+            self._send(text)
+
+    def close(self, discard: bool = False) -> None:
+        """Функция дописывает накопленный отчет в файл (или, если discard, удаляет его без записи)"""
+        self._send("", end="discard" if discard else "close")
+
+    def _send(self, text: str, end: str | None = None) -> None:
+        extra = {"log_file": self.filename, "report_stream": self.stream_id, "report_stream_end": end}
+        logging.getLogger(REPORTS_LOGGER).info(text, extra=extra)
+
+
+def set_log_dir(log_dir: str) -> str:
+    """Функция переносит файлы логов и отчетов из папки logs/ в папку log_dir (например, на время тестов)
+    и возвращает прежнюю папку. Записи, уже стоящие в очереди, записываются в прежнюю папку"""
+    global _log_dir
+    flush_logs()
+    previous = _log_dir
+    _log_dir = os.path.abspath(log_dir)
+    if _listener is not None and _listener_pid == os.getpid():
+        for handler in _listener.handlers:
+            if isinstance(handler, RoutingHandler):
+                handler.close_files()
+    return previous
+
+
+@contextmanager
+def process_log_queue() -> Iterator[Any]:
+    """Функция создает очередь для записей логов процессов-обработчиков (передается в forward_logs)
+    и, пока контекст открыт, передает записи из нее в поток записи логов этого процесса.
+    Файлы логов пишет только родительский процесс, поэтому процессы не пишут в один файл одновременно"""
+    log_queue: Any = multiprocessing.Queue()
+    listener = QueueListener(log_queue, _handler)
+    listener.start()
+    try:
+        yield log_queue
+    finally:
+        listener.stop()
+        log_queue.close()
+
+
+def forward_logs(log_queue: Any) -> None:
+    """Функция направляет записи логов процесса-обработчика в очередь log_queue из process_log_queue"""
+    global _forward_queue
+    _forward_queue = log_queue
+
+
+def flush_logs() -> None:
+    """Функция ждет, пока поток записи запишет в файлы все записи из очереди"""
+    if _queue is not None and _listener_pid == os.getpid():
+        _queue.join()
+
+
+def stop_logging() -> None:
+    """Функция записывает оставшиеся записи и останавливает поток записи логов"""
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    _listener = None
+    _listener_pid = None
+
+
+# Логгер текстов отчетов не передает записи корневому логгеру: тексты отчетов - не сообщения лога
+reports_logger = get_logger(REPORTS_LOGGER)
+reports_logger.propagate = False
+
+atexit.register(stop_logging)
@@ -1,8 +1,8 @@
 import os
 
 from src.reports import spending_by_category
-from src.services import investing, transactions
-from src.utils import df
+from src.services import get_transactions, investing
+from src.store import load_transactions
 from src.views import web_main
 
 # Получаем абсолютный путь до текущей директории
@@ -22,5 +22,5 @@ abs_xlsx_path = os.path.abspath(rel_xlsx_path)
 
 if __name__ == "__main__":
     print(web_main(abs_xlsx_path))
-    print(investing("2021-12", transactions, 10))
-    print(spending_by_category(df, "Транспорт"))
+    print(investing("2021-12", get_transactions(abs_xlsx_path), 10))
+    print(spending_by_category(load_transactions(abs_xlsx_path), "Транспорт"))
@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from src.log_setup import get_logger
+
+# Получаем абсолютный путь до текущей директории
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Добавляем логгер, который записывает логи в файл logs/metrics.log (через общую очередь записи логов)
+logger = get_logger("metrics")
+
+
+class StageMetrics:
+    """Счетчики этапов обработки: число вызовов, суммарное и последнее время, строки и байты.
+    Можно обновлять из нескольких потоков"""
+
+    def __init__(self, prefix: str = "dashboard", clock: Callable[[], float] = time.perf_counter) -> None:
+        self.prefix = prefix
+        self.clock = clock
+        self._stages: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, collector: dict[str, dict[str, float]] | None = None) -> Iterator[dict[str, float]]:
+        """Контекст этапа: замеряет время выполнения блока. В выданный словарь можно записать
+        число строк ("rows") и байт ("bytes"). Если передан collector, замер этапа добавляется и в него
+        (например, для метрик одного запроса)"""
+        record: dict[str, float] = {"rows": 0, "bytes": 0}
+        start = self.clock()
+        try:
+            yield record
+        finally:
+            record["seconds"] = self.clock() - start
+            self.record(name, record)
+            if collector is not None:
+                collector[name] = record
+            logger.info(
+                "Этап %s: %.6f с, строк: %s, байт: %s", name, record["seconds"], record["rows"], record["bytes"]
+            )
+
+    def record(self, name: str, record: dict[str, float]) -> None:
+        """Функция добавляет замер этапа к счетчикам"""
+        with self._lock:
+            stage = self._stages.setdefault(
+                name, {"calls_total": 0, "seconds_total": 0.0, "seconds_last": 0.0, "rows_total": 0, "bytes_total": 0}
+            )
+            stage["calls_total"] += 1
+            stage["seconds_total"] += record["seconds"]
+            stage["seconds_last"] = record["seconds"]
+            stage["rows_total"] += record["rows"]
+            stage["bytes_total"] += record["bytes"]
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Функция возвращает копию счетчиков по этапам"""
+        with self._lock:
+            return {name: dict(stage) for name, stage in self._stages.items()}
+
+    def to_json(self) -> str:
+        """Функция возвращает счетчики по этапам в виде json"""
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=4)
+
+    def to_prometheus(self) -> str:
+        """Функция возвращает счетчики по этапам в текстовом формате Prometheus"""
+        lines = []
+        metrics = [
+            ("calls_total", "counter", "Число выполнений этапа"),
+            ("seconds_total", "counter", "Суммарное время выполнения этапа, с"),
+            ("seconds_last", "gauge", "Время последнего выполнения этапа, с"),
+            ("rows_total", "counter", "Число обработанных строк"),
+            ("bytes_total", "counter", "Число обработанных байт"),
+        ]
+        snapshot = self.snapshot()
+        for key, metric_type, description in metrics:
+            metric = f"{self.prefix}_stage_{key}"
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            for name, stage in snapshot.items():
+                lines.append(f'{metric}{{stage="{name}"}} {stage[key]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Функция обнуляет счетчики"""
+        with self._lock:
+            self._stages.clear()
+
+
+_dashboard_metrics: StageMetrics | None = None
+
+
+def get_dashboard_metrics() -> StageMetrics:
+    """Функция возвращает общие счетчики этапов построения сводки (web_main), созданные при первом обращении"""
+    global _dashboard_metrics
+    if _dashboard_metrics is None:
+        _dashboard_metrics = StageMetrics("dashboard")
+    return _dashboard_metrics
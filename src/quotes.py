@@ -0,0 +1,214 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date as date_type
+from datetime import timedelta
+from typing import Any, Callable, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+import requests
+
+from src.http_client import describe_error, get_provider_client
+from src.log_setup import get_logger
+from src.utils import API_KEY_FOR_STOCK, MAX_CONCURRENT_REQUESTS, STOCK_API_URL, STOCK_BATCH_SIZE
+
+# Получаем абсолютный путь до текущей директории
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Создаем путь до файла SQLite с котировками (рядом с кэшем транзакций)
+rel_quotes_path = os.path.join(current_dir, "../data/.cache/quotes.sqlite")
+abs_quotes_path = os.path.abspath(rel_quotes_path)
+
+# Добавляем логгер, который записывает логи в файл logs/quotes.log (через общую очередь записи логов)
+logger = get_logger("quotes")
+
+# Число записей на странице ответа API акций (marketstack отдает не больше 1000)
+EOD_PAGE_LIMIT = 1000
+
+
+class QuoteStore:
+    """Хранилище цен закрытия акций по дням (SQLite): таблица quotes (тикер, дата, цена закрытия)
+    и таблица coverage с уже загруженными диапазонами дат по каждому тикеру. Диапазон отмечается загруженным
+    целиком, включая дни без торгов, поэтому уже загруженные даты повторно не запрашиваются"""
+
+    def __init__(self, db_path: str = abs_quotes_path, today: Callable[[], date_type] = date_type.today) -> None:
+        self.db_path = db_path
+        self.today = today
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS quotes (symbol TEXT, date TEXT, close REAL, PRIMARY KEY (symbol, date))"
+            )
+            connection.execute("CREATE TABLE IF NOT EXISTS coverage (symbol TEXT, start TEXT, end TEXT)")
+
+    def missing_ranges(self, symbol: str, start: str, end: str) -> list[tuple[str, str]]:
+        """Функция возвращает диапазоны дат (гггг-мм-дд, включительно) внутри [start, end],
+        которые для тикера еще не загружались"""
+        with self._connect() as connection:
+            covered = connection.execute(
+                "SELECT start, end FROM coverage WHERE symbol = ? AND end >= ? AND start <= ? ORDER BY start",
+                (symbol, start, end),
+            ).fetchall()
+
+        gaps = []
+        cursor = date_type.fromisoformat(start)
+        last = date_type.fromisoformat(end)
+        for covered_start, covered_end in covered:
+            covered_start_day = date_type.fromisoformat(covered_start)
+            if covered_start_day > cursor:
+                gaps.append((cursor.isoformat(), min(covered_start_day - timedelta(days=1), last).isoformat()))
+            cursor = max(cursor, date_type.fromisoformat(covered_end) + timedelta(days=1))
+            if cursor > last:
+                break
+        if cursor <= last:
+            gaps.append((cursor.isoformat(), last.isoformat()))
+        return gaps
+
+    def backfill(
+        self, symbols: Iterable[str], start: str, end: str, max_workers: int = MAX_CONCURRENT_REQUESTS
+    ) -> int:
+        """Функция загружает цены закрытия тикеров за период [start, end] (гггг-мм-дд).
+        Запрашиваются только незагруженные диапазоны: тикеры с одинаковым диапазоном запрашиваются вместе
+        (пакетами по STOCK_BATCH_SIZE), запросы выполняются параллельно (не более max_workers).
+        Сегодняшний и будущие дни не отмечаются загруженными. Функция возвращает число сохраненных цен"""
+        end = min(end, self.today().isoformat())
+        groups: dict[tuple[str, str], list[str]] = {}
+        for symbol in dict.fromkeys(symbols):
+            for gap in self.missing_ranges(symbol, start, end):
+                groups.setdefault(gap, []).append(symbol)
+
+        tasks = [
+            (group_symbols[i:i + STOCK_BATCH_SIZE], gap_start, gap_end)
+            for (gap_start, gap_end), group_symbols in groups.items()
+            for i in range(0, len(group_symbols), STOCK_BATCH_SIZE)
+        ]
+        if not tasks:
+            return 0
+
+        saved = 0
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tasks)))) as executor:
+            for (batch, gap_start, gap_end), rows in zip(tasks, executor.map(lambda task: fetch_eod(*task), tasks)):
+                if rows is None:
+                    continue
+                self._save(batch, gap_start, gap_end, rows)
+                saved += len(rows)
+        logger.info("Загружено %s цен закрытия для %s запросов", saved, len(tasks))
+        return saved
+
+    def series(self, symbols: list[str], start: str, end: str, backfill: bool = True) -> pd.DataFrame:
+        """Функция возвращает цены закрытия за период [start, end]: строка - дата, столбец - тикер.
+        При backfill=True незагруженные диапазоны сначала загружаются из API"""
+        if not symbols:
+            return pd.DataFrame(index=pd.DatetimeIndex([]))
+        if backfill:
+            self.backfill(symbols, start, end)
+        placeholders = ", ".join("?" * len(symbols))
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT date, symbol, close FROM quotes WHERE symbol IN ({placeholders}) AND date BETWEEN ? AND ?",
+                (*symbols, start, end),
+            ).fetchall()
+        frame = pd.DataFrame(rows, columns=["date", "symbol", "close"])
+        table = frame.pivot(index="date", columns="symbol", values="close").reindex(columns=symbols)
+        table.index = pd.to_datetime(table.index)
+        return table.sort_index()
+
+    def as_of(
+        self, symbols: list[str], dates: list[str], lookback_days: int = 7, backfill: bool = True
+    ) -> pd.DataFrame:
+        """Функция возвращает цены закрытия тикеров на даты dates (гггг-мм-дд): если в дату не было торгов,
+        берется последняя цена не более чем за lookback_days дней до нее. Строка - дата, столбец - тикер"""
+        days = np.array(sorted(set(dates)), dtype="datetime64[D]")
+        result = pd.DataFrame(np.nan, index=pd.to_datetime(days), columns=symbols)
+        if not len(days) or not symbols:
+            return result
+
+        start = str(days[0] - np.timedelta64(lookback_days, "D"))
+        prices = self.series(symbols, start, str(days[-1]), backfill)
+        price_days = prices.index.to_numpy(dtype="datetime64[D]")
+        for symbol in symbols:
+            # Последняя известная цена не позже даты: бинарный поиск по датам с ценами этого тикера
+            symbol_prices = prices[symbol].to_numpy(dtype=float)
+            known = ~np.isnan(symbol_prices)
+            symbol_days, symbol_prices = price_days[known], symbol_prices[known]
+            positions = np.searchsorted(symbol_days, days, side="right") - 1
+            found = positions >= 0
+            found[found] &= days[found] - symbol_days[positions[found]] <= np.timedelta64(lookback_days, "D")
+            values = np.full(len(days), np.nan)
+            values[found] = symbol_prices[positions[found]]
+            result[symbol] = values
+        return result
+
+    def _save(self, symbols: list[str], start: str, end: str, rows: list[tuple[str, str, float]]) -> None:
+        """Функция сохраняет цены и отмечает диапазон [start, end] загруженным для тикеров symbols"""
+        covered_end = min(end, (self.today() - timedelta(days=1)).isoformat())
+        with self._lock, self._connect() as connection:
+            connection.executemany("INSERT OR REPLACE INTO quotes VALUES (?, ?, ?)", rows)
+            if start <= covered_end:
+                connection.executemany(
+                    "INSERT INTO coverage VALUES (?, ?, ?)", [(symbol, start, covered_end) for symbol in symbols]
+                )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Функция открывает соединение с SQLite, фиксирует изменения и закрывает соединение"""
+        connection = sqlite3.connect(self.db_path)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+
+def fetch_eod(symbols: list[str], date_from: str, date_to: str) -> list[tuple[str, str, float]] | None:
+    """Функция принимает на вход список тикеров и период (гггг-мм-дд) и возвращает цены закрытия
+    [(тикер, дата, цена)] за период. Все тикеры запрашиваются одним запросом, ответ читается постранично.
+    Если получить цены не удалось, функция возвращает None"""
+    rows: list[tuple[str, str, float]] = []
+    offset = 0
+    while True:
+        url = (
+            f"{STOCK_API_URL}?access_key={API_KEY_FOR_STOCK}&symbols={','.join(symbols)}"
+            f"&date_from={date_from}&date_to={date_to}&limit={EOD_PAGE_LIMIT}&offset={offset}"
+        )
+        try:
+            result: dict[str, Any] = get_provider_client().get(url).json()
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(
+                "Не удалось получить цены акций %s за %s - %s: %s",
+                ", ".join(symbols),
+                date_from,
+                date_to,
+                describe_error(e),
+            )
+            return None
+        if "data" not in result:
+            logger.warning("Нет данных для акций %s за %s - %s: %s", ", ".join(symbols), date_from, date_to, result)
+            return None
+
+        page = result["data"] or []
+        rows.extend(
+            (row["symbol"], row["date"][:10], row["close"])
+            for row in page
+            if row.get("symbol") in symbols and row.get("close") is not None
+        )
+        total = (result.get("pagination") or {}).get("total", 0)
+        offset += len(page)
+        if not page or offset >= total:
+            return rows
+
+
+_quote_store: QuoteStore | None = None
+
+
+def get_quote_store() -> QuoteStore:
+    """Функция возвращает общее хранилище цен акций, созданное при первом обращении.
+    Путь до файла SQLite берется из переменной окружения QUOTE_STORE_DB (по умолчанию data/.cache/quotes.sqlite)"""
+    global _quote_store
+    if _quote_store is None:
+        _quote_store = QuoteStore(os.getenv("QUOTE_STORE_DB") or abs_quotes_path)
+    return _quote_store
@@ -0,0 +1,182 @@
+import importlib.util
+import os
+from typing import Any, Callable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from src.log_setup import get_logger
+
+# Получаем абсолютный путь до текущей директории
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Добавляем логгер, который записывает логи в файл logs/readers.log (через общую очередь записи логов)
+logger = get_logger("readers")
+
+# Типы столбцов выгрузки (совпадают с тем, что возвращает read_excel для data/operations.xlsx).
+# Дробные столбцы хранятся как float64, целые - как Int64 (пустая ячейка - пропуск <NA>), строки - как object
+TRANSACTION_DTYPES: dict[str, Any] = {
+    "Дата операции": object,
+    "Дата платежа": object,
+    "Номер карты": object,
+    "Статус": object,
+    "Сумма операции": "float64",
+    "Валюта операции": object,
+    "Сумма платежа": "float64",
+    "Валюта платежа": object,
+    "Кэшбэк": "float64",
+    "Категория": object,
+    "MCC": "float64",
+    "Описание": object,
+    "Бонусы (включая кэшбэк)": "Int64",
+    "Округление на инвесткопилку": "Int64",
+    "Сумма операции с округлением": "float64",
+}
+
+# Число строк в порции при чтении файла по частям
+CHUNK_SIZE = 100_000
+
+# Движок для CSV: pyarrow (многопоточный разбор), если он установлен, иначе стандартный движок pandas
+CSV_ENGINE = "pyarrow" if importlib.util.find_spec("pyarrow") is not None else "c"
+
+
+def read_transactions(input_file: str, columns: list[str] | None = None) -> pd.DataFrame | None:
+    """Функция принимает на вход путь до файла с транзакциями (xlsx, csv, parquet или feather)
+    и список нужных столбцов (None - все столбцы) и возвращает DataFrame.
+    Формат определяется по расширению файла"""
+    extension = os.path.splitext(input_file)[1].lower()
+    reader = READERS.get(extension, read_excel_file)
+
+    try:
+        input_df = reader(input_file, columns)
+        logger.info("Данные из файла %s импортированы: %s", extension.lstrip(".") or "xlsx", input_file)
+        return input_df
+    except FileNotFoundError:
+        logger.warning("Файл не найден: %s", input_file)
+    except ValueError:
+        logger.warning("Импортируемый список пуст или отсутствует.")
+    except Exception as e:
+        logger.warning("Произошла ошибка при импорте данных: %s", e)
+    return None
+
+
+def read_excel_file(input_file: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """Функция читает файл xlsx"""
+    return pd.read_excel(input_file, usecols=columns, dtype=_dtypes(columns))
+
+
+def read_csv_file(input_file: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """Функция читает файл csv с заданными типами столбцов"""
+    return pd.read_csv(input_file, usecols=columns, dtype=_dtypes(columns), engine=CSV_ENGINE)
+
+
+def read_parquet_file(input_file: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """Функция читает файл parquet (нужен pyarrow). Читаются только нужные столбцы"""
+    return _cast(pd.read_parquet(input_file, columns=columns))
+
+
+def read_feather_file(input_file: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """Функция читает файл feather (нужен pyarrow). Читаются только нужные столбцы"""
+    return _cast(pd.read_feather(input_file, columns=columns))
+
+
+def iter_transactions(
+    input_file: str, columns: list[str] | None = None, chunk_size: int = CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """Функция читает файл с транзакциями порциями по chunk_size строк, не загружая его в память целиком.
+    Индекс строк сквозной (как при чтении файла целиком). При ошибке чтения выдает предупреждение в лог
+    и прекращает выдачу порций"""
+    extension = os.path.splitext(input_file)[1].lower()
+    chunk_reader = CHUNK_READERS.get(extension, iter_excel_file)
+
+    try:
+        start = 0
+        for input_df in chunk_reader(input_file, columns, chunk_size):
+            input_df.index = pd.RangeIndex(start, start + len(input_df))
+            start += len(input_df)
+            yield input_df
+        logger.info("Данные из файла %s импортированы по частям: %s строк", extension.lstrip(".") or "xlsx", start)
+    except FileNotFoundError:
+        logger.warning("Файл не найден: %s", input_file)
+    except ValueError:
+        logger.warning("Импортируемый список пуст или отсутствует.")
+    except Exception as e:
+        logger.warning("Произошла ошибка при импорте данных: %s", e)
+
+
+def iter_excel_file(input_file: str, columns: list[str] | None, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Функция читает лист xlsx построчно (openpyxl в режиме read_only) и выдает порции строк"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(input_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows))
+        names = header if columns is None else [name for name in header if name in columns]
+        positions = [header.index(name) for name in names]
+        buffer = []
+        for row in rows:
+            buffer.append([np.nan if row[i] is None else row[i] for i in positions])
+            if len(buffer) == chunk_size:
+                yield _cast(pd.DataFrame(buffer, columns=names))
+                buffer = []
+        if buffer:
+            yield _cast(pd.DataFrame(buffer, columns=names))
+    finally:
+        workbook.close()
+
+
+def iter_csv_file(input_file: str, columns: list[str] | None, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Функция читает файл csv порциями (движок pyarrow не поддерживает чтение по частям)"""
+    with pd.read_csv(input_file, usecols=columns, dtype=_dtypes(columns), chunksize=chunk_size) as reader:
+        yield from reader
+
+
+def iter_parquet_file(input_file: str, columns: list[str] | None, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Функция читает файл parquet порциями (нужен pyarrow)"""
+    import pyarrow.parquet as pq  # type: ignore[import-not-found]
+
+    for record_batch in pq.ParquetFile(input_file).iter_batches(batch_size=chunk_size, columns=columns):
+        yield _cast(record_batch.to_pandas())
+
+
+def iter_feather_file(input_file: str, columns: list[str] | None, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Функция читает файл feather по блокам записей через отображение файла в память (нужен pyarrow)"""
+    import pyarrow as pa  # type: ignore[import-not-found]
+
+    with pa.memory_map(input_file) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            record_batch = reader.get_batch(i)
+            if columns is not None:
+                record_batch = record_batch.select(columns)
+            for start in range(0, record_batch.num_rows, chunk_size):
+                yield _cast(record_batch.slice(start, chunk_size).to_pandas())
+
+
+READERS: dict[str, Callable[[str, list[str] | None], pd.DataFrame]] = {
+    ".xlsx": read_excel_file,
+    ".xls": read_excel_file,
+    ".csv": read_csv_file,
+    ".parquet": read_parquet_file,
+    ".feather": read_feather_file,
+}
+
+
+CHUNK_READERS: dict[str, Callable[[str, list[str] | None, int], Iterator[pd.DataFrame]]] = {
+    ".xlsx": iter_excel_file,
+    ".csv": iter_csv_file,
+    ".parquet": iter_parquet_file,
+    ".feather": iter_feather_file,
+}
+
+
+def _dtypes(columns: list[str] | None) -> dict[str, Any]:
+    """Функция возвращает типы для нужных столбцов (все столбцы, если список не задан)"""
+    names = TRANSACTION_DTYPES if columns is None else columns
+    return {name: TRANSACTION_DTYPES[name] for name in names if name in TRANSACTION_DTYPES}
+
+
+def _cast(input_df: pd.DataFrame) -> pd.DataFrame:
+    """Функция приводит столбцы к типам TRANSACTION_DTYPES"""
+    return input_df.astype(_dtypes(list(input_df.columns)), copy=False)
@@ -1,22 +1,22 @@
-import json
-import logging
 import os
+import textwrap
+from collections.abc import Iterable, Iterator
 from datetime import datetime as dt
 from functools import wraps
 from typing import Any
 
+import numpy as np
 import pandas as pd
 from dateutil.relativedelta import relativedelta as rdt
 
-from src.utils import df
+from src.dates import INPUT_DATETIME_FORMAT, OPERATION_DATE_FORMAT, parse_dates, parse_input_datetime
+from src.log_setup import ReportStream, get_logger, write_report
+from src.serializer import JSON_INDENT, to_json
+from src.store import aggregates_for, date_index_for, load_transactions
 
 # Получаем абсолютный путь до текущей директории
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
-# Создаем путь до файла логов относительно текущей директории
-rel_log_file_path = os.path.join(current_dir, "../logs/reports.log")
-abs_log_file_path = os.path.abspath(rel_log_file_path)
-
 # Создаем путь до файла "reports_log.txt" относительно текущей директории
 rel_mylog_path = os.path.join(current_dir, "../logs/reports_log.txt")
 abs_mylog_path = os.path.abspath(rel_mylog_path)
@@ -26,68 +26,199 @@ reports_log = abs_mylog_path
 rel_xlsx_path = os.path.join(current_dir, "../data/operations.xlsx")
 abs_xlsx_path = os.path.abspath(rel_xlsx_path)
 
-# Добавляем логгер, который записывает логи в файл.
-logger = logging.getLogger("reports")
-logger.setLevel(logging.INFO)
-file_handler = logging.FileHandler(abs_log_file_path, "w", encoding="utf-8")
-file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s: %(message)s")
-file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
-
-# Получаем текущую дату
-current_date = dt.now().strftime("%Y-%m-%d %H:%M:%S")
+# Добавляем логгер, который записывает логи в файл logs/reports.log (через общую очередь записи логов)
+logger = get_logger("reports")
 
 
 def log(filename: str) -> Any:
-    """Декоратор для логирования вызовов функции. Логирует данные отчета в файл"""
+    """Декоратор для логирования вызовов функции. Дописывает данные отчета в конец файла.
+    Запись выполняет поток записи логов, поэтому одновременные отчеты не ждут друг друга и не затирают файл.
+    Если функция возвращает итератор (потоковый отчет), отчет записывается в файл целиком после выдачи"""
 
     def decorator(func: Any) -> Any:
         @wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
-            log_message = ""  # Инициализация по умолчанию
-
             try:
                 result = func(*args, **kwargs)
-                log_message = result
-                return result
             except Exception as e:
-                log_message = f"my_function error: {e}. Input:{args}, {kwargs}"
+                write_log(filename, f"my_function error: {e}. Input:{args}, {kwargs}")
                 raise e
 
-            finally:
-                with open(filename, "w", encoding="utf-8") as file:
-                    file.write(log_message + "\n")
+            if isinstance(result, Iterator):
+                return tee_log(filename, result, args, kwargs)
+            write_log(filename, result)
+            return result
 
         return wrapper
 
     return decorator
 
 
-@log(filename=reports_log)
-def spending_by_category(transactions: pd.DataFrame, category: str, date: str = current_date) -> str:
+def write_log(filename: str, log_message: str) -> None:
+    """Функция дописывает сообщение в файл лога отчетов"""
+    write_report(filename, log_message + "\n")
+
+
+def tee_log(filename: str, chunks: Iterator[str], args: Any, kwargs: Any) -> Iterator[str]:
+    """Функция выдает части потокового отчета и по мере выдачи передает их в поток записи логов.
+    Отчет дописывается в файл лога отчетов целиком после выдачи последней части,
+    поэтому части одновременных отчетов не перемешиваются в файле. Незавершенный отчет не записывается"""
+    report = ReportStream(filename)
+    try:
+        for chunk in chunks:
+            report.write(chunk)
+            yield chunk
+    except GeneratorExit:
+        report.close(discard=True)
+        raise
+    except Exception as e:
+        report.write(f"my_function error: {e}. Input:{args}, {kwargs}")
+        report.close()
+        raise e
+    report.write("\n")
+    report.close()
+
+
+def report_date(date: str | None) -> str:
+    """Функция возвращает дату отчета: переданную дату или, если она не задана, текущие дату и время
+    (на момент вызова отчета, а не загрузки модуля)"""
+    return date or dt.now().strftime(INPUT_DATETIME_FORMAT)
+
+
+def filter_spending_by_category(transactions: pd.DataFrame, category: str, date: str) -> pd.DataFrame:
     """Функция принимает на вход датафрейм с транзакциями, категорию, дату.
-    И возвращает суммарные траты по заданной категории за последние три месяца (от переданной даты)."""
+    И возвращает транзакции по заданной категории за период отчета (от переданной даты)"""
 
     # Форматируем дату
     logger.info("Дата отформатирована")
-    date_updated = dt.strptime(date, "%Y-%m-%d %H:%M:%S")
+    date_updated = parse_input_datetime(date)
     previous_month_date = date_updated + rdt(months=-48)
-    transactions["Дата операции"] = pd.to_datetime(transactions["Дата операции"], format="%d.%m.%Y %H:%M:%S")
+    # Индекс по дате операции строится один раз для DataFrame из хранилища транзакций
+    date_index = date_index_for(transactions)
 
-    # Создаем отфильтрованный по заданному периоду времени DataFrame
+    # Создаем отфильтрованный по заданному периоду времени DataFrame (бинарный поиск по индексу)
     logger.info("DataFrame отфильтрован по периоду дат")
-    df_filter = transactions.loc[
-        (transactions["Дата операции"].between(previous_month_date, date)) & (transactions["Категория"] == category)
-    ]
-    df_cleaned = df_filter.dropna().copy()
-    df_cleaned["Дата операции"] = df_cleaned["Дата операции"].astype(str)
-    output_list_dicts = df_cleaned.to_dict("records")
+    df_window, window_dates = date_index.select(previous_month_date, date)
+    category_mask = (df_window["Категория"] == category).to_numpy()
+    df_filter = df_window.loc[category_mask].assign(**{"Дата операции": window_dates[category_mask]})
+    df_filter = df_filter.sort_index()
+    return df_filter.dropna()
 
-    # Формируем json-ответ
+
+@log(filename=reports_log)
+def spending_by_category(
+    transactions: pd.DataFrame, category: str, date: str | None = None, compact: bool = False
+) -> str:
+    """Функция принимает на вход датафрейм с транзакциями, категорию, дату (по умолчанию - текущую).
+    И возвращает суммарные траты по заданной категории за последние три месяца (от переданной даты).
+    При compact=True json-ответ записывается в одну строку"""
+
+    output_list_dicts = filter_spending_by_category(transactions, category, report_date(date)).to_dict("records")
+
+    # Формируем json-ответ (даты операции сериализуются как гггг-мм-дд чч:мм:сс)
     logger.info("json-ответ с транзакциями по указанной категории и за указанный период времени успешно создан")
-    json_output = json.dumps(output_list_dicts, ensure_ascii=False, indent=4)
+    json_output = to_json(output_list_dicts, compact)
+    return json_output
+
+
+@log(filename=reports_log)
+def stream_spending_by_category(
+    transactions: pd.DataFrame, category: str, date: str | None = None, ndjson: bool = False, chunk_size: int = 1000
+) -> Iterator[str]:
+    """Функция принимает на вход датафрейм с транзакциями, категорию, дату и
+    выдает по частям тот же json-ответ, что и spending_by_category, не собирая его целиком в памяти.
+    При ndjson=True выдает по одной транзакции в строке (формат NDJSON)"""
+
+    df_cleaned = filter_spending_by_category(transactions, category, report_date(date))
+
+    # Строки преобразуются в словари порциями по chunk_size, а не все сразу
+    df_chunks = (df_cleaned.iloc[start:start + chunk_size] for start in range(0, len(df_cleaned), chunk_size))
+    yield from spending_json_chunks(df_chunks, ndjson)
+    logger.info("Потоковый json-ответ с транзакциями по указанной категории успешно создан")
+
+
+def filter_spending_chunk(transactions: pd.DataFrame, category: str, date: str) -> pd.DataFrame:
+    """Функция принимает на вход порцию строк с транзакциями, категорию, дату и возвращает транзакции порции
+    по заданной категории за период отчета, как filter_spending_by_category"""
+    date_updated = parse_input_datetime(date)
+    previous_month_date = date_updated + rdt(months=-48)
+    dates = parse_dates(transactions["Дата операции"], OPERATION_DATE_FORMAT)
+    mask = (
+        (dates >= np.datetime64(previous_month_date)) & (dates <= np.datetime64(date_updated))
+        & (transactions["Категория"] == category).to_numpy()
+    )
+    return transactions.loc[mask].assign(**{"Дата операции": dates[mask]}).dropna()
+
+
+def spending_json_chunks(df_chunks: Iterable[pd.DataFrame], ndjson: bool = False) -> Iterator[str]:
+    """Функция принимает на вход поток DataFrame с отобранными транзакциями и выдает по частям json-ответ
+    (или NDJSON, по одной транзакции в компактной строке), как spending_by_category"""
+    first = True
+    for df_chunk in df_chunks:
+        for row in df_chunk.to_dict("records"):
+            if ndjson:
+                yield to_json(row, compact=True) + "\n"
+            else:
+                row_json = textwrap.indent(to_json(row), " " * JSON_INDENT)
+                yield ("[\n" if first else ",\n") + row_json
+            first = False
+
+    if not ndjson:
+        yield "[]" if first else "\n]"
+
+
+@log(filename=reports_log)
+def spending_by_category_chunked(chunks: Iterable[pd.DataFrame], category: str, date: str | None = None) -> str:
+    """Функция принимает на вход поток DataFrame (порции строк одного файла), категорию, дату и возвращает
+    тот же json-ответ, что и spending_by_category. В памяти одновременно находится только одна порция строк"""
+    date = report_date(date)
+    df_chunks = (filter_spending_chunk(chunk, category, date) for chunk in chunks)
+    json_output = "".join(spending_json_chunks(df_chunks))
+    logger.info("json-ответ с транзакциями по указанной категории (по частям файла) успешно создан")
+    return json_output
+
+
+@log(filename=reports_log)
+def stream_spending_by_category_chunked(
+    chunks: Iterable[pd.DataFrame], category: str, date: str | None = None, ndjson: bool = False
+) -> Iterator[str]:
+    """Функция принимает на вход поток DataFrame (порции строк одного файла), категорию, дату и выдает по частям
+    тот же json-ответ, что и stream_spending_by_category, не загружая файл и ответ в память целиком"""
+    date = report_date(date)
+    yield from spending_json_chunks((filter_spending_chunk(chunk, category, date) for chunk in chunks), ndjson)
+    logger.info("Потоковый json-ответ с транзакциями по указанной категории (по частям файла) успешно создан")
+
+
+@log(filename=reports_log)
+def spending_by_category_totals(transactions: pd.DataFrame, category: str, date: str | None = None) -> str:
+    """Функция принимает на вход датафрейм с транзакциями, категорию, дату.
+    И возвращает итоги трат по заданной категории за тот же период, что и spending_by_category:
+    сумму, количество операций и кэшбэк. Итоги считаются по материализованной таблице трат
+    по тем же транзакциям, что попадают в отчет (без пропусков)"""
+
+    date_updated = parse_input_datetime(report_date(date))
+    previous_month_date = date_updated + rdt(months=-48)
+
+    # Полные месяцы берутся из таблицы трат, крайние месяцы - из индекса по дате
+    logger.info("Итоги трат по категории получены из таблицы трат")
+    totals = aggregates_for(transactions).window_totals(
+        category, previous_month_date, date_updated, date_index_for(transactions), complete_rows=True
+    )
+
+    # Формируем список словарей с результатами
+    result_output = {
+        "category": category,
+        "period": {"from": str(previous_month_date), "to": str(date_updated)},
+        "total_amount": abs(totals["spend"]),
+        "count": totals["count"],
+        "cashback": totals["cashback"],
+    }
+
+    # Формируем json-ответ
+    logger.info("json-ответ с итогами трат по указанной категории и за указанный период времени успешно создан")
+    json_output = to_json(result_output)
     return json_output
 
 
 if __name__ == "__main__":
-    print(spending_by_category(df, "Транспорт"))
+    print(spending_by_category(load_transactions(abs_xlsx_path), "Транспорт"))
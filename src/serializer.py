@@ -0,0 +1,112 @@
+import importlib.util
+import json
+import math
+import os
+from datetime import date, datetime
+from typing import Any, Callable, Iterator, cast
+
+import numpy as np
+import pandas as pd
+
+from src.log_setup import get_logger
+
+# Получаем абсолютный путь до текущей директории
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Добавляем логгер, который записывает логи в файл logs/serializer.log (через общую очередь записи логов)
+logger = get_logger("serializer")
+
+# Отступ json-ответов для чтения человеком: 2 пробела - единственный отступ, который orjson пишет сам
+JSON_INDENT = 2
+
+
+def json_default(value: Any) -> Any:
+    """Функция переводит в значения json типы numpy и pandas: числа numpy - в числа, массивы - в списки,
+    даты и время - в строки как str(pd.Timestamp) (гггг-мм-дд чч:мм:сс), пропуски - в null"""
+    if isinstance(value, (pd.Timestamp, np.datetime64, datetime)):
+        return None if pd.isna(value) else str(pd.Timestamp(value))
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is pd.NA:
+        return None
+    raise TypeError(f"Объект типа {type(value).__name__} не сериализуется в json")
+
+
+def dumps_json(obj: Any, compact: bool = False) -> str:
+    """Функция сериализует объект стандартным модулем json. Бесконечности и NaN записываются как null
+    (как в orjson и msgspec). Компактный ответ строится кодировщиком на C; если в объекте есть такие числа,
+    ответ строится за один проход кодировщиком на Python, который записывает их как null (он же строит ответ
+    с отступами)"""
+    if compact:
+        try:
+            return json.dumps(obj, ensure_ascii=False, allow_nan=False, default=json_default, separators=(",", ":"))
+        except ValueError:
+            return "".join(_iterencode(obj, None, (",", ":")))
+    return "".join(_iterencode(obj, " " * JSON_INDENT, (",", ": ")))
+
+
+def _finite_float(value: float) -> str:
+    """Функция записывает число как json.dumps, а бесконечности и NaN - как null"""
+    return float.__repr__(value) if math.isfinite(value) else "null"
+
+
+def _iterencode(obj: Any, indent: str | None, separators: tuple[str, str]) -> Iterator[str]:
+    """Функция выдает части json-ответа кодировщиком модуля json на Python, которому передана функция записи чисел
+    _finite_float (открытого параметра для нее в json.dumps нет)"""
+    item_separator, key_separator = separators
+    return cast(Iterator[str], json.encoder._make_iterencode(  # type: ignore[attr-defined]
+        {}, json_default, json.encoder.encode_basestring, indent, _finite_float,
+        key_separator, item_separator, False, False, True,
+    )(obj, 0))
+
+
+def dumps_orjson(obj: Any, compact: bool = False) -> str:
+    """Функция сериализует объект библиотекой orjson (отступ - OPT_INDENT_2). Даты и время передаются
+    в json_default, чтобы формат дат совпадал со стандартным сериализатором"""
+    import orjson
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    if not compact:
+        options |= orjson.OPT_INDENT_2
+    return orjson.dumps(obj, default=json_default, option=options).decode("utf-8")
+
+
+def dumps_msgspec(obj: Any, compact: bool = False) -> str:
+    """Функция сериализует объект библиотекой msgspec"""
+    import msgspec  # type: ignore[import-not-found]
+
+    output: bytes = msgspec.json.encode(obj, enc_hook=json_default)
+    if not compact:
+        output = msgspec.json.format(output, indent=JSON_INDENT)
+    return output.decode("utf-8")
+
+
+# Сериализаторы по названию: orjson и msgspec доступны, если библиотеки установлены
+SERIALIZERS: dict[str, Callable[[Any, bool], str]] = {"json": dumps_json}
+if importlib.util.find_spec("msgspec") is not None:
+    SERIALIZERS["msgspec"] = dumps_msgspec
+if importlib.util.find_spec("orjson") is not None:
+    SERIALIZERS["orjson"] = dumps_orjson
+
+# Сериализатор по умолчанию: из переменной окружения JSON_SERIALIZER или самый быстрый из установленных
+DEFAULT_SERIALIZER = os.getenv("JSON_SERIALIZER") or next(
+    name for name in ("orjson", "msgspec", "json") if name in SERIALIZERS
+)
+
+
+def to_json(obj: Any, compact: bool = False, serializer: str | None = None) -> str:
+    """Функция возвращает json-ответ. По умолчанию - с отступом JSON_INDENT пробелов,
+    при compact=True - в одну строку без пробелов (для программ-клиентов).
+    Значения numpy и pandas (числа, даты, пропуски) сериализуются без предварительного преобразования,
+    бесконечности и NaN - как null. Значения в ответе не зависят от того, какой сериализатор используется;
+    очень большие и очень малые числа сериализаторы могут записывать по-разному (1e+16 и 1e16)"""
+    name = serializer or DEFAULT_SERIALIZER
+    dumps = SERIALIZERS.get(name)
+    if dumps is None:
+        logger.warning("Сериализатор %s недоступен, используется json", name)
+        dumps = dumps_json
+    return dumps(obj, compact)
@@ -0,0 +1,260 @@
+import argparse
+import asyncio
+import os
+import re
+from functools import partial
+from typing import Any, Callable
+from urllib.parse import parse_qs, urlsplit
+
+from src.dates import parse_input_datetime
+from src.log_setup import get_logger
+from src.metrics import get_dashboard_metrics
+from src.reports import spending_by_category
+from src.serializer import to_json
+from src.services import get_transactions, investing
+from src.store import get_store
+from src.views import web_main, web_main_cached
+
+# Получаем абсолютный путь до текущей директории
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Создаем путь до файла user_settings.json относительно текущей директории.
+rel_json_path = os.path.join(current_dir, "../user_settings.json")
+abs_json_path = os.path.abspath(rel_json_path)
+
+# Создаем путь до файла operations.xlsx относительно текущей директории
+rel_xlsx_path = os.path.join(current_dir, "../data/operations.xlsx")
+abs_xlsx_path = os.path.abspath(rel_xlsx_path)
+
+# Добавляем логгер, который записывает логи в файл logs/server.log (через общую очередь записи логов)
+logger = get_logger("server")
+
+# Максимальный размер строки запроса и заголовков и максимальный размер тела запроса в байтах
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+# Формат месяца в запросе «Инвесткопилки»: гггг-мм
+MONTH_PATTERN = re.compile(r"\d{4}-(0[1-9]|1[0-2])")
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class RequestError(Exception):
+    """Ошибка в параметрах запроса (ответ 400)"""
+
+
+class DashboardService:
+    """HTTP-сервис сводки (web_main), отчета по категории (spending_by_category) и «Инвесткопилки» (investing).
+    Хранилище транзакций, индекс по дате, таблица трат и кэши внешних API живут в памяти процесса
+    между запросами. Обработка запроса выполняется в пуле потоков, чтобы не блокировать цикл событий.
+    Сервис только читает хранилище: новые выгрузки добавляются (TransactionStore.ingest) вне сервиса,
+    а загрузка данных в хранилище выполняется под его блокировкой, поэтому одновременные запросы
+    не загружают файл и не строят индекс повторно"""
+
+    def __init__(self, source_path: str = abs_xlsx_path, json_file: str = abs_json_path) -> None:
+        self.source_path = source_path
+        self.json_file = json_file
+        self.routes: dict[str, Callable[[dict[str, str]], tuple[int, str, str]]] = {
+            "/dashboard": self.dashboard,
+            "/reports/spending": self.spending,
+            "/services/investing": self.investing,
+            "/metrics": self.metrics,
+            "/health": self.health,
+        }
+
+    def warm_up(self) -> None:
+        """Функция заранее загружает транзакции, строит индекс по дате, таблицу трат и список транзакций"""
+        store = get_store(self.source_path)
+        store.date_index()
+        store.aggregates()
+        get_transactions(self.source_path)
+        logger.info("Данные для сервиса загружены: %s", self.source_path)
+
+    def dashboard(self, params: dict[str, str]) -> tuple[int, str, str]:
+        """Сводка web_main на дату input_datetime (по умолчанию дата из src.views) с настройками пользователя
+        из файла, заданного при запуске сервиса. Готовые сводки берутся из кэша ответов,
+        сводка с замерами этапов (include_metrics) строится заново.
+        Флаг compact во всех запросах возвращает json в одну строку"""
+        date_time = params.get("input_datetime")
+        if date_time is not None:
+            _check_datetime(date_time)
+        compact = _flag(params, "compact")
+        if _flag(params, "include_metrics"):
+            body = web_main(self.source_path, date_time, self.json_file, include_metrics=True, compact=compact)
+            return 200, "application/json", body
+        return 200, "application/json", web_main_cached(self.source_path, date_time, self.json_file, compact=compact)
+
+    def spending(self, params: dict[str, str]) -> tuple[int, str, str]:
+        """Траты по категории category за период до input_datetime (по умолчанию - до момента запроса)"""
+        category = _required(params, "category")
+        date_time = params.get("input_datetime")
+        if date_time is not None:
+            _check_datetime(date_time)
+        frame = get_store(self.source_path).load()
+        if frame is None:
+            raise RequestError("Файл с транзакциями не найден")
+        return 200, "application/json", spending_by_category(frame, category, date_time, _flag(params, "compact"))
+
+    def investing(self, params: dict[str, str]) -> tuple[int, str, str]:
+        """Сумма «Инвесткопилки» за месяц month (гггг-мм) с шагом округления limit"""
+        month = _required(params, "month")
+        if not MONTH_PATTERN.fullmatch(month):
+            raise RequestError("Месяц должен быть в формате гггг-мм")
+        try:
+            limit = int(_required(params, "limit"))
+        except ValueError:
+            raise RequestError("Параметр limit должен быть целым числом")
+        if limit <= 0:
+            raise RequestError("Параметр limit должен быть больше нуля")
+        body = investing(month, get_transactions(self.source_path), limit, compact=_flag(params, "compact"))
+        return 200, "application/json", str(body)
+
+    def metrics(self, params: dict[str, str]) -> tuple[int, str, str]:
+        """Счетчики этапов построения сводки: текст Prometheus или json (format=json)"""
+        if params.get("format") == "json":
+            return 200, "application/json", get_dashboard_metrics().to_json()
+        return 200, "text/plain; version=0.0.4", get_dashboard_metrics().to_prometheus()
+
+    def health(self, params: dict[str, str]) -> tuple[int, str, str]:
+        """Проверка доступности сервиса"""
+        return 200, "application/json", to_json({"status": "ok"}, compact=True)
+
+    def handle(self, method: str, target: str) -> tuple[int, str, str]:
+        """Функция выполняет запрос и возвращает (код ответа, тип содержимого, тело ответа)"""
+        url = urlsplit(target)
+        route = self.routes.get(url.path)
+        if route is None:
+            return _error(404, f"Нет такого адреса: {url.path}")
+        if method != "GET":
+            return _error(405, "Поддерживается только метод GET")
+
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            return route(params)
+        except RequestError as e:
+            return _error(400, str(e))
+        except Exception as e:
+            logger.exception("Ошибка при обработке запроса %s: %s", target, e)
+            return _error(500, "Внутренняя ошибка сервиса")
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Функция обслуживает соединение: запросы HTTP/1.1 с поддержкой keep-alive"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ")
+                except ValueError:
+                    writer.write(_response(*_error(400, "Неверная строка запроса"), keep_alive=False))
+                    break
+                headers = dict(
+                    (name.strip().lower(), value.strip())
+                    for name, _, value in (line.partition(":") for line in header_lines if line)
+                )
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                # Тело запроса не используется, но читается из потока, иначе оно будет принято за следующий запрос
+                if "transfer-encoding" in headers:
+                    writer.write(_response(*_error(400, "Тело запроса по частям не поддерживается"), keep_alive=False))
+                    break
+                try:
+                    body_length = int(headers.get("content-length", "0"))
+                except ValueError:
+                    body_length = -1
+                if body_length < 0:
+                    writer.write(_response(*_error(400, "Неверный заголовок Content-Length"), keep_alive=False))
+                    break
+                if body_length > MAX_BODY_BYTES:
+                    writer.write(_response(*_error(413, "Слишком большое тело запроса"), keep_alive=False))
+                    break
+                try:
+                    await reader.readexactly(body_length)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                # Обработка запроса (pandas, запросы к внешним API) выполняется вне цикла событий
+                status, content_type, body = await loop.run_in_executor(None, partial(self.handle, method, target))
+                writer.write(_response(status, content_type, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.Server:
+        """Функция загружает данные и запускает сервер"""
+        await asyncio.get_running_loop().run_in_executor(None, self.warm_up)
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        logger.info("Сервис запущен: %s", ", ".join(str(sock.getsockname()) for sock in server.sockets))
+        return server
+
+
+def _required(params: dict[str, str], name: str) -> str:
+    """Функция возвращает обязательный параметр запроса"""
+    value = params.get(name)
+    if not value:
+        raise RequestError(f"Не задан параметр {name}")
+    return value
+
+
+def _flag(params: dict[str, str], name: str) -> bool:
+    """Функция возвращает значение флага запроса (1 или true - включен)"""
+    return params.get(name, "").lower() in ("1", "true")
+
+
+def _check_datetime(date_time: str) -> None:
+    """Функция проверяет формат даты запроса (гггг-мм-дд чч:мм:сс)"""
+    try:
+        parse_input_datetime(date_time)
+    except ValueError:
+        raise RequestError("Дата должна быть в формате гггг-мм-дд чч:мм:сс")
+
+
+def _error(status: int, message: str) -> tuple[int, str, str]:
+    return status, "application/json", to_json({"error": message}, compact=True)
+
+
+def _response(status: int, content_type: str, body: str, keep_alive: bool) -> bytes:
+    """Функция формирует ответ HTTP/1.1"""
+    payload = body.encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+        f"Content-Type: {content_type}; charset=utf-8\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + payload
+
+
+async def serve(host: str, port: int, service: DashboardService) -> None:
+    """Функция запускает сервис и обслуживает запросы до остановки процесса"""
+    server = await service.start(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Функция запускает сервис из командной строки"""
+    parser = argparse.ArgumentParser(description="HTTP-сервис сводки, отчетов и «Инвесткопилки»")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--data", default=abs_xlsx_path, help="файл с транзакциями")
+    parser.add_argument("--settings", default=abs_json_path, help="json-файл с настройками пользователя")
+    args: Any = parser.parse_args(argv)
+    asyncio.run(serve(args.host, args.port, DashboardService(args.data, args.settings)))
+
+
+if __name__ == "__main__":
+    main()
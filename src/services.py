@@ -1,53 +1,77 @@
-import json
-import logging
 import os
-from typing import Any
+from typing import Any, Iterable
 
-from src.utils import df, format_date
+import numpy as np
+import pandas as pd
+
+from src.batch import MISSING_DAY, TransactionBatch
+from src.dates import PAYMENT_DATE_FORMAT, format_iso_dates, parse_dates
+from src.log_setup import get_logger
+from src.serializer import to_json
+from src.store import load_transactions
 
 # Получаем абсолютный путь до текущей директории
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
-# Создаем путь до файла логов относительно текущей директории
-rel_log_file_path = os.path.join(current_dir, "../logs/services.log")
-abs_log_file_path = os.path.abspath(rel_log_file_path)
-
 # Создаем путь до файла operations.xlsx относительно текущей директории
 rel_xlsx_path = os.path.join(current_dir, "../data/operations.xlsx")
 abs_xlsx_path = os.path.abspath(rel_xlsx_path)
 
-# Добавляем логгер, который записывает логи в файл.
-logger = logging.getLogger("services")
-logger.setLevel(logging.INFO)
-file_handler = logging.FileHandler(abs_log_file_path, "w", encoding="utf-8")
-file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s: %(message)s")
-file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
-
-
-# Формируем список словарей, содержащий информацию о транзакциях - transactions
-logger.info("Cписок словарей, содержащий информацию о транзакциях (transactions) сформирован")
-df_draft = df[["Дата платежа", "Сумма платежа"]].copy(deep=True)
-df_clean = df_draft.dropna()
-df_output = df_clean.to_dict("records")
-transactions = []
-for i in df_output:
-    output_dict = {
-        "Дата платежа": format_date(i["Дата платежа"]),
-        "Сумма платежа": abs(i["Сумма платежа"])
-    }
-    transactions.append(output_dict)
-
-
-def investing(month: str, transactions_list: list[dict[str, Any]], limit: int) -> float | str:
-    """Функция принимает на вход анализируемый месяц, список словарей с транзакциями, шаг округления
-    и возвращает анализ инвестиционных накоплений в виде json-ответа"""
-
-    result = 0
-    for transaction in transactions_list:
-        if month in transaction["Дата платежа"]:
-            result += limit - (transaction["Сумма платежа"] % limit)
-            result = round(result, 2)
+# Добавляем логгер, который записывает логи в файл logs/services.log (через общую очередь записи логов)
+logger = get_logger("services")
+
+
+# Столбцы, по которым строятся список транзакций и расчет «Инвесткопилки»
+TRANSACTION_COLUMNS = ["Дата платежа", "Сумма платежа"]
+
+# Кэш списка транзакций: строится при первом обращении и пересобирается, когда хранилище отдает новый DataFrame
+_transactions_cache: dict[str, tuple[pd.DataFrame, list[dict[str, Any]]]] = {}
+
+
+def build_transactions(input_df: pd.DataFrame) -> list[dict[str, Any]]:
+    """Функция принимает на вход DataFrame и возвращает список словарей с датой и суммой платежа.
+    Столбец дат платежа разбирается один раз для всех строк (каждая различная дата - один раз)"""
+    df_clean = input_df[TRANSACTION_COLUMNS].dropna()
+    payment_dates = format_iso_dates(parse_dates(df_clean["Дата платежа"], PAYMENT_DATE_FORMAT, unit="D"))
+    amounts = np.abs(df_clean["Сумма платежа"].to_numpy(dtype=np.float64)).tolist()
+    transactions = [
+        {"Дата платежа": payment_date, "Сумма платежа": amount} for payment_date, amount in zip(payment_dates, amounts)
+    ]
+    return transactions
+
+
+def get_transactions(source_path: str = abs_xlsx_path) -> list[dict[str, Any]]:
+    """Функция возвращает список словарей, содержащий информацию о транзакциях из хранилища.
+    Список формируется при первом вызове и переиспользуется, пока не изменится исходный файл"""
+    df = load_transactions(source_path)
+    if df is None:
+        return []
+
+    cached = _transactions_cache.get(source_path)
+    if cached is not None and cached[0] is df:
+        return cached[1]
+
+    transactions = build_transactions(df)
+    _transactions_cache[source_path] = (df, transactions)
+    logger.info("Cписок словарей, содержащий информацию о транзакциях (transactions) сформирован")
+    return transactions
+
+
+def investing(
+    month: str, transactions_list: list[dict[str, Any]] | TransactionBatch, limit: int, compact: bool = False
+) -> float | str:
+    """Функция принимает на вход анализируемый месяц, список словарей с транзакциями (или TransactionBatch),
+    шаг округления и возвращает анализ инвестиционных накоплений в виде json-ответа
+    (при compact=True - в одну строку)"""
+
+    if isinstance(transactions_list, TransactionBatch):
+        result = investing_batch_total(month, transactions_list, limit)
+    else:
+        result = 0
+        for transaction in transactions_list:
+            if month in transaction["Дата платежа"]:
+                result += limit - (transaction["Сумма платежа"] % limit)
+                result = round(result, 2)
     logger.info(
         f"Потенциальная сумма , отложенная в «Инвесткопилку» за {month} с шагом округления {limit} составляет {result}"
     )
@@ -57,5 +81,95 @@ def investing(month: str, transactions_list: list[dict[str, Any]], limit: int) -
 
     # Формируем json-ответ
     logger.info('json-ответ с общей суммой, которую удалось отложить в "Инвесткопилку" создан успешно')
-    json_output = json.dumps(result_list_dicts, ensure_ascii=False, indent=4)
+    json_output = to_json(result_list_dicts, compact)
     return json_output
+
+
+def investing_chunked(month: str, chunks: Iterable[pd.DataFrame], limit: int) -> str:
+    """Функция принимает на вход анализируемый месяц, поток DataFrame (порции строк одного файла) и шаг округления
+    и возвращает тот же json-ответ, что и investing. Суммы считаются по каждой порции и складываются;
+    месяц ищется в дате платежа как подстрока, как в investing (например, "2021" - весь год)"""
+    result: float = 0
+    for chunk in chunks:
+        payment_dates, amounts = investing_arrays(chunk)
+        selected = month_mask(month, payment_dates)
+        # Как в investing: если за месяц нет транзакций, сумма остается целым нулем
+        if selected.any():
+            result = round(result + float(np.sum(limit - np.mod(amounts[selected], limit))), 2)
+    logger.info(
+        f"Потенциальная сумма , отложенная в «Инвесткопилку» за {month} с шагом округления {limit} составляет {result}"
+    )
+
+    result_list_dicts = {"month": month, "rounding_step": limit, "total_amount": result}
+    return to_json(result_list_dicts)
+
+
+def investing_arrays(input_df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Функция принимает на вход DataFrame и возвращает массив дат платежа (datetime64[D])
+    и массив модулей сумм платежа (float64) для векторного расчета «Инвесткопилки»"""
+    df_clean = input_df[TRANSACTION_COLUMNS].dropna()
+    payment_dates = parse_dates(df_clean["Дата платежа"], PAYMENT_DATE_FORMAT, unit="D")
+    amounts = np.abs(df_clean["Сумма платежа"].to_numpy(dtype=np.float64))
+    return payment_dates, amounts
+
+
+def investing_matrix(
+    payment_dates: np.ndarray, amounts: np.ndarray, limits: list[int], months: list[str] | None = None
+) -> pd.DataFrame:
+    """Функция принимает на вход массив дат платежа, массив сумм платежа, список шагов округления и месяцев
+    и возвращает таблицу «месяц × шаг округления» с суммами, отложенными в «Инвесткопилку».
+    Округление такое же, как в investing: каждая транзакция добавляет limit - (сумма % limit)"""
+
+    payment_months = np.asarray(payment_dates).astype("datetime64[M]")
+    if months is None:
+        month_keys = np.unique(payment_months)
+    else:
+        month_keys = np.array(months, dtype="datetime64[M]")
+    steps = np.asarray(limits, dtype=np.float64)
+
+    # Номер месяца для каждой транзакции; транзакции вне запрошенных месяцев отбрасываются
+    month_index = np.zeros(0, dtype=np.intp)
+    row_mask = np.zeros(len(payment_months), dtype=bool)
+    if len(month_keys) > 0:
+        order = np.argsort(month_keys)
+        sorted_keys = month_keys[order]
+        positions = np.searchsorted(sorted_keys, payment_months).clip(max=len(sorted_keys) - 1)
+        row_mask = sorted_keys[positions] == payment_months
+        month_index = order[positions[row_mask]]
+
+    # Прибавка к копилке для каждой пары «транзакция × шаг округления»
+    row_amounts = np.asarray(amounts, dtype=np.float64)[row_mask]
+    increments = np.round(steps[np.newaxis, :] - np.mod(row_amounts[:, np.newaxis], steps[np.newaxis, :]), 2)
+
+    totals = np.zeros((len(month_keys), len(steps)), dtype=np.float64)
+    for j in range(len(steps)):
+        totals[:, j] = np.bincount(month_index, weights=increments[:, j], minlength=len(month_keys))
+
+    logger.info(f"Рассчитана «Инвесткопилка» для {len(month_keys)} месяцев и {len(steps)} шагов округления")
+    return pd.DataFrame(
+        np.round(totals, 2),
+        index=pd.Index(np.datetime_as_string(month_keys, unit="M"), name="month"),
+        columns=pd.Index(list(limits), name="rounding_step"),
+    )
+
+
+def investing_batch_total(month: str, batch: TransactionBatch, limit: int) -> float:
+    """Функция принимает на вход месяц, TransactionBatch и шаг округления и возвращает сумму,
+    отложенную в «Инвесткопилку». Транзакции без даты или суммы платежа не учитываются, как в build_transactions.
+    Месяц ищется в дате платежа (гггг-мм-дд) как подстрока, как в investing для списка словарей
+    (например, "2021" - весь год); каждая различная дата проверяется один раз"""
+    valid = (batch.payment_days != MISSING_DAY) & ~np.isnan(batch.amounts)
+    selected = month_mask(month, batch.payment_days[valid].astype("datetime64[D]"))
+    # Как в investing: если за месяц нет транзакций, сумма остается целым нулем
+    if not selected.any():
+        return 0
+    amounts = np.abs(batch.amounts[valid][selected])
+    return round(float(np.sum(limit - np.mod(amounts, limit))), 2)
+
+
+def month_mask(month: str, payment_dates: np.ndarray) -> np.ndarray:
+    """Функция принимает на вход месяц и массив дат платежа (datetime64[D]) и возвращает маску дат,
+    в которых месяц встречается как подстрока даты гггг-мм-дд; каждая различная дата проверяется один раз"""
+    days, day_index = np.unique(payment_dates, return_inverse=True)
+    matching_days = np.array([month in day for day in format_iso_dates(days)], dtype=bool)
+    return matching_days[day_index.reshape(-1)]
@@ -0,0 +1,612 @@
+import json
+import os
+import threading
+from typing import Any, cast
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta as rdt
+
+from src.aggregates import SpendingAggregates
+from src.dates import OPERATION_DATE_FORMAT, parse_dates
+from src.log_setup import get_logger
+from src.readers import read_transactions
+
+# Получаем абсолютный путь до текущей директории
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Создаем путь до файла operations.xlsx относительно текущей директории
+rel_xlsx_path = os.path.join(current_dir, "../data/operations.xlsx")
+abs_xlsx_path = os.path.abspath(rel_xlsx_path)
+
+# Добавляем логгер, который записывает логи в файл logs/store.log (через общую очередь записи логов)
+logger = get_logger("store")
+
+# Версия формата кэша: при изменении раскладки столбцов старый кэш перестраивается
+CACHE_FORMAT_VERSION = 3
+
+# Столбцы, по которым определяются повторы строк при добавлении новых выгрузок
+ROW_KEY_COLUMNS = ["Дата операции", "Номер карты", "Сумма платежа", "Описание"]
+
+
+class TransactionStore:
+    """Хранилище транзакций. Один раз конвертирует файл xlsx в столбцовый формат на диске
+    (по файлу .npy на столбец, строки отсортированы по дате операции) и переиспользует его,
+    пока не изменится исходный файл. Индекс строк DataFrame - номера строк в исходном файле.
+    При mmap=True столбцы из кэша не копируются в память, а отображаются из файлов (только чтение):
+    строковые столбцы остаются кодами словаря (pandas.Categorical), индекс по дате использует
+    те же массивы, поэтому несколько процессов используют одну копию данных.
+    Загрузка данных и добавление выгрузок выполняются под блокировкой хранилища: потоки, одновременно
+    обратившиеся к хранилищу, загружают файл один раз, а запросы не видят добавление строк наполовину"""
+
+    def __init__(self, source_path: str, cache_dir: str | None = None, mmap: bool = False) -> None:
+        self.source_path = os.path.abspath(source_path)
+        self.mmap = mmap
+        if cache_dir is None:
+            source_name = os.path.splitext(os.path.basename(self.source_path))[0]
+            cache_dir = os.path.join(os.path.dirname(self.source_path), ".cache", source_name)
+        self.cache_dir = cache_dir
+        self._frame: pd.DataFrame | None = None
+        self._fingerprint: dict[str, Any] | None = None
+        self._date_index: DateIndex | None = None
+        self._aggregates: SpendingAggregates | None = None
+        self._keys: np.ndarray | None = None
+        self._added_keys: set[int] = set()
+        self._lock = threading.RLock()
+
+    def fingerprint(self) -> dict[str, Any]:
+        """Функция возвращает отпечаток исходного файла: время изменения и размер"""
+        stat = os.stat(self.source_path)
+        return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+    def load(self) -> pd.DataFrame | None:
+        """Функция возвращает DataFrame с транзакциями. Excel читается только если кэш устарел.
+        Строки, добавленные через ingest, объединяются с остальными при первом вызове после добавления"""
+        with self._lock:
+            date_index = self._load_index()
+            if date_index is None:
+                return None
+            if self._frame is None:
+                self._frame = date_index.frame
+            return self._frame
+
+    def ingest(self, export_path: str) -> int:
+        """Функция добавляет в хранилище новые транзакции из выгрузки (xlsx, csv, parquet или feather).
+        Строки, которые уже есть в хранилище (по ключу дата операции + карта + сумма + описание), пропускаются.
+        Новые строки сохраняются на диск отдельным сегментом, добавляются в индекс по дате (без копирования
+        уже загруженных строк) и в таблицу трат. Функция возвращает число добавленных строк"""
+        new_rows = read_transactions(export_path)
+        with self._lock:
+            date_index = self._load_index()
+            if date_index is None or new_rows is None:
+                return 0
+
+            added_rows = self._fresh_rows(date_index, new_rows.reindex(columns=date_index.columns))
+            if added_rows.empty:
+                logger.info("Новых транзакций в выгрузке нет: %s", export_path)
+                return 0
+
+            self._write_segment(added_rows)
+            date_index.append(added_rows)
+            self._frame = None
+            if self._aggregates is not None:
+                self._aggregates.append(added_rows)
+        logger.info("Добавлено %s новых транзакций из выгрузки: %s", len(added_rows), export_path)
+        return len(added_rows)
+
+    def data_version(self) -> str | None:
+        """Функция возвращает версию данных: отпечаток исходного файла и число строк
+        (меняется при изменении файла и при добавлении выгрузок через ingest). None, если файла нет"""
+        date_index = self._load_index()
+        if date_index is None or self._fingerprint is None:
+            return None
+        return f"{self._fingerprint['mtime_ns']}:{self._fingerprint['size']}:{len(date_index)}"
+
+    def date_index(self) -> "DateIndex | None":
+        """Функция возвращает индекс по дате операции. Индекс строится один раз для загруженных данных"""
+        return self._load_index()
+
+    def aggregates(self) -> SpendingAggregates | None:
+        """Функция возвращает таблицу трат по (категория, месяц, карта), построенную один раз"""
+        with self._lock:
+            date_index = self._load_index()
+            if date_index is None:
+                return None
+            if self._aggregates is None:
+                self._aggregates = SpendingAggregates.from_frame(date_index.frame, date_index.dates)
+                logger.info("Построена таблица трат: %s строк", len(self._aggregates.table))
+            return self._aggregates
+
+    def _load_index(self) -> "DateIndex | None":
+        """Функция загружает транзакции (из кэша или исходного файла) и строит индекс по дате операции.
+        Строки в кэше уже отсортированы по дате, поэтому индекс использует загруженный DataFrame без копирования"""
+        with self._lock:
+            try:
+                fingerprint = self.fingerprint()
+            except FileNotFoundError:
+                logger.warning("Файл не найден: %s", self.source_path)
+                return None
+
+            if self._date_index is not None and self._fingerprint == fingerprint:
+                return self._date_index
+
+            cached = self._read_cache(fingerprint)
+            if cached is not None:
+                frame, dates = cached
+            else:
+                source_frame = self._read_source()
+                if source_frame is None:
+                    return None
+                frame, dates = _sort_by_date(source_frame)
+                self._write_cache(frame, dates, fingerprint)
+
+            date_index = DateIndex(frame, dates=dates)
+            logger.info("Построен индекс по дате операции: %s месяцев", len(date_index.months))
+            self._date_index = date_index
+            self._fingerprint = fingerprint
+            self._frame = None
+            self._aggregates = None
+            self._keys = None
+            self._added_keys = set()
+
+            # Добавляем строки, загруженные ранее через ingest (без повторов строк исходного файла)
+            for segment in self._read_segments():
+                date_index.append(self._fresh_rows(date_index, segment))
+            return date_index
+
+    def _fresh_rows(self, date_index: "DateIndex", new_rows: pd.DataFrame) -> pd.DataFrame:
+        """Функция возвращает строки, которых еще нет в хранилище, с номерами строк после уже загруженных.
+        Ключи загруженных строк хранятся отсортированным массивом, ключи добавленных строк - множеством,
+        поэтому проверка не копирует массив ключей"""
+        if self._keys is None:
+            self._keys = np.sort(row_keys(date_index.frame))
+        keys = row_keys(new_rows)
+        positions = np.searchsorted(self._keys, keys).clip(max=max(len(self._keys) - 1, 0))
+        known = self._keys[positions] == keys if len(self._keys) else np.zeros(len(keys), dtype=bool)
+        known |= np.array([key in self._added_keys for key in keys.tolist()], dtype=bool)
+        fresh = ~known & ~pd.Series(keys).duplicated().to_numpy()
+
+        fresh_rows = new_rows.loc[fresh].copy()
+        fresh_rows.index = pd.RangeIndex(len(date_index), len(date_index) + len(fresh_rows))
+        self._added_keys.update(keys[fresh].tolist())
+        return fresh_rows
+
+    def invalidate(self) -> None:
+        """Функция сбрасывает закэшированный в памяти DataFrame"""
+        with self._lock:
+            self._frame = None
+            self._fingerprint = None
+            self._date_index = None
+            self._aggregates = None
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.cache_dir, "meta.json")
+
+    def _read_source(self) -> pd.DataFrame | None:
+        """Функция читает исходный файл (xlsx, csv, parquet или feather)"""
+        return read_transactions(self.source_path)
+
+    def _read_cache(self, fingerprint: dict[str, Any]) -> tuple[pd.DataFrame, np.ndarray] | None:
+        """Функция читает столбцовый кэш, если он соответствует отпечатку исходного файла,
+        и возвращает DataFrame и разобранные даты операции"""
+        meta = _read_meta(self._meta_path())
+        if meta is None:
+            return None
+
+        if meta.get("version") != CACHE_FORMAT_VERSION or meta.get("source") != fingerprint:
+            logger.info("Кэш устарел, исходный файл будет прочитан заново")
+            return None
+
+        mmap_mode: Any = "r" if self.mmap else None
+        try:
+            frame = _load_columns(self.cache_dir, meta["columns"], self.mmap)
+            dates = np.load(os.path.join(self.cache_dir, "dates.npy"), mmap_mode=mmap_mode)
+            rows = np.load(os.path.join(self.cache_dir, "rows.npy"), mmap_mode=mmap_mode)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Не удалось прочитать кэш: %s", e)
+            return None
+
+        # Номера строк в исходном файле (для строк, уже упорядоченных по дате, - обычный RangeIndex)
+        if (rows == np.arange(len(rows))).all():
+            frame.index = pd.RangeIndex(len(rows))
+        else:
+            frame.index = pd.Index(rows, copy=False)
+        logger.info("Данные загружены из кэша: %s", self.cache_dir)
+        return frame, dates
+
+    def _write_cache(self, frame: pd.DataFrame, dates: np.ndarray, fingerprint: dict[str, Any]) -> None:
+        """Функция сохраняет отсортированный по дате DataFrame в столбцовый кэш на диске
+        вместе с разобранными датами операции и номерами строк в исходном файле"""
+        try:
+            columns_meta = _save_columns(frame, self.cache_dir)
+            np.save(os.path.join(self.cache_dir, "dates.npy"), dates)
+            np.save(os.path.join(self.cache_dir, "rows.npy"), frame.index.to_numpy(dtype=np.int64))
+            meta = {"version": CACHE_FORMAT_VERSION, "source": fingerprint, "columns": columns_meta}
+            with open(self._meta_path(), "w", encoding="utf-8") as meta_file:
+                json.dump(meta, meta_file, ensure_ascii=False)
+            logger.info("Кэш сохранен: %s", self.cache_dir)
+        except OSError as e:
+            logger.warning("Не удалось сохранить кэш: %s", e)
+
+    def _segments_dir(self) -> str:
+        return os.path.join(self.cache_dir, "ingested")
+
+    def _read_segments(self) -> list[pd.DataFrame]:
+        """Функция читает сегменты с транзакциями, добавленными через ingest, в порядке добавления"""
+        if not os.path.isdir(self._segments_dir()):
+            return []
+        segments = []
+        for name in sorted(os.listdir(self._segments_dir())):
+            segment_dir = os.path.join(self._segments_dir(), name)
+            meta = _read_meta(os.path.join(segment_dir, "meta.json"))
+            if meta is None or meta.get("version") != CACHE_FORMAT_VERSION:
+                logger.warning("Пропущен поврежденный сегмент: %s", segment_dir)
+                continue
+            segments.append(_load_columns(segment_dir, meta["columns"], mmap=False))
+        return segments
+
+    def _write_segment(self, frame: pd.DataFrame) -> None:
+        """Функция сохраняет добавленные через ingest транзакции отдельным сегментом"""
+        os.makedirs(self._segments_dir(), exist_ok=True)
+        segment_dir = os.path.join(self._segments_dir(), f"{len(os.listdir(self._segments_dir())):06d}")
+        columns_meta = _save_columns(frame, segment_dir)
+        with open(os.path.join(segment_dir, "meta.json"), "w", encoding="utf-8") as meta_file:
+            json.dump({"version": CACHE_FORMAT_VERSION, "columns": columns_meta}, meta_file, ensure_ascii=False)
+
+
+class DateIndex:
+    """Индекс транзакций, отсортированных по дате операции, с разбиением по месяцам.
+    Запросы по диапазону дат выполняются бинарным поиском и возвращают срезы без копирования.
+    Если строки уже отсортированы (как в хранилище), индекс использует тот же DataFrame,
+    а уже разобранные даты операции можно передать в dates.
+    Добавленные строки хранятся отдельно по месяцам и объединяются с остальными только при обращении
+    ко всему индексу (frame, dates, months): запрос за период добавляет к срезу только новые строки этого периода.
+    Добавление, объединение и запрос за период выполняются под блокировкой индекса"""
+
+    def __init__(
+        self,
+        frame: pd.DataFrame,
+        column: str = "Дата операции",
+        date_format: str = OPERATION_DATE_FORMAT,
+        dates: np.ndarray | None = None,
+    ) -> None:
+        self.column = column
+        self.date_format = date_format
+        parsed = parse_dates(frame[column], date_format) if dates is None else dates
+        order = np.argsort(parsed, kind="stable")
+        self._frame: pd.DataFrame
+        self._dates: np.ndarray
+        if (order == np.arange(len(order))).all():
+            self._frame, self._dates = frame, parsed
+        else:
+            self._frame, self._dates = frame.take(order), parsed[order]
+        self._months, self._month_offsets = _month_offsets(self._dates)
+        self._dictionary_columns = _dictionary_columns(self._frame)
+        # Добавленные строки: номер месяца -> части (строки, даты), каждая часть отсортирована по дате
+        self._tails: dict[int, list[tuple[pd.DataFrame, np.ndarray]]] = {}
+        self._tail_rows = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._dates) + self._tail_rows
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Все строки индекса в порядке дат"""
+        self._merge()
+        return self._frame
+
+    @property
+    def dates(self) -> np.ndarray:
+        """Даты операции всех строк индекса (datetime64[ns], по возрастанию)"""
+        self._merge()
+        return self._dates
+
+    @property
+    def months(self) -> np.ndarray:
+        """Месяцы, за которые в индексе есть строки"""
+        self._merge()
+        return self._months
+
+    @property
+    def month_offsets(self) -> np.ndarray:
+        """Позиции первых строк каждого месяца из months"""
+        self._merge()
+        return self._month_offsets
+
+    @property
+    def columns(self) -> pd.Index:
+        """Столбцы индексируемого DataFrame"""
+        return self._frame.columns
+
+    def memory_usage(self) -> int:
+        """Функция возвращает объем памяти строк индекса в байтах (без содержимого строк), не объединяя
+        добавленные строки с остальными"""
+        frames = [self._frame] + [part for parts in self._tails.values() for part, _ in parts]
+        return int(sum(frame.memory_usage(deep=False).sum() for frame in frames))
+
+    def append(self, frame: pd.DataFrame) -> None:
+        """Функция добавляет в индекс новые строки: разбираются и сортируются только новые даты,
+        строки раскладываются по месяцам и хранятся отдельно до объединения (см. _merge)"""
+        if frame.empty:
+            return
+        parsed = parse_dates(frame[self.column], self.date_format)
+        order = np.argsort(parsed, kind="stable")
+        new_frame, new_dates = frame.take(order), parsed[order]
+        months, offsets = _month_offsets(new_dates)
+        bounds = [*offsets.tolist(), len(new_dates)]
+        with self._lock:
+            for month, lo, hi in zip(months.view(np.int64).tolist(), bounds, bounds[1:]):
+                self._tails.setdefault(month, []).append((new_frame.iloc[lo:hi], new_dates[lo:hi]))
+            self._tail_rows += len(new_dates)
+
+    def positions(self, start: Any, end: Any) -> tuple[int, int]:
+        """Функция возвращает границы [lo, hi) строк с датой операции от start до end включительно"""
+        with self._lock:
+            self._merge()
+            return self._positions(start, end)
+
+    def rows(self, lo: int, hi: int) -> pd.DataFrame:
+        """Функция возвращает строки [lo, hi) индекса. Строковые столбцы, хранящиеся кодами словаря
+        (хранилище с mmap=True), в срезе возвращаются обычными строками"""
+        with self._lock:
+            self._merge()
+            return self._rows(lo, hi)
+
+    def select(self, start: Any, end: Any) -> tuple[pd.DataFrame, np.ndarray]:
+        """Функция возвращает транзакции с датой операции от start до end включительно и их даты операции.
+        Если за эти месяцы строки не добавлялись, возвращается срез без копирования"""
+        start_date, end_date = _to_datetime64(start), _to_datetime64(end)
+        first_month, last_month = (int(day.astype("datetime64[M]").astype(np.int64)) for day in (start_date, end_date))
+        with self._lock:
+            lo, hi = self._positions(start_date, end_date)
+            rows, dates = self._rows(lo, hi), self._dates[lo:hi]
+            parts = [
+                part for month, parts in self._tails.items() if first_month <= month <= last_month for part in parts
+            ]
+        if not parts:
+            return rows, dates
+
+        # Новые строки периода добавляются после строк с той же датой (как при объединении)
+        tail_dates = np.concatenate([part_dates for _, part_dates in parts])
+        inside = (tail_dates >= start_date) & (tail_dates <= end_date)
+        if not inside.any():
+            return rows, dates
+        tail_rows = pd.concat([part for part, _ in parts]).loc[inside]
+        all_dates = np.concatenate([dates, tail_dates[inside]])
+        order = np.argsort(all_dates, kind="stable")
+        return pd.concat([rows, tail_rows]).iloc[order], all_dates[order]
+
+    def between(self, start: Any, end: Any) -> pd.DataFrame:
+        """Функция возвращает срез транзакций с датой операции от start до end включительно"""
+        return self.select(start, end)[0]
+
+    def month(self, month: str) -> pd.DataFrame:
+        """Функция возвращает срез транзакций за месяц в формате YYYY-MM"""
+        first_day = np.datetime64(month, "M").astype("datetime64[ns]")
+        next_month = (np.datetime64(month, "M") + 1).astype("datetime64[ns]")
+        return self.between(first_day, next_month - np.timedelta64(1, "ns"))
+
+    def month_to_date(self, end: Any) -> pd.DataFrame:
+        """Функция возвращает срез транзакций с начала месяца до переданной даты"""
+        end_date = pd.Timestamp(end).to_pydatetime()
+        return self.between(end_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0), end_date)
+
+    def last_months(self, end: Any, months: int) -> pd.DataFrame:
+        """Функция возвращает срез транзакций за последние months месяцев до переданной даты"""
+        end_date = pd.Timestamp(end).to_pydatetime()
+        return self.between(end_date + rdt(months=-months), end_date)
+
+    def _positions(self, start: Any, end: Any) -> tuple[int, int]:
+        """Функция возвращает границы строк периода среди уже объединенных строк"""
+        lo = int(np.searchsorted(self._dates, _to_datetime64(start), side="left"))
+        hi = int(np.searchsorted(self._dates, _to_datetime64(end), side="right"))
+        return lo, max(lo, hi)
+
+    def _rows(self, lo: int, hi: int) -> pd.DataFrame:
+        """Функция возвращает срез уже объединенных строк, строковые столбцы - обычными строками"""
+        rows = self._frame.iloc[lo:hi]
+        if not self._dictionary_columns:
+            return rows
+        return rows.assign(**{name: rows[name].to_numpy(dtype=object) for name in self._dictionary_columns})
+
+    def _merge(self) -> None:
+        """Функция объединяет добавленные строки с остальными: новые строки вставляются после строк
+        с той же датой. Выполняется один раз после серии добавлений, при обращении ко всему индексу"""
+        with self._lock:
+            if not self._tails:
+                return
+            parts = [part for parts in self._tails.values() for part in parts]
+            tail_dates = np.concatenate([part_dates for _, part_dates in parts])
+            order = np.argsort(tail_dates, kind="stable")
+            tail_frame, tail_dates = pd.concat([part for part, _ in parts]).take(order), tail_dates[order]
+
+            insert_at = np.searchsorted(self._dates, tail_dates, side="right")
+            size = len(self._dates)
+            take_order = np.insert(np.arange(size), insert_at, size + np.arange(len(tail_dates)))
+            self._frame = pd.concat([self._frame, tail_frame]).take(take_order)
+            self._dates = np.insert(self._dates, insert_at, tail_dates)
+            self._months, self._month_offsets = _month_offsets(self._dates)
+            self._dictionary_columns = _dictionary_columns(self._frame)
+            self._tails = {}
+            self._tail_rows = 0
+
+
+def _sort_by_date(frame: pd.DataFrame) -> tuple[pd.DataFrame, np.ndarray]:
+    """Функция возвращает DataFrame, отсортированный по дате операции (строки с одной датой - в порядке файла),
+    и разобранные даты операции. Индекс строк сохраняется"""
+    dates = parse_dates(frame["Дата операции"], OPERATION_DATE_FORMAT)
+    order = np.argsort(dates, kind="stable")
+    if (order == np.arange(len(order))).all():
+        return frame, dates
+    return frame.take(order), dates[order]
+
+
+def _month_offsets(dates: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Функция возвращает месяцы отсортированных дат и позиции первых строк каждого месяца (за один проход)"""
+    months = dates.astype("datetime64[M]")
+    month_numbers = months.view(np.int64)
+    offsets = np.flatnonzero(np.diff(month_numbers, prepend=month_numbers[:1] - 1) != 0)
+    return months[offsets], offsets
+
+
+def _dictionary_columns(frame: pd.DataFrame) -> list[str]:
+    """Функция возвращает столбцы, хранящиеся кодами словаря (pandas.Categorical)"""
+    return [name for name, dtype in frame.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+
+
+def _to_datetime64(value: Any) -> np.datetime64:
+    """Функция приводит строку или дату к numpy.datetime64 для бинарного поиска"""
+    return cast(np.datetime64, pd.Timestamp(value).to_datetime64().astype("datetime64[ns]"))
+
+
+def row_keys(frame: pd.DataFrame) -> np.ndarray:
+    """Функция возвращает ключи строк (хэш даты операции, карты, суммы платежа и описания) для поиска повторов"""
+    key_frame = pd.DataFrame(index=frame.index)
+    for column in ROW_KEY_COLUMNS:
+        if column not in frame.columns:
+            continue
+        if column == "Сумма платежа":
+            key_frame[column] = frame[column].astype(np.float64)
+        else:
+            key_frame[column] = frame[column].astype(object).fillna("").astype(str)
+    return cast(np.ndarray, pd.util.hash_pandas_object(key_frame, index=False).to_numpy())
+
+
+def _read_meta(meta_path: str) -> dict[str, Any] | None:
+    """Функция читает json-файл с описанием столбцов кэша"""
+    try:
+        with open(meta_path, "r", encoding="utf-8") as meta_file:
+            meta: dict[str, Any] = json.load(meta_file)
+        return meta
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _save_columns(frame: pd.DataFrame, directory: str) -> list[dict[str, Any]]:
+    """Функция сохраняет столбцы DataFrame в файлы .npy и возвращает их описание"""
+    os.makedirs(directory, exist_ok=True)
+    columns_meta = []
+    for i, name in enumerate(frame.columns):
+        series = frame[name]
+        column_path = os.path.join(directory, f"{i}.npy")
+        if series.dtype == object or isinstance(series.dtype, pd.CategoricalDtype):
+            codes, categories = _encode(series)
+            np.save(column_path, codes)
+            columns_meta.append({"name": name, "kind": "dictionary", "categories": categories})
+        elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_integer_dtype(series):
+            # Целые с пропусками (Int64): значения и маска пропусков хранятся в отдельных файлах
+            np.save(column_path, series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0))
+            np.save(os.path.join(directory, f"{i}.mask.npy"), series.isna().to_numpy())
+            columns_meta.append({"name": name, "kind": "nullable"})
+        else:
+            np.save(column_path, series.to_numpy())
+            columns_meta.append({"name": name, "kind": "plain"})
+    return columns_meta
+
+
+def _load_columns(directory: str, columns_meta: list[dict[str, Any]], mmap: bool) -> pd.DataFrame:
+    """Функция загружает DataFrame из файлов .npy по описанию столбцов. При mmap=True массивы не копируются:
+    строковые столбцы становятся pandas.Categorical с кодами из файла и общим словарем"""
+    columns: dict[str, Any] = {}
+    for i, column in enumerate(columns_meta):
+        values = np.load(os.path.join(directory, f"{i}.npy"), mmap_mode="r")
+        if column["kind"] == "dictionary" and mmap:
+            columns[column["name"]] = pd.Categorical.from_codes(values, categories=column["categories"])
+        elif column["kind"] == "dictionary":
+            columns[column["name"]] = _decode(values, column["categories"])
+        elif column["kind"] == "nullable":
+            mask = np.load(os.path.join(directory, f"{i}.mask.npy"), mmap_mode="r")
+            columns[column["name"]] = pd.arrays.IntegerArray(
+                values if mmap else np.array(values), mask if mmap else np.array(mask)
+            )
+        else:
+            columns[column["name"]] = values if mmap else np.array(values)
+    return pd.DataFrame(columns, copy=False)
+
+
+def _encode(series: pd.Series) -> tuple[np.ndarray, list[Any]]:
+    """Функция кодирует строковый столбец словарем: коды и список уникальных значений.
+    Тип кодов - самый короткий, как у pandas.Categorical, чтобы коды из файла использовались без копирования"""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    return codes.astype(_codes_dtype(len(uniques))), [_to_json_value(value) for value in uniques]
+
+
+def _codes_dtype(categories_count: int) -> type:
+    """Функция возвращает тип кодов словаря из categories_count значений (как выбирает pandas.Categorical)"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if categories_count < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _decode(codes: np.ndarray, categories: list[Any]) -> np.ndarray:
+    """Функция восстанавливает строковый столбец из кодов словаря. Код -1 означает пропуск"""
+    lookup = np.empty(len(categories) + 1, dtype=object)
+    lookup[:-1] = categories
+    lookup[-1] = np.nan
+    return cast(np.ndarray, lookup[np.asarray(codes)])
+
+
+def _to_json_value(value: Any) -> Any:
+    """Функция приводит значение словаря к типу, который можно сохранить в json"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return str(value)
+    return value
+
+
+_stores: dict[str, TransactionStore] = {}
+
+
+def get_store(source_path: str = abs_xlsx_path, mmap: bool = False) -> TransactionStore:
+    """Функция возвращает общее хранилище для файла с транзакциями.
+    Параметр mmap учитывается только при создании хранилища"""
+    key = os.path.abspath(source_path)
+    if key not in _stores:
+        _stores[key] = TransactionStore(key, mmap=mmap)
+    return _stores[key]
+
+
+def clear_stores() -> None:
+    """Функция забывает общие хранилища процесса (например, унаследованные процессом-обработчиком при fork),
+    чтобы следующий вызов get_store создал хранилище с нужными параметрами"""
+    _stores.clear()
+
+
+def load_transactions(source_path: str = abs_xlsx_path) -> pd.DataFrame | None:
+    """Функция возвращает DataFrame с транзакциями из общего хранилища (строки упорядочены по дате операции,
+    индекс - номера строк в исходном файле)"""
+    return get_store(source_path).load()
+
+
+def _store_for(frame: pd.DataFrame) -> TransactionStore | None:
+    """Функция возвращает общее хранилище, которому принадлежит DataFrame"""
+    for store in _stores.values():
+        if store._frame is frame:
+            return store
+    return None
+
+
+def date_index_for(frame: pd.DataFrame) -> DateIndex:
+    """Функция возвращает индекс по дате операции для DataFrame. Для DataFrame из общего хранилища
+    используется уже построенный индекс, для остальных индекс строится заново"""
+    store = _store_for(frame)
+    if store is not None:
+        index = store.date_index()
+        if index is not None:
+            return index
+    return DateIndex(frame)
+
+
+def aggregates_for(frame: pd.DataFrame) -> SpendingAggregates:
+    """Функция возвращает таблицу трат для DataFrame. Для DataFrame из общего хранилища
+    используется уже построенная таблица, для остальных таблица строится заново"""
+    store = _store_for(frame)
+    if store is not None:
+        aggregates = store.aggregates()
+        if aggregates is not None:
+            return aggregates
+    date_index = date_index_for(frame)
+    return SpendingAggregates.from_frame(date_index.frame, date_index.dates)
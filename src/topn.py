@@ -0,0 +1,88 @@
+import heapq
+import itertools
+from typing import Any, Hashable, Iterable
+
+import numpy as np
+
+
+def top_n_indices(values: np.ndarray, top_n: int) -> np.ndarray:
+    """Функция возвращает индексы top_n наибольших значений по убыванию без полной сортировки массива.
+    При равных значениях первым идет элемент с меньшим индексом (как nlargest(keep="first")), пропуски (NaN)
+    не учитываются"""
+    values = np.asarray(values, dtype=np.float64)
+    positions = np.flatnonzero(~np.isnan(values))
+    top_n = min(top_n, len(positions))
+    if top_n <= 0:
+        return np.zeros(0, dtype=np.intp)
+
+    # Порог - top_n-е по величине значение; берем все значения выше порога и первые из равных порогу
+    candidates = values[positions]
+    threshold = np.partition(candidates, len(candidates) - top_n)[len(candidates) - top_n]
+    above = positions[candidates > threshold]
+    equal = positions[candidates == threshold][:top_n - len(above)]
+    selected = np.concatenate([above, equal])
+
+    # Сортируем только выбранные top_n элементов: по убыванию значения, затем по возрастанию индекса
+    return selected[np.lexsort((selected, -values[selected]))]
+
+
+def group_top_n_indices(codes: np.ndarray, values: np.ndarray, top_n: int) -> dict[int, np.ndarray]:
+    """Функция возвращает для каждого кода группы (коды -1 - пропуск) индексы top_n наибольших значений
+    по убыванию. Строки раскладываются по группам устойчивой сортировкой только по коду группы (для кодов
+    меньше 2**16 это поразрядная сортировка за линейное время), в каждой группе ТОП отбирается частичным
+    отбором top_n_indices, поэтому значения целиком не сортируются. Пропуски (NaN) не учитываются"""
+    codes = np.asarray(codes)
+    values = np.asarray(values, dtype=np.float64)
+    result = {int(code): np.zeros(0, dtype=np.intp) for code in np.unique(codes[codes >= 0])}
+    positions = np.flatnonzero((codes >= 0) & ~np.isnan(values))
+    if top_n <= 0 or not len(positions):
+        return result
+
+    group_codes = codes[positions]
+    if group_codes.max() < 2**16:
+        group_codes = group_codes.astype(np.uint16)
+    # Внутри группы строки остаются в порядке индексов, поэтому равные значения отбираются по индексу
+    order = positions[np.argsort(group_codes, kind="stable")]
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    for start, end in zip(starts, np.r_[starts[1:], len(order)]):
+        group = order[start:end]
+        result[int(sorted_codes[start])] = group[top_n_indices(values[group], top_n)]
+    return result
+
+
+class RunningTopN:
+    """Потоковый ТОП-N: хранит top_n наибольших элементов (для каждой группы) в куче размера top_n,
+    поэтому строки можно добавлять по мере поступления без хранения всей истории"""
+
+    def __init__(self, top_n: int = 5) -> None:
+        self.top_n = top_n
+        self._heaps: dict[Hashable, list[tuple[float, int, Any]]] = {}
+        self._counter = itertools.count()
+
+    def push(self, value: float, item: Any, group: Hashable = None) -> None:
+        """Функция добавляет элемент со значением value в группу group"""
+        if value != value or self.top_n <= 0:  # Пропуски (NaN) не учитываются
+            return
+        heap = self._heaps.setdefault(group, [])
+        # При равных значениях вытесняется более поздний элемент: ключ (value, -порядковый номер)
+        entry = (value, -next(self._counter), item)
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+    def update(self, values: Iterable[float], items: Iterable[Any], groups: Iterable[Hashable] | None = None) -> None:
+        """Функция добавляет порцию элементов"""
+        if groups is None:
+            groups = itertools.repeat(None)
+        for value, item, group in zip(values, items, groups):
+            self.push(value, item, group)
+
+    def result(self, group: Hashable = None) -> list[Any]:
+        """Функция возвращает элементы группы по убыванию значения"""
+        heap = self._heaps.get(group, [])
+        return [item for _, _, item in sorted(heap, key=lambda entry: entry[:2], reverse=True)]
+
+    def groups(self) -> list[Hashable]:
+        return list(self._heaps)
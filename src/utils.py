@@ -1,21 +1,27 @@
 import json
-import logging
+import math
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime as dt
-from typing import Any, List
+from typing import Any, Iterable, List
 
+import numpy as np
 import pandas as pd
 import requests
 from dotenv import load_dotenv
 
+from src.batch import TransactionBatch, decode, format_days
+from src.cache import LATEST, get_provider_cache
+from src.dates import parse_input_datetime, payment_date_to_iso
+from src.http_client import describe_error, get_provider_client
+from src.log_setup import get_logger
+from src.readers import read_excel_file
+from src.store import get_store
+from src.topn import RunningTopN, group_top_n_indices, top_n_indices
 
 # Получаем абсолютный путь до текущей директории
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
-# Создаем путь до файла логов относительно текущей директории
-rel_log_file_path = os.path.join(current_dir, "../logs/utils.log")
-abs_log_file_path = os.path.abspath(rel_log_file_path)
-
 # Создаем путь до файла user_settings.json относительно текущей директории.
 # В файл храниться словарь с требуемыми валютами и акциями
 rel_json_path = os.path.join(current_dir, "../user_settings.json")
@@ -25,31 +31,49 @@ abs_json_path = os.path.abspath(rel_json_path)
 rel_xlsx_path = os.path.join(current_dir, "../data/operations.xlsx")
 abs_xlsx_path = os.path.abspath(rel_xlsx_path)
 
-# Добавляем логгер, который записывает логи в файл.
-logger = logging.getLogger("utils")
-logger.setLevel(logging.INFO)
-file_handler = logging.FileHandler(abs_log_file_path, "w", encoding="utf-8")
-file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s: %(message)s")
-file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
+# Добавляем логгер, который записывает логи в файл logs/utils.log (через общую очередь записи логов)
+logger = get_logger("utils")
 
 load_dotenv()
 API_KEY_FOR_CURRENCY = os.getenv("API_KEY_FOR_CURRENCY")
 API_KEY_FOR_STOCK = os.getenv("API_KEY_FOR_STOCK")
 
-# Создаем json-файл со списком акций и валют
+# Адреса API курсов валют и стоимости акций
+CURRENCY_API_URL = "https://v6.exchangerate-api.com/v6"
+STOCK_API_URL = "https://api.marketstack.com/v1/eod"
+
+# Максимальное число одновременных запросов к API
+MAX_CONCURRENT_REQUESTS = 5
+
+# Число транзакций в ТОП по сумме платежа по умолчанию
+TOP_N = 5
+
+# Максимальное число тикеров в одном запросе к API акций (marketstack принимает до 100 тикеров)
+STOCK_BATCH_SIZE = 100
 
+# Настройки пользователя по умолчанию: список акций и валют
 currencies_stocks_dict = {"user_currencies": ["USD", "EUR"], "user_stocks": ["AAPL", "AMZN", "GOOGL", "MSFT", "TSLA"]}
 
-with open(abs_json_path, "w") as file:
-    json.dump(currencies_stocks_dict, file)
 
+def load_user_settings(json_file: str = abs_json_path) -> dict[str, Any]:
+    """Функция принимает на вход путь до json-файла с настройками и возвращает словарь со списком акций и валют.
+    Если файла нет, он создается с настройками по умолчанию"""
+    if not os.path.exists(json_file):
+        with open(json_file, "w") as file:
+            json.dump(currencies_stocks_dict, file)
+        logger.info("Создан файл настроек пользователя: %s", json_file)
 
-def import_from_excel(input_xlsx_file: str) -> pd.DataFrame:
-    """Функция принимает на вход путь до файла xlsx и возвращает DataFrame"""
+    with open(json_file, "r", encoding="utf-8") as doc_file:
+        user_settings: dict[str, Any] = json.load(doc_file)
+    return user_settings
+
+
+def import_from_excel(input_xlsx_file: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """Функция принимает на вход путь до файла xlsx и список нужных столбцов (None - все столбцы)
+    и возвращает DataFrame. Файлы csv, parquet и feather читаются функцией src.readers.read_transactions"""
 
     try:
-        input_df = pd.read_excel(input_xlsx_file)
+        input_df = read_excel_file(input_xlsx_file, columns)
         logger.info("Данные из файла xlsx импортированы")
         return input_df
     except FileNotFoundError:
@@ -60,59 +84,102 @@ def import_from_excel(input_xlsx_file: str) -> pd.DataFrame:
         logger.warning("Произошла ошибка при импорте данных: %s", e)
 
 
-df = import_from_excel(abs_xlsx_path)
-
-
 def get_currency_rates(json_file: str) -> List[dict[str, Any]]:
     """Функция принимает на вход json-файл и возвращает список словарей с курсами требуемых валют.
     Курс валюты функция импортирует через API"""
     logger.info("Курсы валют получены")
 
-    with open(json_file, "r", encoding="utf-8") as doc_file:
-        currencies_stocks_list = json.load(doc_file)
-        currency_rates_list_dicts = []
-
-        # Получаем курсы валют относительно USD
-        url = f"https://v6.exchangerate-api.com/v6/{API_KEY_FOR_CURRENCY}/latest/USD"
-        response = requests.get(url)
-        result = response.json()
-
-        for currency in currencies_stocks_list["user_currencies"]:
-            currency_rates_dict = {
-                "currency": currency,
-                "rate": result["conversion_rates"].get(currency)
-            }
-            currency_rates_list_dicts.append(currency_rates_dict)
-
+    currencies_stocks_list = load_user_settings(json_file)
+    currency_rates_list_dicts: List[dict[str, Any]] = []
+    if not currencies_stocks_list["user_currencies"]:
         return currency_rates_list_dicts
 
-
-def get_stock_prices(json_file: str) -> List[dict[str, Any]]:
-    """Функция принимает на вход json-файл и возвращает список словарей с курсами требуемых акций.
-    Стоимости акций функция импортирует через API"""
+    # Получаем курсы валют относительно USD (из кэша, если последние курсы еще не устарели)
+    provider_cache = get_provider_cache()
+    conversion_rates = provider_cache.get("exchangerate", "USD", LATEST)
+    if conversion_rates is None:
+        url = f"{CURRENCY_API_URL}/{API_KEY_FOR_CURRENCY}/latest/USD"
+        try:
+            response = get_provider_client().get(url)
+            conversion_rates = response.json()["conversion_rates"]
+        except (requests.RequestException, ValueError, KeyError) as e:
+            logger.warning("Не удалось получить курсы валют: %s", describe_error(e))
+            return currency_rates_list_dicts
+        provider_cache.set("exchangerate", "USD", LATEST, conversion_rates)
+
+    for currency in currencies_stocks_list["user_currencies"]:
+        currency_rates_dict = {
+            "currency": currency,
+            "rate": conversion_rates.get(currency)
+        }
+        currency_rates_list_dicts.append(currency_rates_dict)
+
+    return currency_rates_list_dicts
+
+
+def fetch_stock_batch(stocks: list[str], date_time: str | None = None) -> dict[str, Any]:
+    """Функция принимает на вход список тикеров и дату (по умолчанию input_datetime) и возвращает словарь
+    {тикер: цена закрытия}. Все тикеры запрашиваются одним запросом, ответ разбирается по тикерам
+    и сохраняется в кэш"""
+    date_time = date_time or input_datetime
+    provider_cache = get_provider_cache()
+    date = date_time[:10]
+    url = f"{STOCK_API_URL}?access_key={API_KEY_FOR_STOCK}&symbols={','.join(stocks)}&date={date_time}"
+    try:
+        response = get_provider_client().get(url)
+        result = response.json()
+    except (requests.RequestException, ValueError) as e:
+        logger.warning("Не удалось получить стоимость акций %s: %s", ", ".join(stocks), describe_error(e))
+        return {}
+
+    prices = {}
+    for row in result.get("data") or []:
+        stock = row.get("symbol")
+        if stock in stocks and stock not in prices:
+            prices[stock] = row.get("close")  # Получаем цену закрытия
+            provider_cache.set("marketstack", stock, date, prices[stock])
+    return prices
+
+
+def get_stock_prices(
+    json_file: str,
+    max_workers: int = MAX_CONCURRENT_REQUESTS,
+    batch_size: int = STOCK_BATCH_SIZE,
+    date_time: str | None = None,
+) -> List[dict[str, Any]]:
+    """Функция принимает на вход json-файл и возвращает список словарей с курсами требуемых акций
+    на дату date_time (по умолчанию input_datetime).
+    Стоимости акций функция импортирует через API: тикеры, которых нет в кэше, запрашиваются пакетами
+    по batch_size штук, пакеты выполняются параллельно (не более max_workers).
+    Акции, стоимость которых получить не удалось, в список не попадают"""
     logger.info("Стоимости акций получены")
 
-    with open(json_file, "r", encoding="utf-8") as doc_file:
-        currencies_stocks_list = json.load(doc_file)
-        stock_prices_list_dicts = []
-
-        for stock in currencies_stocks_list["user_stocks"]:
-            url = (f"https://api.marketstack.com/v1/eod?access_key={API_KEY_FOR_STOCK}&symbols={stock}&date="
-                   f"{input_datetime}")
-            response = requests.get(url)
-            result = response.json()
-
-            # Проверяем наличие данных в ответе
-            if "data" in result and len(result["data"]) > 0:
-                stock_prices_dict = {
-                    "stock": stock,
-                    "price": result["data"][0].get("close")  # Получаем цену закрытия
-                }
-                stock_prices_list_dicts.append(stock_prices_dict)
-            else:
-                logger.warning("Нет данных для акции: %s", stock)
-
-        return stock_prices_list_dicts
+    date_time = date_time or input_datetime
+    stocks = load_user_settings(json_file)["user_stocks"]
+    provider_cache = get_provider_cache()
+    date = date_time[:10]
+
+    # Берем из кэша то, что уже известно, остальные тикеры разбиваем на пакеты
+    prices = {}
+    for stock in stocks:
+        price = provider_cache.get("marketstack", stock, date)
+        if price is not None:
+            prices[stock] = price
+    missing = [stock for stock in dict.fromkeys(stocks) if stock not in prices]
+    batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+
+    if batches:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as executor:
+            for batch_prices in executor.map(fetch_stock_batch, batches, [date_time] * len(batches)):
+                prices.update(batch_prices)
+
+    stock_prices_list_dicts = []
+    for stock in stocks:
+        if prices.get(stock) is None:
+            logger.warning("Нет данных для акции: %s", stock)
+            continue
+        stock_prices_list_dicts.append({"stock": stock, "price": prices[stock]})
+    return stock_prices_list_dicts
 
 
 input_datetime = "2021-12-29 22:32:24"
@@ -120,14 +187,15 @@ input_datetime = "2021-12-29 22:32:24"
 
 def greetings(input_daytime: str) -> str:
     """Функция принимает строку с датой и возвращает требуемое приветствие"""
-    date_update = dt.strptime(input_daytime, "%Y-%m-%d %H:%M:%S")
-    time = date_update.strftime("%H:%M:%S")
+    date_update = parse_input_datetime(input_daytime)
+    # Время суток в секундах (границы включительно, как при сравнении строк "чч:мм:сс")
+    seconds = date_update.hour * 3600 + date_update.minute * 60 + date_update.second
 
-    if "05:00:00" <= time <= "12:00:00":
+    if 5 * 3600 <= seconds <= 12 * 3600:
         return "Доброе утро"
-    elif "12:00:00" <= time <= "18:00:00":
+    elif 12 * 3600 <= seconds <= 18 * 3600:
         return "Добрый день"
-    elif "18:00:00" <= time <= "23:00:00":
+    elif 18 * 3600 <= seconds <= 23 * 3600:
         return "Добрый вечер"
     else:
         return "Доброй ночи"
@@ -135,7 +203,7 @@ def greetings(input_daytime: str) -> str:
 
 def start_month(input_monthtime: str) -> dt:
     """Функция принимает на вход строку с датой и возвращает начало месяца"""
-    date_update = dt.strptime(input_monthtime, "%Y-%m-%d %H:%M:%S")
+    date_update = parse_input_datetime(input_monthtime)
     start = date_update.replace(day=1, hour=0, minute=0, second=0)
     return start
 
@@ -145,18 +213,20 @@ begin_month = start_month(input_datetime)
 
 def filter_date(df_test: str) -> pd.DataFrame:
     """Функция создает DataFrame по заданному периоду времени"""
-    dataframe = pd.read_excel(df_test)
-    df_date = pd.to_datetime(df["Дата операции"], format="%d.%m.%Y %H:%M:%S")
-    filtered_df_to_date = dataframe[(begin_month <= df_date) & (df_date <= input_datetime)]
+    date_index = get_store(df_test).date_index()
+    if date_index is None:
+        logger.warning("Не удалось загрузить транзакции: %s", df_test)
+        return pd.DataFrame()
+    filtered_df_to_date = date_index.between(begin_month, input_datetime).sort_index()
     return filtered_df_to_date
 
 
-filtered_to_date = filter_date(abs_xlsx_path)
-
-
-def cards_info(input_df: pd.DataFrame) -> list[dict[str, Any]]:
+def cards_info(input_df: pd.DataFrame | TransactionBatch) -> list[dict[str, Any]]:
     """Функция принимает на вход путь до файла xlsx и возвращает DataFrame"""
 
+    if isinstance(input_df, TransactionBatch):
+        return cards_info_batch(input_df)
+
     df_output = []
     try:
         logger.info("Данные из DataFrame обработаны")
@@ -184,27 +254,17 @@ def cards_info(input_df: pd.DataFrame) -> list[dict[str, Any]]:
     return [{}]  # Возвращаем список с пустым словарем в случае ошибки
 
 
-def top_transactions(input_df: pd.DataFrame) -> list[dict[str, Any]] | None:
-    """Функция принимает на вход DataFrame и возвращает ТОП-5 транзакций по сумме платежа"""
-    df_output_sort = []
+def top_transactions(input_df: pd.DataFrame | TransactionBatch, top_n: int = TOP_N) -> list[dict[str, Any]] | None:
+    """Функция принимает на вход DataFrame и возвращает ТОП-N (по умолчанию ТОП-5) транзакций по сумме платежа"""
+    if isinstance(input_df, TransactionBatch):
+        return top_transactions_batch(input_df, top_n)
+
     try:
         logger.info("Данные из DataFrame обработаны")
 
-        # Сортировка DataFrame по сумме платежа
-        sorted_df = input_df.sort_values("Сумма платежа", ascending=False)
-        sort_five = sorted_df.iloc[0:5]
-
-        df_sort_dict = sort_five.to_dict("records")
-        for i in df_sort_dict:
-            df_sort_result = {
-                "date": i["Дата платежа"],
-                "amount": i["Сумма платежа"],
-                "category": i["Категория"],
-                "description": i["Описание"]
-            }
-            df_output_sort.append(df_sort_result)
-
-        return df_output_sort
+        # Частичный отбор top_n строк по сумме платежа без сортировки всего DataFrame
+        top = top_n_indices(input_df["Сумма платежа"].to_numpy(dtype=float), top_n)
+        return top_records(input_df.iloc[top])
 
     except KeyError as e:
         logger.warning("Ошибка: отсутствует необходимый столбец в DataFrame: %s", e)
@@ -214,7 +274,174 @@ def top_transactions(input_df: pd.DataFrame) -> list[dict[str, Any]] | None:
     return None  # Возвращаем None в случае ошибки
 
 
+def top_transactions_by(
+    input_df: pd.DataFrame | TransactionBatch, by: str = "Номер карты", top_n: int = TOP_N
+) -> dict[str, list[dict[str, Any]]] | None:
+    """Функция принимает на вход DataFrame (или TransactionBatch), столбец группировки ("Номер карты" или
+    "Категория") и возвращает ТОП-N транзакций по сумме платежа для каждой карты или категории"""
+    try:
+        logger.info("Данные обработаны: ТОП-%s транзакций по столбцу %s", top_n, by)
+        if isinstance(input_df, TransactionBatch):
+            codes, labels = {
+                "Номер карты": (input_df.card_codes, input_df.cards),
+                "Категория": (input_df.category_codes, input_df.categories),
+            }[by]
+            amounts = input_df.amounts
+        else:
+            codes, labels = pd.factorize(input_df[by])
+            amounts = input_df["Сумма платежа"].to_numpy(dtype=float)
+
+        # ТОП каждой группы - из одной сортировки всех строк по группе и сумме платежа
+        top_by_code = group_top_n_indices(codes, amounts, top_n)
+        result = {}
+        for code in sorted(top_by_code, key=lambda code: labels[code]):
+            top = top_by_code[code]
+            if isinstance(input_df, TransactionBatch):
+                result[labels[code]] = top_records_batch(input_df, top)
+            else:
+                result[labels[code]] = top_records(input_df.iloc[top])
+        return result
+
+    except KeyError as e:
+        logger.warning("Ошибка: отсутствует необходимый столбец: %s", e)
+    except Exception as e:
+        logger.warning("Произошла ошибка при обработке данных: %s", e)
+
+    return None  # Возвращаем None в случае ошибки
+
+
+def top_records(top_df: pd.DataFrame) -> list[dict[str, Any]]:
+    """Функция принимает на вход DataFrame с отобранными транзакциями и возвращает список словарей"""
+    df_output_sort = []
+    df_sort_dict = top_df.to_dict("records")
+    for i in df_sort_dict:
+        df_sort_result = {
+            "date": i["Дата платежа"],
+            "amount": i["Сумма платежа"],
+            "category": i["Категория"],
+            "description": i["Описание"]
+        }
+        df_output_sort.append(df_sort_result)
+    return df_output_sort
+
+
+def cards_info_batch(batch: TransactionBatch) -> list[dict[str, Any]]:
+    """Функция принимает на вход TransactionBatch и возвращает информацию по картам, как cards_info"""
+    logger.info("Данные из TransactionBatch обработаны")
+
+    # Суммы по кодам карт (тем же суммированием, что и groupby в cards_info); транзакции без карты не учитываются
+    has_card = batch.card_codes >= 0
+    totals = pd.Series(batch.rounded_amounts[has_card]).groupby(batch.card_codes[has_card]).sum()
+
+    df_output = []
+    for code in sorted(totals.index, key=lambda code: batch.cards[code]):
+        total = float(totals[code])
+        df_output.append({"last_digits": batch.cards[code], "total_spent": total, "cashback": round(total / 100, 2)})
+    return df_output
+
+
+def top_transactions_batch(batch: TransactionBatch, top_n: int = TOP_N) -> list[dict[str, Any]]:
+    """Функция принимает на вход TransactionBatch и возвращает ТОП-N транзакций по сумме платежа,
+    как top_transactions"""
+    logger.info("Данные из TransactionBatch обработаны")
+    return top_records_batch(batch, top_n_indices(batch.amounts, top_n))
+
+
+def top_records_batch(batch: TransactionBatch, top: np.ndarray) -> list[dict[str, Any]]:
+    """Функция принимает на вход TransactionBatch и индексы отобранных транзакций и возвращает список словарей"""
+    dates = format_days(batch.payment_days[top])
+    categories = decode(batch.category_codes[top], batch.categories)
+    descriptions = decode(batch.description_codes[top], batch.descriptions)
+    return [
+        {"date": date, "amount": float(amount), "category": category, "description": description}
+        for date, amount, category, description in zip(dates, batch.amounts[top], categories, descriptions)
+    ]
+
+
+def running_top_transactions(
+    chunks: Iterable[pd.DataFrame], by: str | None = None, top_n: int = TOP_N
+) -> dict[Any, list[dict[str, Any]]]:
+    """Функция принимает на вход поток DataFrame (например, порции новых строк) и поддерживает
+    ТОП-N транзакций по сумме платежа по мере поступления строк (всего или по столбцу by).
+    Возвращает словарь {группа: ТОП-N}, без группировки - {None: ТОП-N}"""
+    running_top = RunningTopN(top_n)
+    for chunk in chunks:
+        # Из порции отбираются только кандидаты - ТОП-N порции (для каждой группы), словари строятся только для них.
+        # Кандидаты добавляются в порядке строк файла, чтобы равные суммы упорядочивались как в top_transactions
+        amounts = chunk["Сумма платежа"].to_numpy(dtype=float)
+        groups = None
+        if by:
+            # Транзакции без карты или категории не учитываются, как в top_transactions_by
+            codes, labels = pd.factorize(chunk[by])
+            group_tops = group_top_n_indices(codes, amounts, top_n).values()
+            top = np.sort(np.concatenate([np.zeros(0, dtype=np.intp), *group_tops]))
+            groups = labels[codes[top]].tolist()
+        else:
+            top = np.sort(top_n_indices(amounts, top_n))
+        running_top.update(amounts[top].tolist(), top_records(chunk.iloc[top]), groups)
+    return {group: running_top.result(group) for group in running_top.groups()}
+
+
+def cards_info_chunked(chunks: Iterable[pd.DataFrame]) -> list[dict[str, Any]]:
+    """Функция принимает на вход поток DataFrame (порции строк одного файла) и возвращает информацию по картам,
+    как cards_info. В памяти хранятся только суммы по картам; суммы порций складываются без потери точности,
+    поэтому результат совпадает с cards_info для всего файла"""
+    partials: dict[Any, list[float]] = {}
+    try:
+        for chunk in chunks:
+            chunk_totals = chunk.groupby("Номер карты")["Сумма операции с округлением"].sum()
+            for card, total in chunk_totals.items():
+                _add_exact(partials.setdefault(card, []), float(total))
+        logger.info("Данные обработаны по частям: %s карт", len(partials))
+    except KeyError as e:
+        logger.warning("Ошибка: отсутствует необходимый столбец в DataFrame: %s", e)
+        return [{}]
+
+    df_output = []
+    for card in sorted(partials):
+        total = math.fsum(partials[card])
+        df_output.append({"last_digits": card, "total_spent": total, "cashback": round(total / 100, 2)})
+    return df_output
+
+
+def top_transactions_chunked(chunks: Iterable[pd.DataFrame], top_n: int = TOP_N) -> list[dict[str, Any]] | None:
+    """Функция принимает на вход поток DataFrame (порции строк одного файла) и возвращает ТОП-N транзакций
+    по сумме платежа, как top_transactions. Из каждой порции в памяти остаются только top_n строк-кандидатов"""
+    candidates: pd.DataFrame | None = None
+    try:
+        for chunk in chunks:
+            top = top_n_indices(chunk["Сумма платежа"].to_numpy(dtype=float), top_n)
+            # Кандидаты хранятся в порядке строк файла, чтобы равные суммы упорядочивались как в top_transactions
+            chunk_top = chunk.iloc[np.sort(top)]
+            candidates = chunk_top if candidates is None else pd.concat([candidates, chunk_top])
+            keep = top_n_indices(candidates["Сумма платежа"].to_numpy(dtype=float), top_n)
+            candidates = candidates.iloc[np.sort(keep)]
+        logger.info("Данные обработаны по частям: ТОП-%s транзакций", top_n)
+    except KeyError as e:
+        logger.warning("Ошибка: отсутствует необходимый столбец в DataFrame: %s", e)
+        return None
+
+    if candidates is None:
+        return []
+    return top_records(candidates.iloc[top_n_indices(candidates["Сумма платежа"].to_numpy(dtype=float), top_n)])
+
+
+def _add_exact(partials: list[float], value: float) -> None:
+    """Функция добавляет число к точной сумме, хранящейся как список неперекрывающихся частичных сумм
+    (алгоритм Шевчука, как в math.fsum)"""
+    i = 0
+    for partial in partials:
+        if abs(value) < abs(partial):
+            value, partial = partial, value
+        high = value + partial
+        low = partial - (high - value)
+        if low:
+            partials[i] = low
+            i += 1
+        value = high
+    partials[i:] = [value]
+
+
 def format_date(input_format_date: str) -> str:
-    """Функция форматирует дату"""
-    date_update = dt.strptime(input_format_date, "%d.%m.%Y")
-    return date_update.strftime("%Y-%m-%d")
+    """Функция форматирует дату (дд.мм.гггг -> гггг-мм-дд). Для столбца дат используйте src.dates.parse_dates"""
+    return payment_date_to_iso(input_format_date)
@@ -1,12 +1,17 @@
-import json
-import logging
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
 
-import pandas as pd
 from dotenv import load_dotenv
 
-from src.utils import (cards_info, get_currency_rates, get_stock_prices, greetings, import_from_excel, start_month,
-                       top_transactions)
+from src.cache import ResponseCache, get_response_cache
+from src.fx import BASE_CURRENCY, foreign_rows, fx_days, load_fx_table, normalize_amounts, unconverted_records
+from src.log_setup import forward_logs, get_logger, process_log_queue
+from src.metrics import get_dashboard_metrics
+from src.serializer import to_json
+from src.store import clear_stores, get_store
+from src.utils import (MAX_CONCURRENT_REQUESTS, cards_info, get_currency_rates, get_stock_prices, greetings,
+                       load_user_settings, start_month, top_transactions)
 
 load_dotenv(".env")
 
@@ -17,10 +22,6 @@ API_KEY_FOR_STOCK = os.getenv("API_KEY_FOR_STOCK")
 # Получаем абсолютный путь до текущей директории
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
-# Создаем путь до файла логов относительно текущей директории
-rel_log_file_path = os.path.join(current_dir, "../logs/views.log")
-abs_log_file_path = os.path.abspath(rel_log_file_path)
-
 # Создаем путь до файла user_settings.json относительно текущей директории.
 rel_json_path = os.path.join(current_dir, "../user_settings.json")
 abs_json_path = os.path.abspath(rel_json_path)
@@ -29,52 +30,105 @@ abs_json_path = os.path.abspath(rel_json_path)
 rel_xlsx_path = os.path.join(current_dir, "../data/operations.xlsx")
 abs_xlsx_path = os.path.abspath(rel_xlsx_path)
 
-# Добавляем логгер, который записывает логи в файл.
-logger = logging.getLogger("views")
-logger.setLevel(logging.INFO)
-file_handler = logging.FileHandler(abs_log_file_path, "w", encoding="utf-8")
-file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s: %(message)s")
-file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
+# Добавляем логгер, который записывает логи в файл logs/views.log (через общую очередь записи логов)
+logger = get_logger("views")
 
 
 # Входящая дата
 input_datetime = "2018-02-16 12:01:58"
 
 
-def web_main(input_df: str) -> str:
-    """Функция принимает на вход DataFrame и возвращает json-файл"""
+def web_main(
+    input_df: str,
+    date_time: str | None = None,
+    json_file: str = abs_json_path,
+    include_metrics: bool = False,
+    compact: bool = False,
+) -> str:
+    """Функция принимает на вход путь до файла с транзакциями, дату (по умолчанию input_datetime)
+    и путь до json-файла с настройками пользователя и возвращает json-файл.
+    Время, число строк и байт каждого этапа добавляются к счетчикам get_dashboard_metrics();
+    при include_metrics=True замеры этапов этого запроса добавляются в ответ (ключ "metrics").
+    При compact=True json-ответ записывается в одну строку"""
+    return build_web_main(input_df, date_time, json_file, include_metrics, compact)[0]
+
+
+def build_web_main(
+    input_df: str,
+    date_time: str | None = None,
+    json_file: str = abs_json_path,
+    include_metrics: bool = False,
+    compact: bool = False,
+) -> tuple[str, bool]:
+    """Функция строит сводку web_main и возвращает json-ответ и признак того, что суммы всех транзакций
+    удалось пересчитать в базовую валюту (неполный ответ web_main_cached не сохраняет в кэш)"""
+
+    dashboard_datetime = date_time or input_datetime
+    metrics = get_dashboard_metrics()
+    stages: dict[str, dict[str, float]] = {}
 
     # Формируем приветствие
+    greetings_output = greetings(dashboard_datetime)
     logger.info("Приветствие сформировано")
-    greetings_output = greetings(input_datetime)
 
     # Получаем начало месяца
-    begin_month = start_month(input_datetime)
-
-    # Получаем DataFrame
-    df = import_from_excel(input_df)
-
-    # Отфильтровываем DataFrame по лимиту дат
+    begin_month = start_month(dashboard_datetime)
+
+    # Получаем индекс по дате операции из хранилища транзакций
+    with metrics.stage("load", stages) as stage:
+        date_index = get_store(input_df).date_index()
+        if date_index is None:
+            logger.warning("Не удалось загрузить транзакции: %s", input_df)
+            return to_json({}, compact), True
+        stage["rows"] = len(date_index)
+        stage["bytes"] = date_index.memory_usage()
+
+    # Отфильтровываем DataFrame по лимиту дат (бинарный поиск по индексу, порядок строк как в файле)
+    with metrics.stage("date_filter", stages) as stage:
+        filtered_df_to_date = date_index.between(begin_month, dashboard_datetime).sort_index()
+        stage["rows"] = len(filtered_df_to_date)
     logger.info("Входной DataFrame отфильтрован по лимиту дат")
-    df_date = pd.to_datetime(df["Дата операции"], format="%d.%m.%Y %H:%M:%S")
-    filtered_df_to_date = df[(begin_month <= df_date) & (df_date <= input_datetime)]
-
-    # Получаем требуемую информацию по картам (номер карты, общая сумма расходов, кэшбэк)
-    logger.info("Информация по банковским картам получена: последние 4 цифры карты, общая сумма расходов, кэшбэк")
-    cards_description = cards_info(filtered_df_to_date)
 
-    # Получаем информацию по ТОП-5 транзакциям по сумме платежа
-    logger.info("Информация по ТОП-5 транзакциям по сумме платежа получена")
-    top_five_transactions = top_transactions(filtered_df_to_date)
-
-    # Получаем информацию по курсам валют: USD, EUR
-    logger.info("Информация по курсам валют получена: USD, EUR")
-    currency_rates = get_currency_rates(abs_json_path)
-
-    # Получаем информацию по стоимости акций
-    logger.info("Информация по по стоимости акций получена")
-    stock_prices = get_stock_prices(abs_json_path)
+    # Запросы к внешним API выполняются в общем пуле потоков: курсы валют (USD, EUR) и стоимость акций
+    # запрашиваются параллельно с курсами на даты платежей и расчетом сводки по картам
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        currency_rates_future = executor.submit(timed_stage, "fx_fetch", stages, get_currency_rates, json_file)
+        stock_prices_future = executor.submit(
+            timed_stage, "stock_fetch", stages, get_stock_prices, json_file, date_time=date_time
+        )
+
+        # Пересчитываем суммы в базовую валюту пользователя (по умолчанию RUB) по курсу на дату платежа.
+        # Транзакции, для которых курса нет, в суммы по картам и ТОП-5 не попадают (суммы в разных валютах
+        # не складываются) и перечисляются в ответе в валюте платежа (ключ "unconverted_transactions")
+        with metrics.stage("fx_normalise", stages) as stage:
+            base_currency = load_user_settings(json_file).get("base_currency", BASE_CURRENCY)
+            fx_table = load_fx_table(fx_days(filtered_df_to_date, base_currency), executor=executor)
+            filtered_df_to_date = normalize_amounts(filtered_df_to_date, base_currency, fx_table)
+            unconverted = foreign_rows(filtered_df_to_date, base_currency)
+            unconverted_transactions = unconverted_records(filtered_df_to_date, base_currency)
+            if unconverted.any():
+                filtered_df_to_date = filtered_df_to_date[~unconverted]
+            stage["rows"] = len(filtered_df_to_date)
+        logger.info("Суммы транзакций пересчитаны в %s", base_currency)
+
+        # Получаем требуемую информацию по картам (номер карты, общая сумма расходов, кэшбэк)
+        with metrics.stage("cards", stages) as stage:
+            cards_description = cards_info(filtered_df_to_date)
+            stage["rows"] = len(filtered_df_to_date)
+        logger.info(
+            "Информация по банковским картам получена: последние 4 цифры карты, общая сумма расходов, кэшбэк"
+        )
+
+        # Получаем информацию по ТОП-5 транзакциям по сумме платежа
+        with metrics.stage("top_n", stages) as stage:
+            top_five_transactions = top_transactions(filtered_df_to_date)
+            stage["rows"] = len(filtered_df_to_date)
+        logger.info("Информация по ТОП-5 транзакциям по сумме платежа получена")
+
+        currency_rates = currency_rates_future.result()
+        logger.info("Информация по курсам валют получена: USD, EUR")
+        stock_prices = stock_prices_future.result()
+        logger.info("Информация по по стоимости акций получена")
 
     # Формируем список словарей с результатами
     result_list_dicts = {
@@ -84,11 +138,96 @@ def web_main(input_df: str) -> str:
         "currency_rates": currency_rates,
         "stock_prices": stock_prices,
     }
+    if unconverted_transactions:
+        result_list_dicts["unconverted_transactions"] = unconverted_transactions
 
     # Формируем json-ответ
+    with metrics.stage("serialise", stages) as stage:
+        json_output = to_json(result_list_dicts, compact)
+        stage["bytes"] = len(json_output.encode("utf-8"))
     logger.info("json-ответ создан успешно")
-    json_output = json.dumps(result_list_dicts, ensure_ascii=False, indent=4)
-    return json_output
+
+    if include_metrics:
+        result_list_dicts["metrics"] = stages
+        json_output = to_json(result_list_dicts, compact)
+    return json_output, not unconverted_transactions
+
+
+def web_main_cached(
+    input_df: str,
+    date_time: str | None = None,
+    json_file: str = abs_json_path,
+    cache: ResponseCache | None = None,
+    compact: bool = False,
+) -> str:
+    """Функция возвращает сводку web_main из кэша ответов (по умолчанию get_response_cache()).
+    Ключ кэша - версия данных хранилища, дата сводки и содержимое файла настроек пользователя, поэтому
+    изменение файла с транзакциями, выгрузка новых транзакций или изменение настроек дают новый ответ.
+    Ответ, в котором суммы части транзакций не пересчитаны в базовую валюту (не удалось получить курсы),
+    в кэш не сохраняется: курсы запрашиваются повторно через FX_FAILURE_TTL секунд, а не через время жизни ответа"""
+    cache = cache or get_response_cache()
+    data_version = get_store(input_df).data_version()
+    if data_version is None:
+        return web_main(input_df, date_time, json_file, compact=compact)
+
+    try:
+        with open(json_file, "r", encoding="utf-8") as file:
+            settings = file.read()
+    except OSError:
+        settings = None
+    key = cache.make_key(
+        os.path.abspath(input_df), data_version, date_time or input_datetime, json_file, settings, compact
+    )
+    complete_responses: set[str] = set()
+
+    def build() -> str:
+        json_output, complete = build_web_main(input_df, date_time, json_file, compact=compact)
+        if complete:
+            complete_responses.add(json_output)
+        return json_output
+
+    return cache.get_or_build(key, build, cacheable=complete_responses.__contains__)
+
+
+def timed_stage(name: str, stages: dict[str, dict[str, float]], func: Any, *args: Any, **kwargs: Any) -> Any:
+    """Функция выполняет func как этап name построения сводки. Число строк этапа - длина результата"""
+    with get_dashboard_metrics().stage(name, stages) as stage:
+        result = func(*args, **kwargs)
+        stage["rows"] = len(result)
+    return result
+
+
+def init_dashboard_worker(input_df: str, log_queue: Any) -> None:
+    """Функция подготавливает процесс-обработчик: хранилище транзакций читается из столбцового кэша
+    с отображением файлов в память (mmap), поэтому все процессы используют одну копию данных.
+    Хранилища, унаследованные от родительского процесса при fork, не используются.
+    Записи логов передаются в очередь log_queue, файлы логов пишет родительский процесс"""
+    forward_logs(log_queue)
+    clear_stores()
+    get_store(input_df, mmap=True).date_index()
+
+
+def build_dashboard(task: tuple[str, str, str]) -> str:
+    """Функция строит одну сводку в процессе-обработчике: (путь до транзакций, настройки пользователя, дата)"""
+    input_df, json_file, date_time = task
+    return web_main(input_df, date_time, json_file)
+
+
+def web_main_batch(
+    dashboard_requests: list[tuple[str, str]], input_df: str = abs_xlsx_path, max_workers: int | None = None
+) -> list[str]:
+    """Функция принимает на вход список запросов (путь до json-файла с настройками пользователя, дата)
+    и строит сводки web_main в пуле процессов. Результаты возвращаются в порядке запросов"""
+
+    # Столбцовый кэш и индекс строятся один раз до запуска пула: процессы-обработчики не читают xlsx
+    get_store(input_df).date_index()
+    logger.info("Запущено построение %s сводок в пуле процессов", len(dashboard_requests))
+
+    tasks = [(input_df, json_file, date_time) for json_file, date_time in dashboard_requests]
+    with process_log_queue() as log_queue, ProcessPoolExecutor(
+        max_workers=max_workers, initializer=init_dashboard_worker, initargs=(input_df, log_queue)
+    ) as executor:
+        return list(executor.map(build_dashboard, tasks))
 
 
 if __name__ == "__main__":
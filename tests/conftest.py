@@ -0,0 +1,29 @@
+from typing import Iterator
+
+import pytest
+
+from src.cache import get_provider_cache, get_response_cache
+from src.fx import failed_days
+from src.log_setup import set_log_dir
+
+
+@pytest.fixture(scope="session", autouse=True)
+def log_dir(tmp_path_factory: pytest.TempPathFactory) -> Iterator[str]:
+    """Фикстура направляет логи и тексты отчетов во временную папку, чтобы тесты не меняли файлы в logs/"""
+    path = str(tmp_path_factory.mktemp("logs"))
+    previous = set_log_dir(path)
+    yield path
+    set_log_dir(previous)
+
+
+@pytest.fixture(autouse=True)
+def clear_provider_cache() -> Iterator[None]:
+    """Фикстура очищает общие кэши ответов API и сводок и список недоступных дат курсов,
+    чтобы результаты одного теста не попадали в другой"""
+    get_provider_cache().clear()
+    get_response_cache().clear()
+    failed_days.clear()
+    yield
+    get_provider_cache().clear()
+    get_response_cache().clear()
+    failed_days.clear()
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.aggregates import SpendingAggregates
+from src.store import DateIndex
+
+# Создаем тестовый DataFrame для имитации данных из Excel
+test_df = pd.DataFrame({
+    "Дата операции": [
+        "15.11.2021 10:00:00", "01.12.2021 10:00:00", "15.12.2021 10:00:00", "10.01.2022 12:00:00",
+        "20.01.2022 12:00:00",
+    ],
+    "Номер карты": ["*7197", "*7197", np.nan, "*4556", "*7197"],
+    "Сумма платежа": [-100.0, -200.0, -300.0, -400.0, -500.0],
+    "Кэшбэк": [1.0, np.nan, 3.0, 4.0, 5.0],
+    "Категория": ["Транспорт", "Транспорт", "Транспорт", "Супермаркеты", "Транспорт"],
+})
+
+
+def test_aggregates_table() -> None:
+    """Функция тестирует построение таблиц трат по (категория, месяц, карта): в общей таблице карта и кэшбэк
+    могут отсутствовать, в таблице полных транзакций строки с пропусками не учитываются (как в отчете)"""
+    aggregates = SpendingAggregates.from_frame(test_df)
+    table = aggregates.table
+    assert table.loc[("Транспорт", "2021-12", "*7197"), "spend"] == -200.0
+    assert table.loc[("Транспорт", "2021-12", "*7197"), "cashback"] == 0.0
+    assert table.loc[("Транспорт", "2021-12", ""), "cashback"] == 3.0
+    assert table["count"].sum() == 5
+
+    complete_table = aggregates.complete_table
+    assert ("Транспорт", "2021-12", "*7197") not in complete_table.index
+    assert ("Транспорт", "2021-12", "") not in complete_table.index
+    assert complete_table["count"].sum() == 3
+
+
+def test_aggregates_skip_rows_without_amount_or_category() -> None:
+    """Функция тестирует, что транзакции без суммы платежа, категории или даты не попадают в таблицы"""
+    incomplete_df = test_df.assign(
+        **{"Сумма платежа": [np.nan, -200.0, -300.0, -400.0, -500.0]},
+        Категория=["Транспорт", np.nan, "Транспорт", "Супермаркеты", "Транспорт"],
+    )
+    incomplete_df.loc[4, "Дата операции"] = np.nan
+    table = SpendingAggregates.from_frame(incomplete_df).table
+    assert table["count"].sum() == 2
+    assert table["spend"].sum() == -700.0
+
+
+def test_aggregates_append_is_incremental() -> None:
+    """Функция тестирует, что инкрементальное обновление совпадает с построением с нуля"""
+    aggregates = SpendingAggregates.from_frame(test_df.iloc[:3])
+    aggregates.append(test_df.iloc[3:])
+    expected = SpendingAggregates.from_frame(test_df)
+    pd.testing.assert_frame_equal(aggregates.table, expected.table)
+    pd.testing.assert_frame_equal(aggregates.complete_table, expected.complete_table)
+
+    # Добавление строк только с уже известными ключами не меняет индекс таблицы
+    aggregates.append(test_df.iloc[4:])
+    assert aggregates.table.index.equals(expected.table.index)
+    assert aggregates.table.loc[("Транспорт", "2022-01", "*7197"), "spend"] == -1000.0
+
+
+def test_aggregates_months() -> None:
+    """Функция тестирует помесячные траты по категории"""
+    aggregates = SpendingAggregates.from_frame(test_df)
+    months = aggregates.months("Транспорт", "2021-12", "2022-01")
+    assert list(months.index) == ["2021-12", "2022-01"]
+    assert list(months["spend"]) == [-500.0, -500.0]
+    complete_months = aggregates.months("Транспорт", "2021-12", "2022-01", complete_rows=True)
+    assert list(complete_months.index) == ["2022-01"]
+    assert SpendingAggregates().months("Транспорт", "2021-12", "2022-01").empty
+
+
+@pytest.mark.parametrize(
+    "start, end, expected, expected_complete",
+    [
+        ("2021-11-01 00:00:00", "2022-01-31 00:00:00", (-1100.0, 4), (-600.0, 2)),
+        ("2021-11-20 00:00:00", "2022-01-15 00:00:00", (-500.0, 2), (0.0, 0)),
+        ("2021-12-10 00:00:00", "2021-12-20 00:00:00", (-300.0, 1), (0.0, 0)),
+        ("2021-12-01 00:00:00", "2022-01-31 00:00:00", (-1000.0, 3), (-500.0, 1)),
+        ("2022-02-01 00:00:00", "2021-12-20 00:00:00", (0.0, 0), (0.0, 0)),
+    ],
+)
+def test_aggregates_window_totals(
+    start: str, end: str, expected: tuple[float, int], expected_complete: tuple[float, int]
+) -> None:
+    """Функция тестирует итоги по категории за период с неполными крайними месяцами"""
+    aggregates = SpendingAggregates.from_frame(test_df)
+    for complete_rows, (expected_spend, expected_count) in [(False, expected), (True, expected_complete)]:
+        totals = aggregates.window_totals("Транспорт", start, end, DateIndex(test_df), complete_rows)
+        assert totals["spend"] == expected_spend
+        assert totals["count"] == expected_count
@@ -0,0 +1,93 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.batch import MISSING_DAY, TransactionBatch
+from src.services import build_transactions, investing
+from src.utils import cards_info, running_top_transactions, top_transactions, top_transactions_by
+
+# Создаем тестовый DataFrame для имитации данных из Excel
+test_df = pd.DataFrame({
+    "Дата платежа": ["15.01.2023", "20.01.2023", None, "25.01.2023", "05.02.2023", "06.02.2023"],
+    "Номер карты": ["*7197", "*4556", "*7197", np.nan, "*4556", "*7197"],
+    "Сумма платежа": [-1000.0, -160.89, -10.0, 1500.0, -2000.0, -64.5],
+    "Сумма операции с округлением": [1000.0, 160.89, 10.0, 1500.0, 2000.0, 64.5],
+    "Категория": ["Супермаркеты", "Фастфуд", "Супермаркеты", "Пополнения", np.nan, "Фастфуд"],
+    "Описание": ["Магнит", "KFC", "Магнит", "Перевод", "Перевод", "KFC"],
+})
+
+
+def test_batch_from_frame() -> None:
+    """Функция тестирует компактное представление транзакций"""
+    batch = TransactionBatch.from_frame(test_df)
+    assert len(batch) == 6
+    assert batch.payment_days.dtype == np.int32
+    assert batch.payment_days[2] == MISSING_DAY
+    assert list(batch.cards) == ["*7197", "*4556"]
+    assert batch.card_codes[3] == -1
+    assert batch.nbytes() == 6 * 32
+
+
+def test_batch_investing_matches_list() -> None:
+    """Функция тестирует, что investing дает одинаковый результат для списка словарей и TransactionBatch"""
+    batch = TransactionBatch.from_frame(test_df)
+    transactions = build_transactions(test_df)
+    for month in ["2023-01", "2023-02", "2023-03"]:
+        for limit in [10, 50, 100]:
+            expected = json.loads(str(investing(month, transactions, limit)))
+            assert json.loads(str(investing(month, batch, limit))) == expected
+
+
+def test_batch_investing_non_canonical_months() -> None:
+    """Функция тестирует, что для месяца не в формате гггг-мм investing дает одинаковый результат
+    для списка словарей и TransactionBatch (месяц ищется в дате платежа как подстрока)"""
+    batch = TransactionBatch.from_frame(test_df)
+    transactions = build_transactions(test_df)
+    for month in ["2023", "2023-01-2", "2023-1", "", "02-0", "2024"]:
+        expected = json.loads(str(investing(month, transactions, 10)))
+        result = json.loads(str(investing(month, batch, 10)))
+        assert result == expected
+        assert type(result["total_amount"]) is type(expected["total_amount"])
+
+
+def test_batch_cards_info_matches_frame() -> None:
+    """Функция тестирует, что cards_info дает одинаковый результат для DataFrame и TransactionBatch"""
+    assert cards_info(TransactionBatch.from_frame(test_df)) == cards_info(test_df)
+
+
+def test_batch_top_transactions_matches_frame() -> None:
+    """Функция тестирует, что top_transactions дает одинаковый результат для DataFrame и TransactionBatch"""
+    expected = top_transactions(test_df)
+    result = top_transactions(TransactionBatch.from_frame(test_df))
+    assert json.dumps(result, ensure_ascii=False) == json.dumps(expected, ensure_ascii=False)
+
+
+def test_batch_take() -> None:
+    """Функция тестирует выборку строк с общими словарями"""
+    batch = TransactionBatch.from_frame(test_df)
+    january = batch.take(slice(0, 4))
+    assert len(january) == 4
+    assert january.cards is batch.cards
+
+
+def test_top_transactions_by_card_and_category() -> None:
+    """Функция тестирует ТОП-N по картам и категориям для DataFrame и TransactionBatch"""
+    batch = TransactionBatch.from_frame(test_df)
+    by_card = top_transactions_by(test_df, "Номер карты", top_n=1)
+    assert by_card is not None
+    assert list(by_card) == ["*4556", "*7197"]
+    assert [top[0]["amount"] for top in by_card.values()] == [-160.89, -10.0]
+    assert top_transactions_by(batch, "Номер карты", top_n=1) == by_card
+
+    by_category = top_transactions_by(test_df, "Категория", top_n=2)
+    assert by_category is not None
+    assert [len(top) for top in by_category.values()] == [1, 2, 2]
+    assert top_transactions_by(batch, "Категория", top_n=2) == by_category
+
+
+def test_running_top_transactions_matches_batch_call() -> None:
+    """Функция тестирует, что потоковый ТОП-N совпадает с расчетом по всему DataFrame"""
+    chunks = [test_df.iloc[i:i + 2] for i in range(0, len(test_df), 2)]
+    assert running_top_transactions(chunks, top_n=3)[None] == top_transactions(test_df, top_n=3)
+    assert running_top_transactions(chunks, by="Номер карты", top_n=1) == top_transactions_by(test_df, top_n=1)
@@ -0,0 +1,39 @@
+from typing import Any
+
+import pandas as pd
+
+from benchmarks.run import find_regressions, parse_size, run_benchmarks
+from benchmarks.synthetic import generate_operations
+from src.readers import TRANSACTION_DTYPES
+
+
+def test_generate_operations_schema() -> None:
+    """Функция тестирует, что синтетические транзакции имеют структуру data/operations.xlsx и воспроизводимы"""
+    operations = generate_operations(500, seed=1)
+    assert len(operations) == 500
+    assert list(operations.columns) == list(TRANSACTION_DTYPES)
+    expected_dtypes = {name: pd.Series(dtype=dtype).dtype for name, dtype in TRANSACTION_DTYPES.items()}
+    assert operations.dtypes.to_dict() == expected_dtypes
+    dates = pd.to_datetime(operations["Дата операции"], format="%d.%m.%Y %H:%M:%S")
+    assert dates.is_monotonic_decreasing
+    pd.testing.assert_frame_equal(operations, generate_operations(500, seed=1))
+
+
+def test_run_benchmarks(tmp_path: Any) -> None:
+    """Функция тестирует замеры на небольшом наборе данных с заглушкой внешних API"""
+    records = run_benchmarks(["300"], ["cards_info", "web_main"], repeat=1, data_dir=str(tmp_path))
+    assert [record["benchmark"] for record in records] == ["cards_info", "web_main"]
+    assert all(record["rows"] == 300 and record["min_seconds"] > 0 for record in records)
+    assert parse_size("1m") == 1_000_000
+
+
+def test_find_regressions() -> None:
+    """Функция тестирует поиск ухудшений относительно предыдущего коммита"""
+    history = [
+        {"commit": "a", "benchmark": "cards_info", "size": "10k", "min_seconds": 1.0, "peak_mb": 10.0},
+        {"commit": "b", "benchmark": "cards_info", "size": "10k", "min_seconds": 9.0, "peak_mb": 90.0},
+    ]
+    record = {"commit": "b", "benchmark": "cards_info", "size": "10k", "min_seconds": 1.1, "peak_mb": 13.0}
+    regressions = find_regressions([record], history, threshold=0.2)
+    assert len(regressions) == 1
+    assert "peak_mb" in regressions[0]
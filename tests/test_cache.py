@@ -0,0 +1,106 @@
+from typing import Any, Callable
+
+from src.cache import LATEST, ProviderCache, ResponseCache
+
+
+class FakeClock:
+    """Управляемые часы для проверки времени жизни записей"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_latest_entry_expires() -> None:
+    """Функция тестирует, что данные "latest" устаревают через ttl секунд"""
+    clock = FakeClock()
+    cache = ProviderCache(ttl=60, clock=clock)
+    cache.set("exchangerate", "USD", LATEST, {"EUR": 0.9})
+
+    clock.now += 59
+    assert cache.get("exchangerate", "USD", LATEST) == {"EUR": 0.9}
+    clock.now += 2
+    assert cache.get("exchangerate", "USD", LATEST) is None
+
+
+def test_historical_entry_never_expires() -> None:
+    """Функция тестирует, что исторические данные не устаревают"""
+    clock = FakeClock()
+    cache = ProviderCache(ttl=60, clock=clock)
+    cache.set("marketstack", "AAPL", "2021-12-29", 189.68)
+
+    clock.now += 10**9
+    assert cache.get("marketstack", "AAPL", "2021-12-29") == 189.68
+
+
+def test_lru_eviction() -> None:
+    """Функция тестирует вытеснение давно не используемых записей"""
+    cache = ProviderCache(max_entries=2)
+    cache.set("marketstack", "AAPL", "2021-12-29", 1.0)
+    cache.set("marketstack", "AMZN", "2021-12-29", 2.0)
+    cache.get("marketstack", "AAPL", "2021-12-29")
+    cache.set("marketstack", "MSFT", "2021-12-29", 3.0)
+
+    assert len(cache) == 2
+    assert cache.get("marketstack", "AMZN", "2021-12-29") is None
+    assert cache.get("marketstack", "AAPL", "2021-12-29") == 1.0
+
+
+def test_sqlite_backing(tmp_path: Any) -> None:
+    """Функция тестирует, что записи из SQLite доступны новому экземпляру кэша"""
+    db_path = str(tmp_path / "provider_cache.sqlite")
+    ProviderCache(db_path=db_path).set("marketstack", "AAPL", "2021-12-29", 189.68)
+
+    cache = ProviderCache(db_path=db_path)
+    assert cache.get("marketstack", "AAPL", "2021-12-29") == 189.68
+
+    cache.clear()
+    assert ProviderCache(db_path=db_path).get("marketstack", "AAPL", "2021-12-29") is None
+
+
+def test_response_cache_expires() -> None:
+    """Функция тестирует кэш ответов: ответ берется из кэша, пока не устареет, затем строится заново"""
+    clock = FakeClock()
+    cache = ResponseCache(ttl=60, clock=clock)
+    builds: list[str] = []
+    key = cache.make_key("data-v1", "2021-12-29 22:32:24", {"user_currencies": ["USD"]})
+
+    def build(response: str) -> Callable[[], str]:
+        def build_response() -> str:
+            builds.append(response)
+            return response
+        return build_response
+
+    assert cache.get_or_build(key, build("first")) == "first"
+    clock.now += 59
+    assert cache.get_or_build(key, build("second")) == "first"
+    clock.now += 2
+    assert cache.get_or_build(key, build("third")) == "third"
+    assert builds == ["first", "third"]
+    assert key != cache.make_key("data-v2", "2021-12-29 22:32:24", {"user_currencies": ["USD"]})
+
+
+def test_response_cache_stale_while_revalidate() -> None:
+    """Функция тестирует режим stale-while-revalidate: устаревший ответ отдается сразу, новый строится в фоне"""
+    clock = FakeClock()
+    cache = ResponseCache(ttl=60, stale_ttl=600, stale_while_revalidate=True, clock=clock)
+    cache.get_or_build("key", lambda: "old")
+
+    clock.now += 61
+    assert cache.get_or_build("key", lambda: "new") == "old"
+    cache.join()
+    assert cache.get_or_build("key", lambda: "newer") == "new"
+
+    clock.now += 1000
+    assert cache.get_or_build("key", lambda: "newest") == "newest"
+
+
+def test_response_cache_skips_uncacheable() -> None:
+    """Функция тестирует, что ответ, для которого cacheable возвращает False, отдается, но не сохраняется в кэш"""
+    cache = ResponseCache(ttl=60, clock=FakeClock())
+    assert cache.get_or_build("key", lambda: "partial", cacheable=lambda value: value != "partial") == "partial"
+    assert len(cache) == 0
+    assert cache.get_or_build("key", lambda: "full", cacheable=lambda value: value != "partial") == "full"
+    assert cache.get_or_build("key", lambda: "newer") == "full"
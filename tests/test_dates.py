@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.dates import (OPERATION_DATE_FORMAT, PAYMENT_DATE_FORMAT, format_iso_dates, parse_dates, parse_input_datetime,
+                       payment_date_to_iso)
+
+
+def test_parse_dates_repeated_values_and_gaps() -> None:
+    """Функция тестирует разбор столбца дат с повторами и пропусками"""
+    values = pd.Series(["15.01.2023", None, "15.01.2023", "05.02.2023"])
+    parsed = parse_dates(values, PAYMENT_DATE_FORMAT, unit="D")
+    expected = np.array(["2023-01-15", "NaT", "2023-01-15", "2023-02-05"], dtype="datetime64[D]")
+    np.testing.assert_array_equal(parsed, expected)
+    assert format_iso_dates(parsed[[0, 3]]) == ["2023-01-15", "2023-02-05"]
+
+
+def test_parse_dates_matches_pandas() -> None:
+    """Функция тестирует, что разбор по различным значениям совпадает с pandas.to_datetime"""
+    values = pd.Series(["31.12.2021 16:44:00", "01.01.2018 12:49:53", "31.12.2021 16:44:00"])
+    expected = pd.to_datetime(values, format=OPERATION_DATE_FORMAT).to_numpy(dtype="datetime64[ns]")
+    np.testing.assert_array_equal(parse_dates(values, OPERATION_DATE_FORMAT), expected)
+
+
+def test_parse_dates_invalid_value() -> None:
+    """Функция тестирует ошибку для даты в неверном формате"""
+    with pytest.raises(ValueError):
+        parse_dates(pd.Series(["2023-01-15"]), PAYMENT_DATE_FORMAT)
+
+
+def test_cached_conversions() -> None:
+    """Функция тестирует кэширование разбора повторяющихся дат"""
+    parse_input_datetime.cache_clear()
+    parse_input_datetime("2021-12-29 22:32:24")
+    parse_input_datetime("2021-12-29 22:32:24")
+    assert parse_input_datetime.cache_info().hits == 1
+    assert payment_date_to_iso("29.12.2021") == "2021-12-29"
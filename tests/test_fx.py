@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pandas as pd
+import requests
+
+from src.fx import FxRateTable, foreign_rows, fx_days, load_fx_table, normalize_amounts, unconverted_records
+
+# Курсы за 1 USD на две даты
+test_rates = {
+    "2019-09-20": {"USD": 1.0, "RUB": 64.0, "CNY": 7.1, "EUR": 0.9},
+    "2019-04-01": {"USD": 1.0, "RUB": 65.0, "CNY": 6.5},
+}
+
+# Создаем тестовый DataFrame с платежами в разных валютах
+test_df = pd.DataFrame({
+    "Дата операции": ["01.10.2019 14:01:02", "30.09.2019 21:46:46", "02.04.2019 10:00:00", "01.03.2019 10:00:00"],
+    "Дата платежа": ["01.10.2019", "01.10.2019", np.nan, "01.03.2019"],
+    "Номер карты": ["*4556", "*4556", "*7197", "*7197"],
+    "Сумма платежа": [-13.67, -300.82, -10.0, -5.0],
+    "Валюта платежа": ["CNY", "RUB", "CNY", "GBP"],
+    "Сумма операции с округлением": [13.67, 300.82, 10.0, 5.0],
+})
+
+
+def test_fx_rate_table_rates() -> None:
+    """Функция тестирует поиск курса: курс на дату или на ближайшую более раннюю дату, базовая валюта - 1"""
+    table = FxRateTable.from_rates(test_rates)
+    days = np.array(["2019-10-01", "2019-04-01", "2019-01-01", "2019-10-01", "2019-10-01"], dtype="datetime64[D]")
+
+    result = table.rates(np.array(["CNY", "CNY", "CNY", "RUB", "GBP"], dtype=object), days, "RUB")
+
+    assert np.allclose(result[:4], [64.0 / 7.1, 65.0 / 6.5, 65.0 / 6.5, 1.0])
+    assert np.isnan(result[4])
+    assert len(table) == 2
+
+
+def test_normalize_amounts() -> None:
+    """Функция тестирует пересчет сумм в базовую валюту: дата платежа или дата операции, если даты платежа нет.
+    Суммы в валюте без курса остаются без изменений"""
+    result = normalize_amounts(test_df, "RUB", FxRateTable.from_rates(test_rates))
+
+    assert result["Сумма платежа"].tolist() == [round(-13.67 * 64.0 / 7.1, 2), -300.82, -100.0, -5.0]
+    assert result["Сумма операции с округлением"].tolist() == [round(13.67 * 64.0 / 7.1, 2), 300.82, 100.0, 5.0]
+    assert result["Валюта платежа"].tolist() == ["RUB", "RUB", "RUB", "GBP"]
+    assert test_df["Валюта платежа"].tolist() == ["CNY", "RUB", "CNY", "GBP"]
+
+
+def test_normalize_amounts_base_only() -> None:
+    """Функция тестирует, что DataFrame без платежей в другой валюте возвращается без копирования и запросов"""
+    rub_df = test_df.iloc[[1]]
+    with patch("src.fx.get_provider_client") as mock_client:
+        assert normalize_amounts(rub_df, "RUB") is rub_df
+    mock_client.assert_not_called()
+
+
+def test_load_fx_table_fetches_each_day_once() -> None:
+    """Функция тестирует загрузку курсов: одна дата - один запрос, повторная загрузка берет курсы из кэша"""
+    mock_response = Mock()
+    mock_response.json.return_value = {"conversion_rates": test_rates["2019-09-20"]}
+    with patch("src.fx.get_provider_client") as mock_client:
+        mock_client.return_value.get.return_value = mock_response
+        table = load_fx_table(["2019-10-01", "2019-10-01", "2019-04-02"])
+        load_fx_table(["2019-10-01"])
+
+    assert mock_client.return_value.get.call_count == 2
+    assert "/history/USD/2019/10/1" in mock_client.return_value.get.call_args_list[1].args[0]
+    assert table.days.tolist() == np.array(["2019-04-02", "2019-10-01"], dtype="datetime64[D]").tolist()
+
+
+def test_normalize_amounts_drop_unconverted() -> None:
+    """Функция тестирует исключение транзакций без курса: суммы в разных валютах не складываются"""
+    result = normalize_amounts(test_df, "RUB", FxRateTable.from_rates(test_rates), drop_unconverted=True)
+
+    assert result["Валюта платежа"].tolist() == ["RUB", "RUB", "RUB"]
+    assert result["Номер карты"].tolist() == ["*4556", "*4556", "*7197"]
+
+
+def test_unconverted_records() -> None:
+    """Функция тестирует список транзакций, суммы которых остались в валюте платежа"""
+    result = normalize_amounts(test_df, "RUB", FxRateTable.from_rates(test_rates))
+    result["Категория"] = ["Переводы", "Супермаркеты", "Транспорт", "Книги"]
+    result["Описание"] = ["Перевод", "Магнит", "Метро", "Book Shop"]
+
+    assert foreign_rows(result, "RUB").tolist() == [False, False, False, True]
+    assert unconverted_records(result, "RUB") == [
+        {"date": "01.03.2019", "amount": -5.0, "currency": "GBP", "category": "Книги", "description": "Book Shop"}
+    ]
+
+
+def test_fx_days() -> None:
+    """Функция тестирует даты, на которые нужны курсы: только платежи в другой валюте"""
+    assert fx_days(test_df, "RUB") == ["2019-03-01", "2019-04-02", "2019-10-01"]
+    assert fx_days(test_df.iloc[[1]], "RUB") == []
+
+
+def test_load_fx_table_in_executor() -> None:
+    """Функция тестирует загрузку курсов в переданном пуле потоков"""
+    mock_response = Mock()
+    mock_response.json.return_value = {"conversion_rates": test_rates["2019-09-20"]}
+    with patch("src.fx.get_provider_client") as mock_client, ThreadPoolExecutor(max_workers=2) as executor:
+        mock_client.return_value.get.return_value = mock_response
+        table = load_fx_table(["2019-10-01", "2019-04-02"], executor=executor)
+
+    assert len(table) == 2
+    assert mock_client.return_value.get.call_count == 2
+
+
+def test_load_fx_table_remembers_failures() -> None:
+    """Функция тестирует, что дата с неудачным запросом курсов некоторое время не запрашивается повторно"""
+    with patch("src.fx.get_provider_client") as mock_client:
+        mock_client.return_value.get.side_effect = requests.ConnectionError("нет соединения")
+        assert len(load_fx_table(["2019-10-01"])) == 0
+        assert len(load_fx_table(["2019-10-01"])) == 0
+
+    assert mock_client.return_value.get.call_count == 1
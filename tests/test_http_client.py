@@ -0,0 +1,135 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator
+
+import pytest
+import requests
+
+from src.http_client import CircuitBreaker, CircuitOpenError, ProviderClient, describe_error
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Локальный тестовый сервер: первые failures запросов отвечает ошибкой 503, затем 200"""
+
+    protocol_version = "HTTP/1.1"
+    failures = 0
+    requests_count = 0
+    connections: set[int] = set()
+
+    def do_GET(self) -> None:
+        FlakyHandler.requests_count += 1
+        FlakyHandler.connections.add(self.client_address[1])
+        status = 503 if FlakyHandler.requests_count <= FlakyHandler.failures else 200
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def flaky_server() -> Iterator[str]:
+    """Фикстура запускает локальный тестовый сервер и возвращает его адрес"""
+    FlakyHandler.failures = 0
+    FlakyHandler.requests_count = 0
+    FlakyHandler.connections = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_retries_with_backoff(flaky_server: str) -> None:
+    """Функция тестирует повторы с экспоненциальной задержкой"""
+    FlakyHandler.failures = 2
+    delays: list[float] = []
+    client = ProviderClient(retries=3, backoff=0.1, sleep=delays.append)
+
+    response = client.get(flaky_server)
+
+    assert response.json() == {"ok": True}
+    assert FlakyHandler.requests_count == 3
+    assert delays == [0.1, 0.2]
+
+
+def test_client_reuses_connection(flaky_server: str) -> None:
+    """Функция тестирует, что запросы идут через одно соединение из пула (keep-alive)"""
+    client = ProviderClient()
+    for _ in range(3):
+        client.get(flaky_server)
+    assert len(FlakyHandler.connections) == 1
+
+
+def test_client_gives_up_after_retries(flaky_server: str) -> None:
+    """Функция тестирует ошибку после исчерпания повторов"""
+    FlakyHandler.failures = 10
+    client = ProviderClient(retries=2, backoff=0, sleep=lambda delay: None)
+
+    with pytest.raises(requests.HTTPError):
+        client.get(flaky_server)
+    assert FlakyHandler.requests_count == 3
+
+
+def test_client_circuit_breaker_opens(flaky_server: str) -> None:
+    """Функция тестирует, что после серии ошибок предохранитель не пропускает запросы к провайдеру"""
+    FlakyHandler.failures = 10
+    client = ProviderClient(retries=0, failure_threshold=2, sleep=lambda delay: None)
+
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            client.get(flaky_server)
+    with pytest.raises(CircuitOpenError):
+        client.get(flaky_server)
+    assert FlakyHandler.requests_count == 2
+
+
+def test_client_timeout() -> None:
+    """Функция тестирует, что зависший провайдер не блокирует запрос дольше таймаута"""
+    # Сервер принимает соединение, но не обрабатывает запросы (serve_forever не запущен)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    client = ProviderClient(timeout=0.2, retries=0)
+    try:
+        with pytest.raises(requests.Timeout):
+            client.get(f"http://127.0.0.1:{server.server_address[1]}/")
+    finally:
+        server.server_close()
+
+
+def test_circuit_breaker_half_open() -> None:
+    """Функция тестирует пробный запрос после истечения времени размыкания"""
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 10.0
+    assert breaker.allow()
+    # Пока пробный запрос не завершен, остальные запросы отклоняются
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 20.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow()
+    assert breaker.failures == 0
+
+
+def test_describe_error_hides_url() -> None:
+    """Функция тестирует описание ошибки запроса без url и ключа API"""
+    request = requests.Request("GET", "https://api.example.com/v6/SECRET/latest/USD").prepare()
+    error = requests.ConnectionError("Max retries exceeded with url: /v6/SECRET/latest/USD", request=request)
+    assert describe_error(error) == "ConnectionError api.example.com"
+
+    response = requests.Response()
+    response.status_code = 503
+    response.url = "https://api.example.com/eod?access_key=SECRET"
+    assert describe_error(requests.HTTPError("Ответ 503", response=response)) == "HTTPError api.example.com 503"
+    assert describe_error(ValueError("SECRET")) == "ValueError"
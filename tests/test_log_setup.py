@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+from unittest.mock import patch
+
+from src.log_setup import (ReportStream, RoutingHandler, abs_log_dir, flush_logs, forward_logs, get_logger,
+                           process_log_queue, write_report)
+
+
+def make_record(name: str, message: str, **extra: Any) -> logging.LogRecord:
+    """Функция создает запись лога"""
+    record = logging.LogRecord(name, logging.WARNING, __file__, 1, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_routing_handler_writes_json(tmp_path: Any) -> None:
+    """Функция тестирует запись в файл логгера в формате json"""
+    handler = RoutingHandler(str(tmp_path))
+    handler.handle(make_record("utils", "Файл не найден: data.xlsx"))
+    handler.close()
+    with open(tmp_path / "utils.log", encoding="utf-8") as file:
+        entry = json.loads(file.readline())
+    assert entry["logger"] == "utils"
+    assert entry["level"] == "WARNING"
+    assert entry["message"] == "Файл не найден: data.xlsx"
+
+
+def test_routing_handler_reports_and_rotation(tmp_path: Any) -> None:
+    """Функция тестирует запись текстов отчетов как есть и ротацию файлов по размеру"""
+    report_path = str(tmp_path / "reports_log.txt")
+    with patch("src.log_setup.LOG_MAX_BYTES", 10):
+        handler = RoutingHandler(str(tmp_path))
+        handler.handle(make_record("reports_log", "[1]\n", log_file=report_path))
+        handler.handle(make_record("reports_log", "[2, 3]\n", log_file=report_path))
+        handler.close()
+    with open(report_path, encoding="utf-8") as file:
+        assert file.read() == "[2, 3]\n"
+    with open(report_path + ".1", encoding="utf-8") as file:
+        assert file.read() == "[1]\n"
+
+
+def test_routing_handler_splits_large_reports(tmp_path: Any) -> None:
+    """Функция тестирует, что большой отчет записывается частями и ротация проверяется на каждой части"""
+    report_path = str(tmp_path / "reports_log.txt")
+    with patch("src.log_setup.LOG_MAX_BYTES", 10), patch("src.log_setup.REPORT_CHUNK_CHARS", 8):
+        handler = RoutingHandler(str(tmp_path))
+        handler.handle(make_record("reports_log", "0123456789abcdef", log_file=report_path))
+        handler.close()
+    with open(report_path, encoding="utf-8") as file:
+        assert file.read() == "89abcdef"
+    with open(report_path + ".1", encoding="utf-8") as file:
+        assert file.read() == "01234567"
+
+
+def test_routing_handler_report_streams(tmp_path: Any) -> None:
+    """Функция тестирует, что части одновременных потоковых отчетов записываются в файл без перемешивания,
+    а отмененный отчет не записывается"""
+    report_path = str(tmp_path / "reports_log.txt")
+    handler = RoutingHandler(str(tmp_path))
+    for stream_id, text, end in [
+        ("a", "[1,", None), ("b", "[3,", None), ("c", "[5", None), ("a", "2]", None),
+        ("b", "4]", None), ("c", "", "discard"), ("b", "\n", "close"), ("a", "\n", "close"),
+    ]:
+        handler.handle(
+            make_record("reports_log", text, log_file=report_path, report_stream=stream_id, report_stream_end=end)
+        )
+    handler.close()
+    with open(report_path, encoding="utf-8") as file:
+        assert file.read() == "[3,4]\n[1,2]\n"
+
+
+def test_report_stream_writes_through_queue(log_dir: str) -> None:
+    """Функция тестирует запись потокового отчета через очередь записи логов"""
+    report_path = os.path.join(log_dir, "test_log_setup_stream.txt")
+    report = ReportStream(report_path)
+    report.write("[1,")
+    flush_logs()
+    assert not os.path.exists(report_path)
+    report.write("2]\n")
+    report.close()
+    flush_logs()
+    with open(report_path, encoding="utf-8") as file:
+        assert file.read() == "[1,2]\n"
+
+
+def test_get_logger_writes_through_queue(log_dir: str) -> None:
+    """Функция тестирует, что запись лога попадает в файл папки логов после flush_logs"""
+    logger = get_logger("test_log_setup")
+    logger.warning("Проверка %s", "очереди")
+    flush_logs()
+    with open(os.path.join(log_dir, "test_log_setup.log"), encoding="utf-8") as file:
+        assert json.loads(file.readlines()[-1])["message"] == "Проверка очереди"
+    assert not os.path.exists(os.path.join(abs_log_dir, "test_log_setup.log"))
+
+
+def test_reports_follow_log_dir(log_dir: str) -> None:
+    """Функция тестирует, что отчеты из папки logs/ записываются в заданную папку логов"""
+    write_report(os.path.join(abs_log_dir, "test_log_setup_report.txt"), "[1]\n")
+    flush_logs()
+    with open(os.path.join(log_dir, "test_log_setup_report.txt"), encoding="utf-8") as file:
+        assert file.read() == "[1]\n"
+    assert not os.path.exists(os.path.join(abs_log_dir, "test_log_setup_report.txt"))
+
+
+def log_in_worker(message: str) -> int:
+    """Функция записывает сообщение в лог процесса-обработчика и возвращает номер процесса"""
+    get_logger("test_log_setup_worker").warning(message)
+    return os.getpid()
+
+
+def test_worker_logs_are_written_by_parent(log_dir: str) -> None:
+    """Функция тестирует, что записи логов процессов-обработчиков записывает в файл родительский процесс"""
+    with process_log_queue() as log_queue, ProcessPoolExecutor(
+        max_workers=2, initializer=forward_logs, initargs=(log_queue,)
+    ) as executor:
+        worker_pids = set(executor.map(log_in_worker, [f"Запись {i}" for i in range(4)]))
+    flush_logs()
+    assert os.getpid() not in worker_pids
+    with open(os.path.join(log_dir, "test_log_setup_worker.log"), encoding="utf-8") as file:
+        messages = [json.loads(line)["message"] for line in file]
+    assert sorted(messages) == [f"Запись {i}" for i in range(4)]
@@ -0,0 +1,51 @@
+import json
+from typing import Callable
+
+import pytest
+
+from src.metrics import StageMetrics
+
+
+def fake_clock() -> Callable[[], float]:
+    """Функция возвращает часы, которые при каждом обращении сдвигаются на 0.5 с"""
+    ticks = iter(range(100))
+    return lambda: next(ticks) * 0.5
+
+
+def test_stage_records_time_rows_and_bytes() -> None:
+    """Функция тестирует замер этапа: время, строки, байты и запись в словарь запроса"""
+    metrics = StageMetrics("test", clock=fake_clock())
+    collector: dict[str, dict[str, float]] = {}
+    with metrics.stage("load", collector) as stage:
+        stage["rows"] = 10
+        stage["bytes"] = 80
+    with metrics.stage("load"):
+        pass
+
+    assert collector == {"load": {"rows": 10, "bytes": 80, "seconds": 0.5}}
+    assert metrics.snapshot()["load"] == {
+        "calls_total": 2, "seconds_total": 1.0, "seconds_last": 0.5, "rows_total": 10, "bytes_total": 80
+    }
+    assert json.loads(metrics.to_json())["load"]["calls_total"] == 2
+
+
+def test_stage_recorded_on_error() -> None:
+    """Функция тестирует, что этап учитывается, даже если блок завершился ошибкой"""
+    metrics = StageMetrics("test", clock=fake_clock())
+    with pytest.raises(ValueError):
+        with metrics.stage("fx_fetch"):
+            raise ValueError("нет ответа")
+    assert metrics.snapshot()["fx_fetch"]["calls_total"] == 1
+
+
+def test_to_prometheus() -> None:
+    """Функция тестирует вывод счетчиков в текстовом формате Prometheus"""
+    metrics = StageMetrics("dashboard", clock=fake_clock())
+    with metrics.stage("cards") as stage:
+        stage["rows"] = 3
+    text = metrics.to_prometheus()
+    assert "# TYPE dashboard_stage_seconds_total counter" in text
+    assert 'dashboard_stage_rows_total{stage="cards"} 3' in text
+    assert text.endswith("\n")
+    metrics.reset()
+    assert metrics.snapshot() == {}
@@ -0,0 +1,106 @@
+from datetime import date
+from typing import Any
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.quotes import QuoteStore
+
+# Цены закрытия по торговым дням (29-30.12.2021 и 03.01.2022, между ними выходные)
+test_prices = {
+    "AAPL": {"2021-12-29": 179.38, "2021-12-30": 178.2, "2022-01-03": 182.01},
+    "AMZN": {"2021-12-29": 3392.29, "2021-12-30": 3372.89, "2022-01-03": 3408.09},
+}
+
+
+class FakeStockClient:
+    """HTTP-клиент для тестов: отвечает ценами из test_prices за запрошенный период, по 2 записи на странице"""
+
+    def __init__(self) -> None:
+        self.requests: list[dict[str, str]] = []
+
+    def get(self, url: str, **kwargs: Any) -> Any:
+        params = {key: values[0] for key, values in parse_qs(urlparse(url).query).items()}
+        self.requests.append(params)
+        rows = [
+            {"symbol": symbol, "date": f"{day}T00:00:00+0000", "close": price}
+            for symbol in params["symbols"].split(",")
+            for day, price in test_prices.get(symbol, {}).items()
+            if params["date_from"] <= day <= params["date_to"]
+        ]
+        offset = int(params["offset"])
+        response = {"pagination": {"total": len(rows)}, "data": rows[offset:offset + 2]}
+        return type("Response", (), {"json": lambda self: response})()
+
+
+@pytest.fixture
+def client() -> Any:
+    """Фикстура подменяет HTTP-клиент API акций"""
+    fake_client = FakeStockClient()
+    with patch("src.quotes.get_provider_client", return_value=fake_client):
+        yield fake_client
+
+
+@pytest.fixture
+def store(tmp_path: Any) -> QuoteStore:
+    """Фикстура создает хранилище цен во временной папке; сегодня - 10.01.2022"""
+    return QuoteStore(str(tmp_path / "quotes.sqlite"), today=lambda: date(2022, 1, 10))
+
+
+def test_backfill_fetches_only_missing_ranges(store: QuoteStore, client: FakeStockClient) -> None:
+    """Функция тестирует загрузку периодов: загруженные даты повторно не запрашиваются"""
+    assert store.backfill(["AAPL", "AMZN"], "2021-12-29", "2021-12-31") == 4
+    assert len(client.requests) == 2  # 4 записи по 2 на странице
+    assert store.backfill(["AAPL", "AMZN"], "2021-12-29", "2021-12-31") == 0
+    assert len(client.requests) == 2
+
+    store.backfill(["AAPL", "AMZN"], "2021-12-28", "2022-01-03")
+    assert store.missing_ranges("AAPL", "2021-12-28", "2022-01-03") == []
+    assert [(request["date_from"], request["date_to"]) for request in client.requests[2:]] == [
+        ("2021-12-28", "2021-12-28"),
+        ("2022-01-01", "2022-01-03"),
+    ]
+
+
+def test_missing_ranges_not_marked_today(store: QuoteStore, client: FakeStockClient) -> None:
+    """Функция тестирует, что сегодняшний день не отмечается загруженным (цена закрытия еще может измениться)"""
+    store.backfill(["AAPL"], "2022-01-08", "2022-01-20")
+
+    assert client.requests[0]["date_to"] == "2022-01-10"
+    assert store.missing_ranges("AAPL", "2022-01-01", "2022-01-10") == [
+        ("2022-01-01", "2022-01-07"),
+        ("2022-01-10", "2022-01-10"),
+    ]
+
+
+def test_series(store: QuoteStore, client: FakeStockClient) -> None:
+    """Функция тестирует выдачу цен за период: строка - дата, столбец - тикер"""
+    result = store.series(["AMZN", "AAPL", "MSFT"], "2021-12-30", "2022-01-03")
+
+    assert list(result.columns) == ["AMZN", "AAPL", "MSFT"]
+    assert result.index.tolist() == [pd.Timestamp("2021-12-30"), pd.Timestamp("2022-01-03")]
+    assert result["AAPL"].tolist() == [178.2, 182.01]
+    assert result["MSFT"].isna().all()
+
+
+def test_as_of(store: QuoteStore, client: FakeStockClient) -> None:
+    """Функция тестирует цены на даты: в выходные берется последняя цена до даты, не старше lookback_days"""
+    dates = ["2022-01-01", "2021-12-29", "2022-01-03", "2021-12-20"]
+    result = store.as_of(["AAPL", "AMZN"], dates, lookback_days=3)
+
+    assert result.index.tolist() == [pd.Timestamp(day) for day in sorted(dates)]
+    assert np.allclose(result["AAPL"].tolist()[1:], [179.38, 178.2, 182.01])
+    assert np.isnan(result.loc["2021-12-20", "AAPL"])
+    assert result.loc["2022-01-01", "AMZN"] == 3372.89
+
+
+def test_backfill_error_not_marked(store: QuoteStore) -> None:
+    """Функция тестирует, что период не отмечается загруженным, если получить цены не удалось"""
+    with patch("src.quotes.get_provider_client") as mock_client:
+        mock_client.return_value.get.return_value.json.return_value = {"error": {"code": "invalid_access_key"}}
+        assert store.backfill(["AAPL"], "2021-12-29", "2021-12-30") == 0
+
+    assert store.missing_ranges("AAPL", "2021-12-29", "2021-12-30") == [("2021-12-29", "2021-12-30")]
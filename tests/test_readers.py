@@ -0,0 +1,104 @@
+import importlib.util
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.readers import iter_transactions, read_transactions
+
+# Создаем тестовый DataFrame для имитации выгрузки
+test_df = pd.DataFrame({
+    "Дата операции": ["01.12.2021 10:00:00", "15.12.2021 10:00:00"],
+    "Дата платежа": ["01.12.2021", np.nan],
+    "Номер карты": ["*7197", np.nan],
+    "Сумма платежа": [-100.5, 200.0],
+    "Категория": ["Транспорт", "Супермаркеты"],
+    "Бонусы (включая кэшбэк)": pd.array([1, 0], dtype="Int64"),
+})
+
+
+def test_read_transactions_csv(tmp_path: Any) -> None:
+    """Функция тестирует чтение csv с заданными типами столбцов"""
+    csv_path = tmp_path / "operations.csv"
+    test_df.to_csv(csv_path, index=False)
+    result = read_transactions(str(csv_path))
+    pd.testing.assert_frame_equal(result, test_df)
+
+
+def test_read_transactions_csv_blank_integers(tmp_path: Any) -> None:
+    """Функция тестирует чтение пустых ячеек в целых столбцах: пропуск вместо ошибки"""
+    csv_path = tmp_path / "operations.csv"
+    csv_path.write_text("Сумма платежа,Бонусы (включая кэшбэк),Округление на инвесткопилку\n-10.5,,\n-3.0,1,0\n")
+    result = read_transactions(str(csv_path))
+    assert result is not None
+    assert result["Бонусы (включая кэшбэк)"].tolist() == [pd.NA, 1]
+    assert result["Округление на инвесткопилку"].dtype == "Int64"
+
+
+def test_read_transactions_csv_columns(tmp_path: Any) -> None:
+    """Функция тестирует чтение только нужных столбцов"""
+    csv_path = tmp_path / "operations.csv"
+    test_df.to_csv(csv_path, index=False)
+    result = read_transactions(str(csv_path), ["Дата платежа", "Сумма платежа"])
+    assert result is not None
+    assert list(result.columns) == ["Дата платежа", "Сумма платежа"]
+    assert result["Сумма платежа"].dtype == np.float64
+
+
+@patch("pandas.read_excel")
+def test_read_transactions_xlsx(mock_read_excel: Any) -> None:
+    """Функция тестирует, что файлы xlsx читаются через read_excel с типами и списком столбцов"""
+    mock_read_excel.return_value = test_df
+    result = read_transactions("operations.xlsx", ["Сумма платежа"])
+    assert result is test_df
+    assert mock_read_excel.call_args.kwargs["usecols"] == ["Сумма платежа"]
+    assert mock_read_excel.call_args.kwargs["dtype"] == {"Сумма платежа": "float64"}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5])
+def test_iter_transactions_csv(chunk_size: int, tmp_path: Any) -> None:
+    """Функция тестирует чтение csv по частям со сквозным индексом строк"""
+    csv_path = tmp_path / "operations.csv"
+    test_df.to_csv(csv_path, index=False)
+    chunks = list(iter_transactions(str(csv_path), chunk_size=chunk_size))
+    assert all(len(chunk) <= chunk_size for chunk in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks), test_df)
+
+
+def test_iter_transactions_missing_file(tmp_path: Any) -> None:
+    """Функция тестирует чтение по частям несуществующего файла"""
+    assert list(iter_transactions(str(tmp_path / "missing.xlsx"))) == []
+
+
+def test_read_transactions_missing_file(tmp_path: Any) -> None:
+    """Функция тестирует чтение несуществующего файла"""
+    assert read_transactions(str(tmp_path / "missing.csv")) is None
+
+
+@pytest.mark.skipif(importlib.util.find_spec("pyarrow") is None, reason="pyarrow не установлен")
+@pytest.mark.parametrize("extension", [".parquet", ".feather"])
+def test_read_transactions_columnar(extension: str, tmp_path: Any) -> None:
+    """Функция тестирует чтение parquet и feather"""
+    path = str(tmp_path / f"operations{extension}")
+    getattr(test_df, "to_parquet" if extension == ".parquet" else "to_feather")(path)
+    pd.testing.assert_frame_equal(read_transactions(path), test_df)
+    projected = read_transactions(path, ["Категория"])
+    assert projected is not None
+    assert list(projected.columns) == ["Категория"]
+
+
+@pytest.mark.skipif(importlib.util.find_spec("pyarrow") is None, reason="pyarrow не установлен")
+@pytest.mark.parametrize("extension", [".parquet", ".feather"])
+@pytest.mark.parametrize("chunk_size", [1, 2, 5])
+def test_iter_transactions_columnar(extension: str, chunk_size: int, tmp_path: Any) -> None:
+    """Функция тестирует чтение parquet и feather по частям (iter_parquet_file, iter_feather_file):
+    после записи и чтения по частям получается тот же DataFrame со сквозным индексом строк"""
+    path = str(tmp_path / f"operations{extension}")
+    getattr(test_df, "to_parquet" if extension == ".parquet" else "to_feather")(path)
+    chunks = list(iter_transactions(path, chunk_size=chunk_size))
+    assert all(len(chunk) <= chunk_size for chunk in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks), test_df)
+    projected = pd.concat(iter_transactions(path, ["Категория", "Сумма платежа"], chunk_size=chunk_size))
+    pd.testing.assert_frame_equal(projected, test_df[["Категория", "Сумма платежа"]])
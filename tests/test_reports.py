@@ -1,13 +1,17 @@
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime as dt
-from typing import Any
+from typing import Any, Iterator
 from unittest.mock import patch
 
 import pandas as pd
+import pytest
 from dateutil.relativedelta import relativedelta as rdt
 
-from src.reports import log
+from src.log_setup import flush_logs
+from src.reports import (log, spending_by_category, spending_by_category_chunked, spending_by_category_totals,
+                         stream_spending_by_category, stream_spending_by_category_chunked)
 
 # Получаем абсолютный путь до текущей директории
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -66,3 +70,131 @@ def test_log_file() -> Any:
         with patch("builtins.open") as mocked_file:
             mocked_file.assert_called_once_with(reports_log, "w")
         return json_output
+
+
+# Создаем тестовый DataFrame для имитации данных из Excel
+test_df = pd.DataFrame({
+    "Дата операции": ["20.12.2021 10:00:00", "15.12.2021 10:00:00", "01.12.2021 10:00:00", "10.11.2021 10:00:00"],
+    "Сумма платежа": [-100.0, -200.0, -300.0, -400.0],
+    "Кэшбэк": [1.0, 2.0, 3.0, 4.0],
+    "Категория": ["Транспорт", "Супермаркеты", "Транспорт", "Транспорт"],
+})
+
+
+def test_stream_spending_by_category_matches_json() -> None:
+    """Функция тестирует, что потоковый отчет совпадает с обычным json-ответом"""
+    expected = spending_by_category(test_df, "Транспорт", "2021-12-29 22:32:24")
+    chunks = list(stream_spending_by_category(test_df, "Транспорт", "2021-12-29 22:32:24", chunk_size=2))
+    assert len(chunks) == 4
+    assert "".join(chunks) == expected
+    assert "".join(stream_spending_by_category(test_df, "Такси", "2021-12-29 22:32:24")) == "[]"
+
+
+def test_spending_by_category_default_date() -> None:
+    """Функция тестирует, что дата отчета по умолчанию - текущая дата на момент вызова, а не загрузки модуля"""
+    expected = spending_by_category(test_df, "Транспорт", "2021-12-29 22:32:24")
+    with patch("src.reports.dt") as mock_dt:
+        mock_dt.now.return_value = dt(2021, 12, 29, 22, 32, 24)
+        assert spending_by_category(test_df, "Транспорт") == expected
+        mock_dt.now.return_value = dt(2030, 1, 1)
+        assert spending_by_category(test_df, "Транспорт") == "[]"
+
+
+def test_spending_by_category_compact() -> None:
+    """Функция тестирует компактный json-ответ: те же транзакции в одной строке, даты - гггг-мм-дд чч:мм:сс"""
+    expected = spending_by_category(test_df, "Транспорт", "2021-12-29 22:32:24")
+    result = spending_by_category(test_df, "Транспорт", "2021-12-29 22:32:24", compact=True)
+    assert "\n" not in result
+    assert json.loads(result) == json.loads(expected)
+    assert json.loads(result)[0]["Дата операции"] == "2021-12-20 10:00:00"
+
+
+def test_stream_spending_by_category_ndjson() -> None:
+    """Функция тестирует потоковый отчет в формате NDJSON"""
+    lines = list(stream_spending_by_category(test_df, "Транспорт", "2021-12-29 22:32:24", ndjson=True))
+    assert [json.loads(line)["Сумма платежа"] for line in lines] == [-100.0, -300.0, -400.0]
+    assert all(line.endswith("\n") for line in lines)
+
+
+def test_spending_by_category_chunked_matches_json() -> None:
+    """Функция тестирует, что отчет по частям строк совпадает с отчетом по всему DataFrame"""
+    for category in ["Транспорт", "Такси"]:
+        expected = spending_by_category(test_df, category, "2021-12-29 22:32:24")
+        chunks = [test_df.iloc[start:start + 3] for start in range(0, len(test_df), 3)]
+        assert spending_by_category_chunked(iter(chunks), category, "2021-12-29 22:32:24") == expected
+        assert "".join(stream_spending_by_category_chunked(iter(chunks), category, "2021-12-29 22:32:24")) == expected
+
+
+def test_spending_by_category_totals_match_report() -> None:
+    """Функция тестирует, что итоги по таблице трат совпадают с отчетом: транзакции с пропусками не учитываются"""
+    months_df = pd.DataFrame({
+        "Дата операции": [
+            "20.12.2021 10:00:00", "15.10.2021 10:00:00", "01.09.2021 10:00:00", "10.08.2021 10:00:00",
+            "05.07.2021 10:00:00",
+        ],
+        "Номер карты": ["*7197", "*7197", "*4556", "*7197", "*7197"],
+        "Сумма платежа": [-100.0, -200.0, -300.0, -400.0, -500.0],
+        "Кэшбэк": [1.0, None, 3.0, 4.0, None],
+        "Категория": ["Транспорт", "Транспорт", "Транспорт", "Супермаркеты", "Транспорт"],
+    })
+    report = json.loads(spending_by_category(months_df, "Транспорт", "2021-12-29 22:32:24"))
+    totals = json.loads(spending_by_category_totals(months_df, "Транспорт", "2021-12-29 22:32:24"))
+    assert totals["count"] == len(report) == 2
+    assert totals["total_amount"] == abs(sum(row["Сумма платежа"] for row in report)) == 400.0
+    assert totals["cashback"] == 4.0
+
+
+def test_log_tees_stream(tmp_path: Any) -> None:
+    """Функция тестирует, что декоратор записывает потоковый отчет в файл по мере выдачи частей"""
+    log_path = str(tmp_path / "reports_log.txt")
+
+    @log(filename=log_path)
+    def stream_report() -> Iterator[str]:
+        yield "["
+        yield "1"
+        yield "]"
+
+    stream = stream_report()
+    assert next(stream) == "["
+    assert list(stream) == ["1", "]"]
+    flush_logs()
+    with open(log_path, encoding="utf-8") as file:
+        assert file.read() == "[1]\n"
+
+
+def test_log_skips_unfinished_stream(tmp_path: Any) -> None:
+    """Функция тестирует, что незавершенный потоковый отчет не записывается в файл,
+    а отчет с ошибкой записывается вместе с текстом ошибки"""
+    log_path = str(tmp_path / "reports_log.txt")
+
+    @log(filename=log_path)
+    def stream_report(fail: bool) -> Iterator[str]:
+        yield "["
+        if fail:
+            raise ValueError("нет данных")
+        yield "]"
+
+    stream = stream_report(False)
+    assert next(stream) == "["
+    stream.close()
+    with pytest.raises(ValueError):
+        list(stream_report(True))
+    flush_logs()
+    with open(log_path, encoding="utf-8") as file:
+        assert file.read() == "[my_function error: нет данных. Input:(True,), {}"
+
+
+def test_log_appends(tmp_path: Any) -> None:
+    """Функция тестирует, что декоратор дописывает отчеты в конец файла, а не перезаписывает его"""
+    log_path = str(tmp_path / "reports_log.txt")
+
+    @log(filename=log_path)
+    def report(value: int) -> str:
+        return json.dumps({"value": value})
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(report, range(20)))
+    flush_logs()
+    with open(log_path, encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    assert sorted(json.loads(line)["value"] for line in lines) == list(range(20))
@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.serializer import JSON_INDENT, SERIALIZERS, to_json
+
+# Данные с типами numpy и pandas, которые возвращает DataFrame.to_dict("records")
+test_data = [
+    {
+        "Дата операции": pd.Timestamp("2021-12-29 22:32:24"),
+        "Номер карты": "*7197",
+        "Сумма платежа": np.float64(-160.89),
+        "Бонусы (включая кэшбэк)": np.int64(3),
+        "Описание": "Колхоз  \tмагазин\n«Пятерочка»",
+        "Даты": np.array(["2021-12-01", "2021-12-02"], dtype="datetime64[D]"),
+        "Пропуск": pd.NaT,
+    },
+    {"Вложенный": {"список": [1, [2, {"три": 3}]], "пусто": [], "пустой словарь": {}}},
+    {"Числа": [1e16, -1.2345678901234568e17, 1e-05, 1.5e-07, 0.0001, 1e15, np.float64(2.5e300)]},
+    {"Пропуски": [np.nan, np.float64(np.inf), float("-inf"), np.array([1.0, np.nan])], "Строка": "1e5  0.00001"},
+]
+
+expected_data = [
+    {
+        "Дата операции": "2021-12-29 22:32:24",
+        "Номер карты": "*7197",
+        "Сумма платежа": -160.89,
+        "Бонусы (включая кэшбэк)": 3,
+        "Описание": "Колхоз  \tмагазин\n«Пятерочка»",
+        "Даты": ["2021-12-01", "2021-12-02"],
+        "Пропуск": None,
+    },
+    {"Вложенный": {"список": [1, [2, {"три": 3}]], "пусто": [], "пустой словарь": {}}},
+    {"Числа": [1e16, -1.2345678901234568e17, 1e-05, 1.5e-07, 0.0001, 1e15, 2.5e300]},
+    {"Пропуски": [None, None, None, [1.0, None]], "Строка": "1e5  0.00001"},
+]
+
+
+@pytest.mark.parametrize("serializer", list(SERIALIZERS))
+@pytest.mark.parametrize("compact", [False, True])
+def test_to_json(serializer: str, compact: bool) -> None:
+    """Функция тестирует, что все сериализаторы дают одинаковые значения (NaN и бесконечности - null),
+    а стандартный модуль json - тот же ответ, что и json.dumps"""
+    result = to_json(test_data, compact, serializer)
+
+    assert json.loads(result) == expected_data
+    assert ("\n" not in result) == compact
+    if serializer == "json" and compact:
+        assert result == json.dumps(expected_data, ensure_ascii=False, separators=(",", ":"))
+    elif serializer == "json":
+        assert result == json.dumps(expected_data, ensure_ascii=False, indent=JSON_INDENT)
+
+
+@pytest.mark.parametrize("serializer", list(SERIALIZERS))
+@pytest.mark.parametrize("compact", [False, True])
+def test_to_json_without_special_numbers(serializer: str, compact: bool) -> None:
+    """Функция тестирует, что без чисел с показателем степени все сериализаторы дают тот же ответ, что и json.dumps,
+    в том числе отступ для строк с пробелами и табуляциями внутри значений"""
+    spaces = {"  ключ  ": "  значение\t  с  пробелами  ", "уровень": [{"а": [[]]}]}
+    data = [test_data[0], test_data[1], spaces]
+    expected = [expected_data[0], expected_data[1], spaces]
+    if compact:
+        assert to_json(data, True, serializer) == json.dumps(expected, ensure_ascii=False, separators=(",", ":"))
+    else:
+        assert to_json(data, False, serializer) == json.dumps(expected, ensure_ascii=False, indent=JSON_INDENT)
+
+
+def test_to_json_unknown_serializer() -> None:
+    """Функция тестирует, что при недоступном сериализаторе используется стандартный модуль json"""
+    assert to_json({"a": np.int64(1)}, serializer="ujson") == '{\n  "a": 1\n}'
+
+
+def test_to_json_unsupported_type() -> None:
+    """Функция тестирует ошибку для объектов, которые нельзя сериализовать"""
+    with pytest.raises(TypeError):
+        to_json({"a": object()}, serializer="json")
+
+
+def test_to_json_dates() -> None:
+    """Функция тестирует формат дат: дата - гггг-мм-дд, дата и время - гггг-мм-дд чч:мм:сс"""
+    values = [pd.Timestamp("2021-12-29").date(), np.datetime64("2021-12-29T10:00:00")]
+    assert json.loads(to_json(values)) == ["2021-12-29", "2021-12-29 10:00:00"]
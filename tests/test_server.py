@@ -0,0 +1,126 @@
+import asyncio
+import http.client
+import json
+import os
+import threading
+from typing import Any, Iterator
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+from src.reports import spending_by_category
+from src.server import DashboardService
+from src.services import get_transactions, investing
+from src.store import get_store
+from src.views import web_main
+
+# Получаем абсолютный путь до текущей директории
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Создаем путь до файла operations.xlsx относительно текущей директории
+rel_xlsx_path = os.path.join(current_dir, "../data/operations.xlsx")
+abs_xlsx_path = os.path.abspath(rel_xlsx_path)
+
+
+@pytest.fixture(scope="module")
+def settings_path(tmp_path_factory: Any) -> str:
+    """Фикстура создает файл настроек без валют и акций (без запросов к внешним API)"""
+    path = tmp_path_factory.mktemp("server") / "user_settings.json"
+    path.write_text(json.dumps({"user_currencies": [], "user_stocks": []}))
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def base_url(settings_path: str) -> Iterator[str]:
+    """Фикстура запускает сервис на свободном порту в отдельном потоке и останавливает его после тестов"""
+    loop = asyncio.new_event_loop()
+    service = DashboardService(abs_xlsx_path, settings_path)
+    server = loop.run_until_complete(service.start("127.0.0.1", 0))
+    port = server.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{port}"
+    loop.call_soon_threadsafe(server.close)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_dashboard(base_url: str, settings_path: str) -> None:
+    """Функция тестирует сводку: ответ совпадает с web_main на ту же дату"""
+    response = requests.get(f"{base_url}/dashboard", params={"input_datetime": "2021-12-29 22:32:24"})
+
+    assert response.status_code == 200
+    assert response.text == web_main(abs_xlsx_path, "2021-12-29 22:32:24", settings_path)
+    assert response.json()["greeting"] == "Добрый вечер"
+
+
+def test_spending_and_investing(base_url: str) -> None:
+    """Функция тестирует отчет по категории и «Инвесткопилку»: ответы совпадают с прямым вызовом функций"""
+    with requests.Session() as session:
+        spending_params = {"category": "Супермаркеты", "input_datetime": "2021-12-29 22:32:24"}
+        spending = session.get(f"{base_url}/reports/spending", params=spending_params)
+        invest = session.get(f"{base_url}/services/investing", params={"month": "2021-12", "limit": "50"})
+
+    frame = get_store(abs_xlsx_path).load()
+    assert spending.status_code == 200
+    assert spending.text == spending_by_category(frame, "Супермаркеты", "2021-12-29 22:32:24")
+    assert invest.status_code == 200
+    assert invest.text == str(investing("2021-12", get_transactions(abs_xlsx_path), 50))
+
+
+@pytest.mark.parametrize(
+    "path, params, status",
+    [
+        ("/dashboard", {"input_datetime": "29.12.2021"}, 400),
+        ("/reports/spending", {}, 400),
+        ("/services/investing", {"month": "2021-12", "limit": "abc"}, 400),
+        ("/services/investing", {"month": "2021", "limit": "50"}, 400),
+        ("/services/investing", {"month": "2021-12-3", "limit": "50"}, 400),
+        ("/services/investing", {"month": "2021-13", "limit": "50"}, 400),
+        ("/unknown", {}, 404),
+    ],
+)
+def test_bad_requests(base_url: str, path: str, params: dict[str, str], status: int) -> None:
+    """Функция тестирует ответы на неверные запросы"""
+    response = requests.get(f"{base_url}{path}", params=params)
+
+    assert response.status_code == status
+    assert "error" in response.json()
+
+
+def test_metrics(base_url: str) -> None:
+    """Функция тестирует выдачу счетчиков этапов сводки"""
+    requests.get(f"{base_url}/dashboard", params={"input_datetime": "2021-12-29 22:32:24"})
+
+    response = requests.get(f"{base_url}/metrics")
+
+    assert response.status_code == 200
+    assert 'dashboard_stage_calls_total{stage="load"}' in response.text
+
+
+def test_settings_parameter_ignored(base_url: str, tmp_path: Any) -> None:
+    """Функция тестирует, что путь до файла настроек нельзя задать в запросе"""
+    settings_path = tmp_path / "settings.json"
+    response = requests.get(f"{base_url}/dashboard", params={"settings": str(settings_path)})
+
+    assert response.status_code == 200
+    assert not settings_path.exists()
+
+
+def test_keep_alive_with_body(base_url: str) -> None:
+    """Функция тестирует, что тело запроса читается из потока и следующий запрос в том же соединении обработан"""
+    connection = http.client.HTTPConnection(urlsplit(base_url).netloc)
+    try:
+        connection.request("GET", "/health", body="GET /unknown HTTP/1.1\r\n\r\n")
+        first = connection.getresponse()
+        assert first.status == 200
+        first.read()
+
+        connection.request("GET", "/health")
+        second = connection.getresponse()
+        assert second.status == 200
+        assert json.loads(second.read()) == {"status": "ok"}
+    finally:
+        connection.close()
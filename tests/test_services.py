@@ -1,7 +1,13 @@
 import json
 import unittest
+from unittest.mock import patch
 
-from src.services import investing
+import numpy as np
+import pandas as pd
+
+from src.batch import TransactionBatch
+from src.services import (build_transactions, get_transactions, investing, investing_arrays, investing_chunked,
+                          investing_matrix)
 
 
 class TestInvestingFunction(unittest.TestCase):
@@ -60,5 +66,112 @@ class TestInvestingFunction(unittest.TestCase):
         self.assertEqual(json.loads(result), expected_result)
 
 
+class TestGetTransactionsFunction(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "Дата платежа": ["15.01.2023", None, "05.02.2023"],
+            "Сумма платежа": [-1000.0, -500.0, 2000.0],
+        })
+
+    @patch("src.services.load_transactions")
+    def test_get_transactions_builds_list(self, mock_load):
+        mock_load.return_value = self.df
+        expected_result = [
+            {"Дата платежа": "2023-01-15", "Сумма платежа": 1000.0},
+            {"Дата платежа": "2023-02-05", "Сумма платежа": 2000.0},
+        ]
+        self.assertEqual(get_transactions("test_build.xlsx"), expected_result)
+
+    @patch("src.services.load_transactions")
+    def test_get_transactions_is_cached(self, mock_load):
+        mock_load.return_value = self.df
+        first = get_transactions("test_cache.xlsx")
+        second = get_transactions("test_cache.xlsx")
+        self.assertIs(first, second)
+
+        # Хранилище отдало новый DataFrame (исходный файл изменился) - список пересобирается
+        mock_load.return_value = self.df.iloc[:1].copy()
+        third = get_transactions("test_cache.xlsx")
+        self.assertEqual(third, [{"Дата платежа": "2023-01-15", "Сумма платежа": 1000.0}])
+
+    @patch("src.services.load_transactions")
+    def test_get_transactions_missing_file(self, mock_load):
+        mock_load.return_value = None
+        self.assertEqual(get_transactions("missing.xlsx"), [])
+
+
+class TestInvestingMatrixFunction(unittest.TestCase):
+
+    def setUp(self):
+        self.payment_dates = np.array(["2023-01-15", "2023-01-20", "2023-02-05", "2023-01-25"], dtype="datetime64[D]")
+        self.amounts = np.array([1000.0, 500.0, 2000.0, 1500.0])
+        self.transactions = [
+            {"Дата платежа": str(date), "Сумма платежа": amount}
+            for date, amount in zip(self.payment_dates, self.amounts)
+        ]
+
+    def test_matrix_matches_investing(self):
+        limits = [50, 100, 200]
+        months = ["2023-01", "2023-02"]
+        result = investing_matrix(self.payment_dates, self.amounts, limits, months)
+        for month in months:
+            for limit in limits:
+                expected = json.loads(investing(month, self.transactions, limit))["total_amount"]
+                self.assertEqual(result.loc[month, limit], expected)
+
+    def test_matrix_fractional_amounts(self):
+        amounts = np.array([160.89, 64.0, 118.12, 10.5])
+        transactions = [
+            {"Дата платежа": str(date), "Сумма платежа": amount} for date, amount in zip(self.payment_dates, amounts)
+        ]
+        result = investing_matrix(self.payment_dates, amounts, [10], ["2023-01"])
+        expected = json.loads(investing("2023-01", transactions, 10))["total_amount"]
+        self.assertEqual(result.loc["2023-01", 10], expected)
+
+    def test_matrix_all_months(self):
+        result = investing_matrix(self.payment_dates, self.amounts, [100])
+        self.assertEqual(list(result.index), ["2023-01", "2023-02"])
+
+    def test_matrix_unknown_month(self):
+        result = investing_matrix(self.payment_dates, self.amounts, [100], ["2022-12"])
+        self.assertEqual(result.loc["2022-12", 100], 0.0)
+
+    def test_investing_arrays(self):
+        df = pd.DataFrame({"Дата платежа": ["15.01.2023", None], "Сумма платежа": [-1000.0, -500.0]})
+        payment_dates, amounts = investing_arrays(df)
+        np.testing.assert_array_equal(payment_dates, np.array(["2023-01-15"], dtype="datetime64[D]"))
+        np.testing.assert_array_equal(amounts, np.array([1000.0]))
+
+
+class TestInvestingChunkedFunction(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "Дата платежа": ["15.01.2023", None, "20.01.2023", "05.02.2023", "25.01.2023"],
+            "Сумма платежа": [-160.89, -500.0, -64.0, 2000.0, -118.12],
+        })
+
+    def test_investing_chunked_matches_investing(self):
+        transactions = build_transactions(self.df)
+        for chunk_size in [1, 2, 10]:
+            chunks = [self.df.iloc[start:start + chunk_size] for start in range(0, len(self.df), chunk_size)]
+            for month in ["2023-01", "2023-02", "2023-03"]:
+                self.assertEqual(investing_chunked(month, iter(chunks), 10), investing(month, transactions, 10))
+
+    def test_investing_chunked_matches_in_memory_substring_month(self):
+        # Месяц ищется в дате платежа как подстрока: год целиком, часть дня, месяц без транзакций
+        df = pd.concat([self.df, pd.DataFrame({"Дата платежа": ["31.12.2022"], "Сумма платежа": [-42.5]})])
+        transactions = build_transactions(df)
+        batch = TransactionBatch.from_frame(df.reindex(columns=[
+            "Дата платежа", "Сумма платежа", "Сумма операции с округлением", "Номер карты", "Категория", "Описание",
+        ]))
+        chunks = [df.iloc[start:start + 2] for start in range(0, len(df), 2)]
+        for month in ["2023", "2022", "2023-01-2", "2023-0", "2024"]:
+            expected = json.loads(investing(month, transactions, 10))
+            self.assertEqual(json.loads(investing(month, batch, 10)), expected)
+            self.assertEqual(json.loads(investing_chunked(month, iter(chunks), 10)), expected)
+
+
 if __name__ == "__main__":
     unittest.main()
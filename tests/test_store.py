@@ -0,0 +1,263 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.store import DateIndex, TransactionStore, clear_stores, date_index_for, get_store
+
+# Создаем тестовый DataFrame для имитации данных из Excel
+test_df = pd.DataFrame({
+    "Дата операции": ["01.12.2021 10:00:00", "15.12.2021 10:00:00", "16.12.2021 12:00:00"],
+    "Номер карты": ["*7197", np.nan, "*7197"],
+    "Сумма платежа": [-100.5, -200.0, 300.0],
+    "Бонусы (включая кэшбэк)": [1, 2, 3],
+})
+
+
+def make_source(tmp_path: Any) -> str:
+    """Функция создает пустой исходный файл, содержимое которого подменяется моком"""
+    source = tmp_path / "operations.xlsx"
+    source.write_bytes(b"xlsx")
+    return str(source)
+
+
+@patch("pandas.read_excel")
+def test_store_reads_excel_once(mock_read_excel: Any, tmp_path: Any) -> None:
+    """Функция тестирует, что повторная загрузка не читает Excel заново"""
+    mock_read_excel.return_value = test_df
+    store = TransactionStore(make_source(tmp_path))
+
+    first = store.load()
+    second = store.load()
+
+    assert mock_read_excel.call_count == 1
+    assert first is second
+    pd.testing.assert_frame_equal(first, test_df)
+
+
+@patch("pandas.read_excel")
+def test_store_concurrent_loads_read_excel_once(mock_read_excel: Any, tmp_path: Any) -> None:
+    """Функция тестирует, что потоки, одновременно обратившиеся к хранилищу, загружают файл один раз"""
+
+    def slow_read_excel(*args: Any, **kwargs: Any) -> pd.DataFrame:
+        time.sleep(0.05)
+        return test_df
+
+    mock_read_excel.side_effect = slow_read_excel
+    store = TransactionStore(make_source(tmp_path))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        frames = list(executor.map(lambda _: store.load(), range(4)))
+
+    assert mock_read_excel.call_count == 1
+    assert all(frame is frames[0] for frame in frames)
+
+
+@patch("pandas.read_excel")
+def test_store_uses_disk_cache(mock_read_excel: Any, tmp_path: Any) -> None:
+    """Функция тестирует, что новое хранилище читает столбцовый кэш, а не Excel"""
+    mock_read_excel.return_value = test_df
+    source = make_source(tmp_path)
+    TransactionStore(source).load()
+
+    result = TransactionStore(source).load()
+
+    assert mock_read_excel.call_count == 1
+    pd.testing.assert_frame_equal(result, test_df)
+
+
+@patch("pandas.read_excel")
+def test_store_rebuilds_cache_when_source_changes(mock_read_excel: Any, tmp_path: Any) -> None:
+    """Функция тестирует перестроение кэша при изменении исходного файла"""
+    mock_read_excel.return_value = test_df
+    source = make_source(tmp_path)
+    store = TransactionStore(source)
+    store.load()
+
+    updated_df = test_df.iloc[:2]
+    mock_read_excel.return_value = updated_df
+    with open(source, "ab") as file:
+        file.write(b"new rows")
+
+    result = store.load()
+
+    assert mock_read_excel.call_count == 2
+    pd.testing.assert_frame_equal(result, updated_df)
+
+
+@patch("pandas.read_excel")
+def test_store_cache_keeps_nullable_integers(mock_read_excel: Any, tmp_path: Any) -> None:
+    """Функция тестирует, что целые столбцы с пропусками (Int64) сохраняются в кэш и читаются без изменений"""
+    source_df = test_df.astype({"Бонусы (включая кэшбэк)": "Int64"})
+    source_df.loc[1, "Бонусы (включая кэшбэк)"] = pd.NA
+    mock_read_excel.return_value = source_df
+    source = make_source(tmp_path)
+    TransactionStore(source).load()
+
+    pd.testing.assert_frame_equal(TransactionStore(source).load(), source_df)
+    result = TransactionStore(source, mmap=True).load()
+    assert result is not None
+    pd.testing.assert_frame_equal(result.astype({"Дата операции": object, "Номер карты": object}), source_df)
+    assert mock_read_excel.call_count == 1
+
+
+def mmap_backed(values: Any) -> bool:
+    """Функция проверяет, что массив numpy - отображение файла (np.memmap) или его срез"""
+    while values is not None:
+        if isinstance(values, np.memmap):
+            return True
+        values = getattr(values, "base", None)
+    return False
+
+
+@patch("pandas.read_excel")
+def test_store_mmap_date_index_shares_cache_arrays(mock_read_excel: Any, tmp_path: Any) -> None:
+    """Функция тестирует, что при mmap=True индекс по дате использует массивы из файлов кэша без копирования:
+    строки в кэше уже отсортированы по дате, строковые столбцы остаются кодами словаря"""
+    mock_read_excel.return_value = test_df.iloc[::-1].reset_index(drop=True)
+    source = make_source(tmp_path)
+    TransactionStore(source).load()
+
+    store = TransactionStore(source, mmap=True)
+    index = store.date_index()
+    assert index is not None
+    assert mmap_backed(index.dates)
+    for name in index.frame.columns:
+        values = index.frame[name].array
+        assert mmap_backed(values.codes if isinstance(values, pd.Categorical) else np.asarray(values)), name
+    assert store.load() is index.frame
+
+    # Срезы индекса - обычные строки в порядке дат, номера строк - как в исходном файле
+    december = index.month("2021-12")
+    assert list(december.index) == [2, 1, 0]
+    assert december["Номер карты"].dtype == object
+    assert list(december["Номер карты"].fillna("")) == ["*7197", "", "*7197"]
+
+
+def test_store_missing_file(tmp_path: Any) -> None:
+    """Функция тестирует загрузку несуществующего файла"""
+    store = TransactionStore(os.path.join(tmp_path, "missing.xlsx"))
+    assert store.load() is None
+
+
+def test_clear_stores_applies_mmap(tmp_path: Any) -> None:
+    """Функция тестирует, что после clear_stores хранилище создается заново с новым значением mmap"""
+    source = os.path.join(tmp_path, "operations.xlsx")
+    assert get_store(source).mmap is False
+    assert get_store(source, mmap=True).mmap is False
+    clear_stores()
+    assert get_store(source, mmap=True).mmap is True
+    assert get_store(source) is get_store(source, mmap=True)
+
+
+def test_date_index_between() -> None:
+    """Функция тестирует выборку транзакций по диапазону дат бинарным поиском"""
+    index = DateIndex(test_df)
+    result = index.between("2021-12-15 00:00:00", "2021-12-16 12:00:00")
+    assert list(result.index) == [1, 2]
+    assert index.between("2022-01-01 00:00:00", "2022-02-01 00:00:00").empty
+
+
+def test_date_index_sorts_by_date() -> None:
+    """Функция тестирует сортировку по дате операции и выборку за месяц"""
+    unsorted_df = test_df.iloc[::-1]
+    index = DateIndex(unsorted_df)
+    assert list(index.frame.index) == [0, 1, 2]
+    assert list(index.month("2021-12").index) == [0, 1, 2]
+    assert index.month("2021-11").empty
+
+
+def test_date_index_month_to_date_and_last_months() -> None:
+    """Функция тестирует выборку с начала месяца и за последние месяцы"""
+    index = DateIndex(test_df)
+    assert list(index.month_to_date("2021-12-15 10:00:00").index) == [0, 1]
+    assert list(index.last_months("2022-01-20 00:00:00", 1).index) == []
+    assert list(index.last_months("2022-01-20 00:00:00", 2).index) == [0, 1, 2]
+
+
+def test_date_index_append_merges_lazily() -> None:
+    """Функция тестирует добавление строк: до обращения ко всему индексу строки хранятся отдельно по месяцам,
+    срезы без новых строк не копируются, а объединенный индекс совпадает с построенным заново"""
+    index = DateIndex(test_df)
+    new_rows = pd.DataFrame({
+        "Дата операции": ["05.01.2022 09:00:00", "15.12.2021 10:00:00", "03.01.2022 08:00:00"],
+        "Номер карты": ["*4556", "*4556", np.nan],
+        "Сумма платежа": [-10.0, -20.0, -30.0],
+        "Бонусы (включая кэшбэк)": [0, 0, 0],
+    }, index=[3, 4, 5])
+    index.append(new_rows)
+
+    assert len(index) == 6
+    assert list(index.month("2022-01").index) == [5, 3]
+    assert list(index.between("2021-12-15 00:00:00", "2021-12-31 00:00:00").index) == [1, 4, 2]
+    first_day = index.between("2021-12-01 00:00:00", "2021-12-01 23:59:59")
+    assert np.shares_memory(first_day["Сумма платежа"].to_numpy(), test_df["Сумма платежа"].to_numpy())
+
+    rebuilt = DateIndex(pd.concat([test_df, new_rows]))
+    pd.testing.assert_frame_equal(index.frame, rebuilt.frame)
+    np.testing.assert_array_equal(index.dates, rebuilt.dates)
+    np.testing.assert_array_equal(index.month_offsets, rebuilt.month_offsets)
+
+
+@patch("pandas.read_excel")
+def test_store_date_index_is_cached(mock_read_excel: Any, tmp_path: Any) -> None:
+    """Функция тестирует, что индекс строится один раз и используется date_index_for"""
+    mock_read_excel.return_value = test_df
+    store = get_store(make_source(tmp_path))
+    frame = store.load()
+
+    assert store.date_index() is store.date_index()
+    assert date_index_for(frame) is store.date_index()
+
+
+@patch("pandas.read_excel")
+def test_store_ingest_appends_only_new_rows(mock_read_excel: Any, tmp_path: Any) -> None:
+    """Функция тестирует добавление выгрузки: повторы пропускаются, индекс и таблица трат обновляются"""
+    mock_read_excel.return_value = test_df.assign(Категория=["Транспорт", "Транспорт", "Супермаркеты"], Кэшбэк=np.nan)
+    source = make_source(tmp_path)
+    store = TransactionStore(source)
+    store.load()
+    index = store.date_index()
+    aggregates = store.aggregates()
+    assert index is not None and aggregates is not None
+
+    export_df = pd.DataFrame({
+        "Дата операции": ["15.12.2021 10:00:00", "10.12.2021 09:00:00", "10.12.2021 09:00:00"],
+        "Номер карты": [np.nan, "*4556", "*4556"],
+        "Сумма платежа": [-200.0, -50.0, -50.0],
+        "Бонусы (включая кэшбэк)": [2, 0, 0],
+        "Категория": ["Транспорт", "Супермаркеты", "Супермаркеты"],
+        "Кэшбэк": [np.nan, 1.0, 1.0],
+    })
+    export_path = tmp_path / "export.csv"
+    export_df.to_csv(export_path, index=False)
+
+    assert store.ingest(str(export_path)) == 1
+    assert store.ingest(str(export_path)) == 0
+
+    frame = store.load()
+    assert frame is not None
+    assert len(frame) == 4
+    assert frame is index.frame
+    assert list(index.between("2021-12-10 00:00:00", "2021-12-10 23:59:59").index) == [3]
+    rebuilt = DateIndex(frame)
+    np.testing.assert_array_equal(index.dates, rebuilt.dates)
+    pd.testing.assert_frame_equal(index.frame, rebuilt.frame)
+    assert aggregates.table["count"].sum() == 4
+    assert aggregates.complete_table["count"].sum() == len(frame.dropna())
+
+    # Добавленные строки сохраняются на диске и читаются новым хранилищем
+    reloaded = TransactionStore(source).load()
+    assert mock_read_excel.call_count == 1
+    pd.testing.assert_frame_equal(reloaded, frame)
+
+
+def test_store_ingest_missing_export(tmp_path: Any) -> None:
+    """Функция тестирует добавление несуществующей выгрузки"""
+    with patch("pandas.read_excel", return_value=test_df):
+        store = TransactionStore(make_source(tmp_path))
+        assert store.ingest(os.path.join(tmp_path, "missing.xlsx")) == 0
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from src.topn import RunningTopN, group_top_n_indices, top_n_indices
+
+
+@pytest.mark.parametrize(
+    "values, top_n, expected",
+    [
+        ([5.0, 1.0, 9.0, 3.0, 7.0], 3, [2, 4, 0]),
+        ([5.0, 9.0, 5.0, 5.0, 1.0], 3, [1, 0, 2]),
+        ([1.0, np.nan, 2.0], 5, [2, 0]),
+        ([1.0, 2.0], 0, []),
+        ([], 5, []),
+    ],
+)
+def test_top_n_indices(values: list[float], top_n: int, expected: list[int]) -> None:
+    """Функция тестирует частичный отбор ТОП-N с порядком равных значений по индексу"""
+    assert list(top_n_indices(np.array(values), top_n)) == expected
+
+
+def test_top_n_indices_matches_stable_sort() -> None:
+    """Функция тестирует совпадение с полной устойчивой сортировкой на случайных данных"""
+    values = np.random.default_rng(1).integers(0, 50, size=1000).astype(float)
+    expected = np.argsort(-values, kind="stable")[:20]
+    assert list(top_n_indices(values, 20)) == list(expected)
+
+
+def test_group_top_n_indices_matches_per_group() -> None:
+    """Функция тестирует ТОП-N по группам: совпадает с отбором по каждой группе,
+    группы без значений (только пропуски) дают пустой ТОП, строки без группы (код -1) не учитываются"""
+    rng = np.random.default_rng(2)
+    codes = rng.integers(-1, 6, size=500)
+    values = rng.integers(0, 30, size=500).astype(float)
+    values[codes == 5] = np.nan
+
+    result = group_top_n_indices(codes, values, 4)
+
+    assert sorted(result) == [0, 1, 2, 3, 4, 5]
+    for code, top in result.items():
+        positions = np.flatnonzero(codes == code)
+        assert list(top) == list(positions[top_n_indices(values[positions], 4)])
+
+
+def test_group_top_n_indices_large_input_few_groups() -> None:
+    """Функция тестирует ТОП-N по группам на большом массиве с несколькими группами и множеством равных значений:
+    результат совпадает с полной устойчивой сортировкой по группе и убыванию значения"""
+    rng = np.random.default_rng(3)
+    codes = rng.integers(-1, 3, size=200_000)
+    values = rng.integers(0, 1000, size=200_000).astype(float)
+    values[rng.random(200_000) < 0.01] = np.nan
+
+    result = group_top_n_indices(codes, values, 10)
+
+    assert sorted(result) == [0, 1, 2]
+    for code, top in result.items():
+        positions = np.flatnonzero((codes == code) & ~np.isnan(values))
+        expected = positions[np.argsort(-values[positions], kind="stable")[:10]]
+        assert list(top) == list(expected)
+
+
+def test_running_top_n() -> None:
+    """Функция тестирует потоковый ТОП-N по группам"""
+    running_top = RunningTopN(2)
+    running_top.update([5.0, 9.0, 5.0, 1.0, float("nan")], ["a", "b", "c", "d", "e"], ["x", "x", "x", "y", "y"])
+    running_top.push(7.0, "f", "x")
+
+    assert running_top.result("x") == ["b", "f"]
+    assert running_top.result("y") == ["d"]
+    assert running_top.result("z") == []
+    assert running_top.groups() == ["x", "y"]
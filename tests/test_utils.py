@@ -1,12 +1,18 @@
 import json
 import os
-from typing import Any
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator
 from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
 
 import pandas as pd
 import pytest
 
-from src.utils import format_date, get_currency_rates, get_stock_prices, greetings, import_from_excel, start_month
+from src.utils import (cards_info, cards_info_chunked, currencies_stocks_dict, format_date, get_currency_rates,
+                       get_stock_prices, greetings, import_from_excel, load_user_settings, start_month,
+                       top_transactions, top_transactions_chunked)
 
 # Получаем абсолютный путь до текущей директории
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -25,7 +31,19 @@ with open(abs_json_path, "w") as f:
     json.dump(test_json_data, f)
 
 
-@patch("requests.get")
+def test_load_user_settings_creates_default(tmp_path: Any) -> None:
+    """Функция тестирует создание файла настроек по умолчанию при первом обращении"""
+    settings_path = str(tmp_path / "user_settings.json")
+    assert load_user_settings(settings_path) == currencies_stocks_dict
+    assert os.path.exists(settings_path)
+
+
+def test_load_user_settings_keeps_existing() -> None:
+    """Функция тестирует чтение существующего файла настроек"""
+    assert load_user_settings(abs_json_path) == test_json_data
+
+
+@patch("requests.Session.get")
 def test_get_currency_rates(mock_get: Any) -> None:
     """Функция тестирует составление списка словарей с валютами. Курсы валюты импортируются по API"""
 
@@ -42,8 +60,12 @@ def test_get_currency_rates(mock_get: Any) -> None:
 
     assert get_currency_rates(abs_json_path) == expected_result
 
+    # Повторный запрос берет курсы из кэша и не обращается к API
+    assert get_currency_rates(abs_json_path) == expected_result
+    assert mock_get.call_count == 1
 
-@patch("requests.get")
+
+@patch("requests.Session.get")
 def test_get_stock_prices(mock_get: Any) -> None:
     """Функция тестирует составление списка словарей с акциями. Стоимости акций импортируются по API"""
 
@@ -68,6 +90,82 @@ def test_get_stock_prices(mock_get: Any) -> None:
     assert get_stock_prices(abs_json_path) == expected_result
 
 
+# Задержка ответа локального тестового сервера акций в секундах
+STUB_DELAY = 0.3
+
+
+class StubStockHandler(BaseHTTPRequestHandler):
+    """Локальный тестовый сервер API акций: отвечает с задержкой, для пакета с тикером FAIL возвращает ошибку 404"""
+
+    requests_count = 0
+
+    def do_GET(self) -> None:
+        StubStockHandler.requests_count += 1
+        time.sleep(STUB_DELAY)
+        symbols = parse_qs(urlparse(self.path).query)["symbols"][0].split(",")
+        if "FAIL" in symbols:
+            self.send_response(404)
+            self.end_headers()
+            self.wfile.write(b"Not Found")
+            return
+        body = json.dumps({"data": [{"symbol": symbol, "close": 100.0} for symbol in symbols]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def stub_stock_server() -> Iterator[str]:
+    """Фикстура запускает локальный тестовый сервер API акций и возвращает его адрес"""
+    StubStockHandler.requests_count = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubStockHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1/eod"
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_stock_prices_concurrent(stub_stock_server: str, tmp_path: Any) -> None:
+    """Функция тестирует, что акции запрашиваются параллельно, а ошибка по одной акции не мешает остальным"""
+    settings_path = tmp_path / "user_settings.json"
+    settings_path.write_text(json.dumps({"user_currencies": [], "user_stocks": ["AAPL", "FAIL", "AMZN", "MSFT"]}))
+
+    with patch("src.utils.STOCK_API_URL", stub_stock_server):
+        start = time.perf_counter()
+        result = get_stock_prices(str(settings_path), batch_size=1)
+        elapsed = time.perf_counter() - start
+
+    assert result == [
+        {"stock": "AAPL", "price": 100.0},
+        {"stock": "AMZN", "price": 100.0},
+        {"stock": "MSFT", "price": 100.0},
+    ]
+    # Время близко к самому медленному запросу, а не к сумме всех запросов
+    assert elapsed < 2 * STUB_DELAY
+
+
+def test_get_stock_prices_batched(stub_stock_server: str, tmp_path: Any) -> None:
+    """Функция тестирует, что тикеры запрашиваются пакетами, а ответ разбирается по тикерам"""
+    stocks = [f"T{i}" for i in range(7)]
+    settings_path = tmp_path / "user_settings.json"
+    settings_path.write_text(json.dumps({"user_currencies": [], "user_stocks": stocks}))
+
+    with patch("src.utils.STOCK_API_URL", stub_stock_server):
+        result = get_stock_prices(str(settings_path), batch_size=3)
+        assert StubStockHandler.requests_count == 3
+
+        # Повторный запрос полностью обслуживается кэшем
+        assert get_stock_prices(str(settings_path), batch_size=3) == result
+        assert StubStockHandler.requests_count == 3
+
+    assert result == [{"stock": stock, "price": 100.0} for stock in stocks]
+
+
 @pytest.mark.parametrize(
     "date, greetings_output",
     [
@@ -123,5 +221,38 @@ def test_import_from_excel(mock_read_excel: Any) -> None:
     assert result["Сумма операции с округлением"].sum() == 300  # Проверяем сумму
 
 
+# Создаем тестовый DataFrame для проверки обработки по частям (с равными суммами платежа)
+chunked_df = pd.DataFrame({
+    "Дата платежа": ["15.01.2023", "20.01.2023", None, "25.01.2023", "05.02.2023", "06.02.2023", "07.02.2023"],
+    "Номер карты": ["*7197", "*4556", "*7197", None, "*4556", "*7197", "*4556"],
+    "Сумма платежа": [-1000.0, -160.89, -10.0, 1500.0, -2000.0, -160.89, 0.1],
+    "Сумма операции с округлением": [1000.0, 160.89, 10.0, 1500.0, 2000.0, 160.89, 0.1],
+    "Категория": ["Супермаркеты", "Фастфуд", "Супермаркеты", "Пополнения", "Переводы", "Фастфуд", "Фастфуд"],
+    "Описание": ["Магнит", "KFC", "Магнит", "Перевод", "Перевод", "KFC", "KFC"],
+})
+
+
+def split_chunks(input_df: pd.DataFrame, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Функция разбивает DataFrame на порции строк"""
+    for start in range(0, len(input_df), chunk_size):
+        yield input_df.iloc[start:start + chunk_size]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 10])
+def test_cards_info_chunked(chunk_size: int) -> None:
+    """Функция тестирует, что информация по картам по частям совпадает с обработкой всего DataFrame"""
+    assert cards_info_chunked(split_chunks(chunked_df, chunk_size)) == cards_info(chunked_df)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 10])
+def test_top_transactions_chunked(chunk_size: int) -> None:
+    """Функция тестирует, что ТОП-N по частям совпадает с обработкой всего DataFrame (в том числе при равных суммах)"""
+    for top_n in [1, 3, 10]:
+        assert top_transactions_chunked(split_chunks(chunked_df, chunk_size), top_n) == top_transactions(
+            chunked_df, top_n
+        )
+    assert top_transactions_chunked(iter([])) == []
+
+
 if __name__ == "__main__":
     pytest.main()
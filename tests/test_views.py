@@ -1,12 +1,22 @@
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
+import numpy as np
 import pandas as pd
+import requests
 from dotenv import load_dotenv
 
-from src.views import web_main
+from src.cache import ResponseCache
+from src.fx import failed_days
+from src.log_setup import process_log_queue
+from src.metrics import get_dashboard_metrics
+from src.serializer import JSON_INDENT
+from src.store import get_store
+from src.views import build_web_main, init_dashboard_worker, web_main, web_main_batch, web_main_cached
+from tests.test_store import mmap_backed
 
 load_dotenv(".env")
 
@@ -90,7 +100,131 @@ def test_web_main() -> Any:
         }
 
         # Преобразуем ожидаемый вывод в JSON
-        expected_json_output = json.dumps(expected_output, ensure_ascii=False, indent=4)
+        expected_json_output = json.dumps(expected_output, ensure_ascii=False, indent=JSON_INDENT)
 
         # Проверяем, что функция возвращает ожидаемый результат
         assert web_main(abs_xlsx_path) == expected_json_output
+
+
+def test_web_main_batch(tmp_path: Any) -> None:
+    """Функция тестирует построение сводок в пуле процессов: результаты совпадают с web_main и идут по порядку"""
+    settings_path = tmp_path / "user_settings.json"
+    settings_path.write_text(json.dumps({"user_currencies": [], "user_stocks": []}))
+    dashboard_requests = [
+        (str(settings_path), "2018-02-16 12:01:58"),
+        (str(settings_path), "2021-12-29 22:32:24"),
+        (str(settings_path), "2019-07-01 08:00:00"),
+    ]
+
+    result = web_main_batch(dashboard_requests, abs_xlsx_path, max_workers=2)
+
+    assert result == [web_main(abs_xlsx_path, date_time, json_file) for json_file, date_time in dashboard_requests]
+    assert [json.loads(output)["greeting"] for output in result] == ["Добрый день", "Добрый вечер", "Доброе утро"]
+
+
+def worker_store_arrays_mmap(input_df: str) -> list[bool]:
+    """Функция строит индекс по дате в процессе-обработчике и возвращает для дат и каждого столбца,
+    остались ли их массивы отображением файлов кэша (mmap)"""
+    store = get_store(input_df)
+    index = store.date_index()
+    assert index is not None and store.mmap
+    result = [mmap_backed(index.dates)]
+    for name in index.frame.columns:
+        values = index.frame[name].array
+        result.append(mmap_backed(values.codes if isinstance(values, pd.Categorical) else np.asarray(values)))
+    return result
+
+
+def test_init_dashboard_worker_uses_mmap_store() -> None:
+    """Функция тестирует, что процесс-обработчик не использует унаследованное хранилище без mmap,
+    а индекс по дате в нем не копирует массивы из файлов кэша"""
+    get_store(abs_xlsx_path).date_index()
+    with process_log_queue() as log_queue, ProcessPoolExecutor(
+        max_workers=1, initializer=init_dashboard_worker, initargs=(abs_xlsx_path, log_queue)
+    ) as executor:
+        arrays_mmap = executor.submit(worker_store_arrays_mmap, abs_xlsx_path).result()
+    assert len(arrays_mmap) > 1 and all(arrays_mmap)
+    assert get_store(abs_xlsx_path).mmap is False
+
+
+def test_web_main_missing_file(tmp_path: Any) -> None:
+    """Функция тестирует сводку для отсутствующего файла с транзакциями: пустой json-ответ"""
+    assert web_main(str(tmp_path / "missing.xlsx"), "2021-12-29 22:32:24") == "{}"
+
+
+def test_web_main_metrics(tmp_path: Any) -> None:
+    """Функция тестирует замеры этапов построения сводки: в ответе (include_metrics) и в общих счетчиках"""
+    settings_path = tmp_path / "user_settings.json"
+    settings_path.write_text(json.dumps({"user_currencies": [], "user_stocks": []}))
+    get_dashboard_metrics().reset()
+
+    result = json.loads(web_main(abs_xlsx_path, "2021-12-29 22:32:24", str(settings_path), include_metrics=True))
+
+    stages = ["load", "date_filter", "fx_normalise", "cards", "top_n", "fx_fetch", "stock_fetch", "serialise"]
+    assert sorted(result["metrics"]) == sorted(stages)
+    assert result["metrics"]["load"]["rows"] == 6705
+    assert result["metrics"]["serialise"]["bytes"] > 0
+    assert all(get_dashboard_metrics().snapshot()[stage]["calls_total"] == 1 for stage in stages)
+    assert "metrics" not in json.loads(web_main(abs_xlsx_path, "2021-12-29 22:32:24", str(settings_path)))
+
+
+def test_web_main_cached(tmp_path: Any) -> None:
+    """Функция тестирует кэш сводок: повторный запрос не строит сводку заново,
+    а изменение данных или настроек пользователя дает новый ответ"""
+    settings_path = tmp_path / "user_settings.json"
+    settings_path.write_text(json.dumps({"user_currencies": [], "user_stocks": []}))
+    data_path = tmp_path / "operations.csv"
+    pd.read_excel(abs_xlsx_path).head(100).to_csv(data_path, index=False)
+    cache = ResponseCache()
+    date_time = "2018-02-16 12:01:58"
+
+    with patch("src.views.build_web_main", side_effect=build_web_main) as mock_web_main:
+        first = web_main_cached(str(data_path), date_time, str(settings_path), cache)
+        assert web_main_cached(str(data_path), date_time, str(settings_path), cache) == first
+        assert mock_web_main.call_count == 1
+
+        web_main_cached(str(data_path), "2018-02-16 18:01:58", str(settings_path), cache)
+        assert mock_web_main.call_count == 2
+
+        settings_path.write_text(json.dumps({"user_currencies": ["USD"], "user_stocks": []}))
+        with patch("src.views.get_currency_rates", return_value=[{"currency": "USD", "rate": 73.5}]):
+            web_main_cached(str(data_path), date_time, str(settings_path), cache)
+        assert mock_web_main.call_count == 3
+
+        pd.read_excel(abs_xlsx_path).head(200).to_csv(data_path, index=False)
+        web_main_cached(str(data_path), date_time, str(settings_path), cache)
+        assert mock_web_main.call_count == 4
+
+
+def test_web_main_cached_skips_unconverted(tmp_path: Any) -> None:
+    """Функция тестирует сводку, когда курсы на даты платежей получить не удалось: транзакции в другой валюте
+    не попадают в суммы по картам, перечисляются в ответе, а ответ не сохраняется в кэш"""
+    settings_path = tmp_path / "user_settings.json"
+    settings_path.write_text(json.dumps({"user_currencies": [], "user_stocks": []}))
+    data_path = tmp_path / "operations.csv"
+    pd.read_excel(abs_xlsx_path).iloc[3700:3850].to_csv(data_path, index=False)
+    cache = ResponseCache()
+    date_time = "2019-09-30 23:59:59"
+
+    with patch("src.views.build_web_main", side_effect=build_web_main) as mock_web_main:
+        with patch("src.fx.get_provider_client", side_effect=requests.ConnectionError("нет сети")):
+            first = json.loads(web_main_cached(str(data_path), date_time, str(settings_path), cache))
+            web_main_cached(str(data_path), date_time, str(settings_path), cache)
+        assert mock_web_main.call_count == 2
+        assert len(cache) == 0
+
+        unconverted = first["unconverted_transactions"]
+        assert [row["currency"] for row in unconverted] == ["CNY"] * 8
+        amounts = sorted(row["amount"] for row in unconverted)
+        assert amounts == [-342.86, -50.0, -42.0, -32.0, -10.0, -4.72, -4.72, 500.0]
+        assert all(row["amount"] != 500.0 for row in first["top_transactions"])
+
+        rates = Mock()
+        rates.json.return_value = {"conversion_rates": {"USD": 1.0, "RUB": 64.0, "CNY": 7.1}}
+        failed_days.clear()
+        with patch("src.fx.get_provider_client") as mock_client:
+            mock_client.return_value.get.return_value = rates
+            converted = json.loads(web_main_cached(str(data_path), date_time, str(settings_path), cache))
+            web_main_cached(str(data_path), date_time, str(settings_path), cache)
+        assert mock_web_main.call_count == 3
+        assert "unconverted_transactions" not in converted